@@ -0,0 +1,19 @@
+"""Universal Media Converter: ffmpeg conversions from the desktop app, the command line or Python."""
+from .common import APP_NAME, MODES, VERSION
+from .caps import FFmpegCapabilities, check_command, get_capabilities
+from .progress import Progress, ProgressTracker, format_seconds, parse_timestamp
+from .index import MediaIndex, probe_media, use_media_index
+from .engine import (
+    CommandPlan, Cue, JobResult, JobSpec, check_job, convert_subtitles, parse_renditions, parse_size, plan_job,
+    read_subtitles, shift_cues, write_subtitles
+)
+from .governor import ProcessLimits, ResourceGovernor
+from .runner import prepare_job, run_job, run_plan
+from .chunked import SegmentManifest, split_segments
+from .estimate import estimate_job
+from .cache import OutputCache, output_cache
+from .metrics import MetricsSink
+from .batch import load_manifest, run_batch
+from .watch import run_watch
+from .cluster import Coordinator, run_worker
+from .cli import main
@@ -0,0 +1,119 @@
+"""Manifest loading and the parallel batch scheduler."""
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from .common import default_workers
+from .progress import Progress
+from .engine import JobResult, JobSpec
+from .governor import ResourceGovernor
+from .runner import ChildUsage, run_job
+from .logs import job_log_path
+from .metrics import MetricsSink, job_metrics
+
+def load_manifest(path: str) -> List[JobSpec]:
+    """
+    Read a batch manifest. Accepted layouts:
+      - JSON Lines: one job object per line (blank lines and '#' comments ignored)
+      - JSON array of job objects
+      - JSON object {"defaults": {...}, "jobs": [...]} where defaults apply to every job
+    Every entry is validated up front so a typo on job 9000 doesn't surface hours in.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    defaults = {}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None  # JSON Lines
+    if isinstance(data, dict) and "jobs" in data:
+        defaults = data.get("defaults", {})
+        entries = list(enumerate(data["jobs"], start=1))
+    elif isinstance(data, list):
+        entries = list(enumerate(data, start=1))
+    else:
+        entries = []
+        for i, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                entries.append((i, json.loads(line)))
+    jobs = []
+    for i, entry in entries:
+        try:
+            jobs.append(JobSpec.from_dict({**defaults, **entry}))
+        except Exception as e:
+            raise RuntimeError(f"{path}: entry {i}: {e}")
+    return jobs
+
+def _run_batch_job(job: JobSpec, on_progress=None, log_dir: Optional[str] = None,
+                   governor: Optional[ResourceGovernor] = None, metrics: Optional[MetricsSink] = None) -> JobResult:
+    tail = deque(maxlen=20)
+    last = [None]
+    log_file = open(job_log_path(log_dir, job), "w", encoding="utf-8", errors="replace") if log_dir else None
+
+    def log(text: str):
+        tail.append(text)
+        if log_file:
+            log_file.write(text)
+
+    def progress(p: Progress):
+        last[0] = p
+        if on_progress:
+            on_progress(job, p)
+
+    slot = None
+    usage = ChildUsage()
+    t0 = time.monotonic()
+    try:
+        governed = job
+        if governor:
+            governed, slot = governor.admit(job, lambda reason: log(f"Waiting to start: {reason}\n"))
+            t0 = time.monotonic()
+        run_job(governed, log=log, on_progress=progress, usage=usage)
+        res = JobResult(job, True, time.monotonic() - t0, progress=last[0])
+    except Exception as e:
+        log(f"\nError: {e}\n")
+        res = JobResult(job, False, time.monotonic() - t0, str(e), list(tail), last[0])
+    finally:
+        if slot is not None:
+            governor.release(slot)
+        if log_file:
+            log_file.close()
+    if metrics:
+        metrics.record(job_metrics(res, usage))
+    return res
+
+def run_batch(jobs: Iterable[JobSpec], workers: Optional[int] = None,
+              on_result: Optional[Callable[[JobResult], None]] = None,
+              on_progress: Optional[Callable[[JobSpec, Progress], None]] = None,
+              log_dir: Optional[str] = None, governor: Optional[ResourceGovernor] = None,
+              metrics: Optional[MetricsSink] = None) -> List[JobResult]:
+    """
+    Run jobs through a bounded worker pool. Each worker thread just babysits one ffmpeg
+    process, so threads are enough; at most 2x workers jobs are queued at any time.
+    on_result is called once per job (serialized); on_progress(job, progress) from worker threads.
+    With log_dir set, each job's full ffmpeg output is written to its own file there.
+    With a governor, each job gets its share of the core budget and waits for admission.
+    With a metrics sink, every finished job is recorded there (see job_metrics).
+    """
+    workers = workers or default_workers()
+    results = []
+    slots = threading.BoundedSemaphore(workers * 2)
+    lock = threading.Lock()
+
+    def collect(fut):
+        res = fut.result()
+        with lock:
+            results.append(res)
+            if on_result:
+                on_result(res)
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for job in jobs:
+            slots.acquire()
+            pool.submit(_run_batch_job, job, on_progress, log_dir, governor, metrics).add_done_callback(collect)
+    return results
@@ -0,0 +1,180 @@
+"""Benchmarks of every conversion mode on generated inputs."""
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+from dataclasses import fields
+from typing import Callable, List, Optional
+
+from .common import FFMPEG, VERSION
+from .caps import get_capabilities
+from .engine import JobSpec, _mode_slug
+from .runner import ChildUsage, _no_log, _wait_child, run_ffmpeg
+from .metrics import _output_bytes
+
+BENCH_RESOLUTIONS = ["640x360", "1280x720", "1920x1080"]
+BENCH_DURATIONS = [5.0]
+BENCH_REGRESSION = 0.10  # flag wall/CPU time or size growing more than this vs. the baseline
+
+def _bench_srt(path: str, duration: float):
+    """Deterministic SRT with a cue every 2 seconds."""
+    def ts(t):
+        return f"{int(t // 3600):02d}:{int(t % 3600 // 60):02d}:{int(t % 60):02d},{int(round(t * 1000)) % 1000:03d}"
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        n, t = 1, 0.0
+        while t < duration:
+            f.write(f"{n}\n{ts(t)} --> {ts(min(t + 1.8, duration))}\nCue {n}: the quick brown fox jumps over the lazy dog\n\n")
+            n, t = n + 1, t + 2.0
+    os.replace(path + ".tmp", path)
+
+def _bench_source(path: str, cmd: List[str], log: Callable[[str], None]):
+    """Run a synthesis command into path (atomically) unless it was generated before."""
+    if os.path.exists(path):
+        return
+    tmp = os.path.join(os.path.dirname(path), "tmp_" + os.path.basename(path))
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    if "%04d" in cmd[-1]:
+        os.makedirs(tmp)
+        cmd = cmd[:-1] + [os.path.join(tmp, os.path.basename(cmd[-1]))]
+    else:
+        cmd = cmd[:-1] + [tmp]
+    run_ffmpeg(cmd, log)
+    os.replace(tmp, path)
+
+def bench_inputs(work: str, res: str, duration: float, log: Callable[[str], None] = _no_log) -> dict:
+    """Synthesize (once) the deterministic lavfi/SRT inputs the benchmark cases read."""
+    src = os.path.join(work, "sources")
+    os.makedirs(src, exist_ok=True)
+    d = f"{duration:g}"
+    tag = f"{res}_{d}s"
+    paths = {
+        "video": os.path.join(src, f"testsrc2_{tag}.mp4"),
+        "frames": os.path.join(src, f"frames_{tag}"),
+        "audio": os.path.join(src, f"sine_{d}s.wav"),
+        "srt": os.path.join(src, f"subs_{d}s.srt"),
+        "video_subs": os.path.join(src, f"testsrc2_{tag}_subs.mkv"),
+    }
+    bitexact = ["-map_metadata", "-1", "-fflags", "+bitexact", "-flags", "+bitexact"]
+    _bench_source(paths["video"], [
+        FFMPEG, "-y", "-f", "lavfi", "-i", f"testsrc2=size={res}:rate=30:duration={d}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:beep_factor=4:sample_rate=48000:duration={d}",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p", "-g", "60",
+        "-c:a", "aac", "-b:a", "128k", "-shortest"] + bitexact + [paths["video"]], log)
+    _bench_source(paths["frames"], [
+        FFMPEG, "-y", "-f", "lavfi", "-i", f"testsrc2=size={res}:rate=24:duration={d}"] + bitexact +
+        [os.path.join(paths["frames"], "frame_%04d.png")], log)
+    _bench_source(paths["audio"], [
+        FFMPEG, "-y", "-f", "lavfi", "-i", f"sine=frequency=440:beep_factor=4:sample_rate=48000:duration={d}",
+        "-ac", "2", "-c:a", "pcm_s16le"] + bitexact + [paths["audio"]], log)
+    if not os.path.exists(paths["srt"]):
+        _bench_srt(paths["srt"], duration)
+    _bench_source(paths["video_subs"], [
+        FFMPEG, "-y", "-i", paths["video"], "-i", paths["srt"], "-map", "0", "-map", "1",
+        "-c", "copy", "-c:s", "srt"] + bitexact + [paths["video_subs"]], log)
+    return paths
+
+def bench_cases(paths: dict, out_dir: str, first_res: bool) -> List[JobSpec]:
+    """One job per MODES entry. Resolution-independent modes (audio, subtitle convert) only on first_res."""
+    # Caches and stream-copy shortcuts are off so every run does the full work.
+    base = {"palette_cache": "", "auto_copy": "", "cache": ""}
+    specs = [
+        ("Video → Video", {"input": paths["video"], "out_format": "mp4", "video_codec": "h264", "crf": "23"}),
+        ("Video → Audio", {"input": paths["video"], "out_format": "mp3"}),
+        ("Audio → Audio", {"input": paths["audio"], "out_format": "mp3"}),
+        ("Video → Images", {"input": paths["video"], "out_format": "png"}),
+        ("Images → Video", {"image_pattern": paths["frames"], "out_format": "mp4", "video_codec": "h264"}),
+        ("Video → GIF", {"input": paths["video"], "out_format": "gif", "fps": "12"}),
+        ("Subtitles: Extract", {"input": paths["video_subs"], "out_format": "srt"}),
+        ("Subtitles: Convert", {"input": paths["srt"], "out_format": "vtt"}),
+        ("Subtitles: Burn into Video", {"input": paths["video"], "image_pattern": paths["srt"], "out_format": "mp4"}),
+        ("Video → Thumbnails", {"input": paths["video"], "out_format": "jpg", "thumb_interval": "1", "thumb_vtt": "1"}),
+    ]
+    jobs = []
+    for mode, spec in specs:
+        if not first_res and mode in ("Audio → Audio", "Subtitles: Convert"):
+            continue
+        folder = os.path.join(out_dir, _mode_slug(mode))
+        os.makedirs(folder, exist_ok=True)
+        name = "frame_%04d." + spec["out_format"] if mode in ("Video → Images", "Video → Thumbnails") \
+            else "out." + spec["out_format"]
+        jobs.append(JobSpec.from_dict({**base, **spec, "mode": mode, "output": os.path.join(folder, name)}))
+    return jobs
+
+def _self_command() -> List[str]:
+    """How to start this program again (script or frozen exe)."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable]
+    return [sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         "universal_media_converter.py")]
+
+def run_measured(cmd: List[str], log_path: str) -> dict:
+    """Run cmd to completion; wall time, plus CPU time and peak RSS of it and its children where the OS reports them."""
+    t0 = time.monotonic()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        usage = ChildUsage()
+        _wait_child(proc, usage)
+    measured = usage.processes > 0
+    return {"wall": time.monotonic() - t0, "cpu": usage.cpu_user + usage.cpu_system if measured else None,
+            "peak_rss": usage.peak_rss if measured else None, "exit_code": proc.returncode}
+
+def run_benchmarks(work: str, resolutions: List[str], durations: List[float], repeat: int = 1,
+                   modes: Optional[List[str]] = None, log: Callable[[str], None] = _no_log) -> dict:
+    """
+    Run every mode over synthetic inputs. Each job runs as a separate `batch` process so CPU time
+    and peak RSS cover exactly that job's ffmpeg children; of `repeat` runs the fastest is kept.
+    """
+    results = []
+    for duration in durations:
+        for i, res in enumerate(resolutions):
+            log(f"Preparing inputs {res}, {duration:g}s…\n")
+            paths = bench_inputs(work, res, duration)
+            out_dir = os.path.join(work, "out", f"{res}_{duration:g}s")
+            for job in bench_cases(paths, out_dir, first_res=(i == 0)):
+                if modes and job.mode not in modes:
+                    continue
+                independent = job.mode in ("Audio → Audio", "Subtitles: Convert")
+                case = f"{_mode_slug(job.mode)}/{'-' if independent else res}/{duration:g}s"
+                manifest = os.path.join(os.path.dirname(job.output), "job.json")
+                with open(manifest, "w", encoding="utf-8") as f:
+                    json.dump([{f.name: getattr(job, f.name) for f in fields(job)}], f)
+                cmd = _self_command() + ["batch", manifest, "-j", "1", "--status-interval", "0"]
+                best = None
+                for _ in range(max(1, repeat)):
+                    m = run_measured(cmd, os.path.join(os.path.dirname(job.output), "run.log"))
+                    if best is None or m["wall"] < best["wall"]:
+                        best = m
+                size = _output_bytes(job.output)
+                row = {"case": case, "mode": job.mode, "resolution": "" if independent else res,
+                       "duration": duration, "ok": best["exit_code"] == 0, **best, "output_bytes": size,
+                       "realtime": round(duration / best["wall"], 3) if best["wall"] else None}
+                results.append(row)
+                log(f"{case:45} {'ok' if row['ok'] else 'FAILED':6} {best['wall']:7.2f}s  "
+                    f"{row['realtime'] or 0:6.1f}x realtime  {size / 1024:9.0f} KB\n")
+    caps = get_capabilities()
+    return {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "ffmpeg": caps.version, "converter": VERSION,
+            "python": sys.version.split()[0], "platform": sys.platform, "cpus": os.cpu_count(),
+            "results": results}
+
+def compare_benchmarks(current: dict, baseline: dict, threshold: float = BENCH_REGRESSION) -> List[str]:
+    """Lines describing wall/CPU/size changes per case; regressions beyond threshold are marked."""
+    old = {r["case"]: r for r in baseline.get("results", [])}
+    lines = []
+    for r in current.get("results", []):
+        b = old.get(r["case"])
+        if not b:
+            continue
+        parts, worse = [], False
+        for key, label in (("wall", "wall"), ("cpu", "cpu"), ("output_bytes", "size")):
+            if r.get(key) and b.get(key):
+                change = r[key] / b[key] - 1
+                worse = worse or change > threshold
+                parts.append(f"{label} {change:+.0%}")
+        if r["ok"] != b["ok"]:
+            worse = worse or not r["ok"]
+            parts.append("now ok" if r["ok"] else "now FAILS")
+        lines.append(f"{'REGRESSION ' if worse else ''}{r['case']}: {', '.join(parts)}")
+    return lines
@@ -0,0 +1,140 @@
+"""Content-addressed cache of finished outputs, so identical conversions are not run twice."""
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import threading
+from dataclasses import fields
+from typing import Optional
+
+from .common import VERSION, app_data_dir
+from .caps import get_capabilities
+from .engine import JobSpec, _flag, _inputs_fingerprint
+from .frames import _wants_raw
+from .chunked import _wants_segmented
+from .timelapse import _wants_append
+
+OUTPUT_CACHE_MAX_BYTES = 20 * 1024 ** 3  # default size bound of the output cache
+
+# Fields that don't change the produced bytes: paths (inputs are fingerprinted by content),
+# scheduling, priorities, and caches of intermediate results.
+_CACHE_KEY_IGNORED = ("input", "output", "image_pattern", "chunked", "chunk_workers", "resumable", "cache",
+                      "palette_cache", "threads", "nice", "cpus", "loudnorm_measured")
+
+class OutputCache:
+    """
+    Content-addressed store of finished outputs. Key = input fingerprint + conversion settings
+    + converter and ffmpeg versions. Entries are hardlinks of the produced file where possible (copies
+    otherwise) and are evicted least-recently-used first once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, root: str, max_bytes: int = OUTPUT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # running total, computed on first store
+        os.makedirs(root, exist_ok=True)
+
+    def key_for(self, job: JobSpec) -> Optional[str]:
+        """Derived from the JobSpec alone: no plan is built, so nothing is probed, linked or created."""
+        try:
+            fp = _inputs_fingerprint(job)
+        except OSError:
+            return None
+        settings = {f.name: getattr(job, f.name) for f in fields(job) if f.name not in _CACHE_KEY_IGNORED}
+        payload = json.dumps([fp, settings, os.path.splitext(job.output)[1].lower(), _wants_segmented(job),
+                              VERSION, get_capabilities().version], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, key[:2], key + ext)
+
+    def fetch(self, key: str, output: str) -> bool:
+        """Materialize a cached result at output. False on a miss (or a damaged entry)."""
+        entry = self._entry(key, os.path.splitext(output)[1].lower())
+        try:
+            with open(entry + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if os.path.getsize(entry) != meta["size"]:
+                raise ValueError("size mismatch")
+        except (OSError, ValueError, KeyError):
+            self._drop(entry)
+            return False
+        _remove_quietly(output)
+        _link_or_copy(entry, output)
+        now = time.time()
+        os.utime(entry + ".json", (now, now))  # LRU clock lives on the sidecar
+        return True
+
+    def store(self, key: str, output: str):
+        if not os.path.isfile(output):
+            return
+        entry = self._entry(key, os.path.splitext(output)[1].lower())
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        _link_or_copy(output, tmp)
+        os.replace(tmp, entry)
+        size = os.path.getsize(entry)
+        with open(entry + ".json", "w", encoding="utf-8") as f:
+            json.dump({"size": size, "source": output, "created": time.time()}, f)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(s for _, s, _ in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(path, size, last used) for every entry."""
+        for meta in glob.glob(os.path.join(self.root, "*", "*.json")):
+            path = meta[:-5]
+            try:
+                yield path, os.path.getsize(path), os.path.getmtime(meta)
+            except OSError:
+                pass
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(s for _, s, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            self._drop(path)
+            total -= size
+        self._size = total
+
+    def _drop(self, entry: str):
+        _remove_quietly(entry)
+        _remove_quietly(entry + ".json")
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+_output_cache = None
+
+def output_cache(root: Optional[str] = None, max_bytes: Optional[int] = None) -> OutputCache:
+    """The process-wide output cache; pass root/max_bytes once to configure it."""
+    global _output_cache
+    if _output_cache is None or root or max_bytes:
+        _output_cache = OutputCache(root or app_data_dir("outputs"), max_bytes or OUTPUT_CACHE_MAX_BYTES)
+    return _output_cache
+
+def _cacheable(job: JobSpec) -> bool:
+    # Numbered image outputs, rendition ladders, .npy frames (+ sidecar) and all-stream subtitle
+    # extraction are many files; in-process subtitle conversion is cheaper than a cache lookup.
+    if not _flag(job.cache) or "%" in job.output or job.renditions.strip() or _wants_raw(job) or _wants_append(job) \
+            or job.audio_formats.strip():
+        return False
+    return job.mode != "Subtitles: Convert" and job.sub_stream_index.strip().lower() != "all"
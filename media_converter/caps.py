@@ -0,0 +1,159 @@
+"""What the installed ffmpeg build can do (encoders, muxers, filters), probed once and cached."""
+import os
+import re
+import json
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional
+
+from .common import AUDIO_CODECS, FFMPEG, FFPROBE, VIDEO_CODECS, app_data_dir
+
+if TYPE_CHECKING:  # annotations only; the engine builds on this module
+    from .engine import CommandPlan
+
+# Encoder each GUI codec choice maps to (see _video_codec_args / _audio_codec_args).
+VIDEO_CODEC_ENCODERS = {"h264": "libx264", "hevc (h265)": "libx265", "vp9": "libvpx-vp9", "av1": "libaom-av1"}
+AUDIO_CODEC_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus", "vorbis": "libvorbis",
+                        "flac": "flac", "pcm_s16le": "pcm_s16le"}
+
+@dataclass
+class FFmpegCapabilities:
+    """What the ffmpeg build next to us can actually do. ok=False means ffmpeg/ffprobe did not run."""
+    ok: bool = False
+    version: str = ""
+    encoders: List[str] = field(default_factory=list)
+    decoders: List[str] = field(default_factory=list)
+    muxers: List[str] = field(default_factory=list)
+    filters: List[str] = field(default_factory=list)
+
+    def has_encoder(self, name: str) -> bool:
+        # An empty list means the listing could not be parsed; don't second-guess ffmpeg then.
+        return not self.encoders or name in self.encoders
+
+    def has_muxer(self, name: str) -> bool:
+        return not self.muxers or name in self.muxers
+
+    def has_filter(self, name: str) -> bool:
+        return not self.filters or name in self.filters
+
+_caps = None
+_caps_lock = threading.Lock()
+
+def _binary_key(path: str) -> str:
+    real = shutil.which(path) or path
+    try:
+        st = os.stat(real)
+        return f"{os.path.abspath(real)}|{int(st.st_mtime)}|{st.st_size}"
+    except OSError:
+        return f"{real}|missing"
+
+def _caps_cache_path() -> str:
+    return os.path.join(app_data_dir("cache"), "ffmpeg_caps.json")
+
+def _ffmpeg_listing(flag: str) -> List[str]:
+    """Names from `ffmpeg -encoders/-decoders/-muxers/-filters` (the column after the flags)."""
+    out = subprocess.run([FFMPEG, "-hide_banner", flag], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         universal_newlines=True, timeout=30).stdout
+    names = []
+    started = flag == "-filters"  # filter listing has no separator line
+    for line in out.splitlines():
+        if not started:
+            started = line.strip().startswith("--")
+            continue
+        parts = line.split()
+        if flag == "-filters":
+            # " TSC scale             V->V       Scale the input video size..."
+            if len(parts) >= 3 and "->" in parts[2]:
+                names.append(parts[1])
+        elif len(parts) >= 2:
+            names.extend(parts[1].split(","))
+    return sorted(set(names))
+
+def probe_capabilities() -> FFmpegCapabilities:
+    try:
+        ver = subprocess.run([FFMPEG, "-version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             universal_newlines=True, timeout=30, check=True).stdout
+        subprocess.run([FFPROBE, "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=30, check=True)
+    except Exception:
+        return FFmpegCapabilities(ok=False)
+    m = re.search(r"ffmpeg version (\S+)", ver)
+    caps = FFmpegCapabilities(ok=True, version=m.group(1) if m else "")
+    for flag, attr in (("-encoders", "encoders"), ("-decoders", "decoders"),
+                       ("-muxers", "muxers"), ("-filters", "filters")):
+        try:
+            setattr(caps, attr, _ffmpeg_listing(flag))
+        except Exception:
+            pass
+    return caps
+
+def get_capabilities(refresh: bool = False) -> FFmpegCapabilities:
+    """
+    Capabilities of FFMPEG/FFPROBE, probed once per process and cached on disk keyed by
+    binary path + mtime + size, so a warm start costs two stat() calls.
+    """
+    global _caps
+    with _caps_lock:
+        if _caps is not None and not refresh:
+            return _caps
+        key = _binary_key(FFMPEG) + ";" + _binary_key(FFPROBE)
+        path = _caps_cache_path()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        entry = cache.get(key)
+        if entry and not refresh:
+            _caps = FFmpegCapabilities(**entry)
+            return _caps
+        _caps = probe_capabilities()
+        if _caps.ok:  # don't cache "missing" so installing ffmpeg is picked up next launch
+            cache = {key: vars(_caps)}
+            try:
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(cache, f)
+                os.replace(path + ".tmp", path)
+            except OSError:
+                pass
+        return _caps
+
+def ffmpeg_exists() -> bool:
+    return get_capabilities().ok
+
+def available_video_codecs(caps: FFmpegCapabilities) -> List[str]:
+    return [c for c in VIDEO_CODECS if c not in VIDEO_CODEC_ENCODERS or caps.has_encoder(VIDEO_CODEC_ENCODERS[c])]
+
+def available_audio_codecs(caps: FFmpegCapabilities) -> List[str]:
+    return [c for c in AUDIO_CODECS if c not in AUDIO_CODEC_ENCODERS or caps.has_encoder(AUDIO_CODEC_ENCODERS[c])]
+
+_FILTER_NAME = re.compile(r"(?:^|[,;\]])\s*(?:\[[^\]]*\]\s*)*([A-Za-z_][A-Za-z0-9_]*)")
+
+def check_command(cmd: List[str], caps: FFmpegCapabilities) -> List[str]:
+    """List the encoders/muxers/filters a command needs that this ffmpeg build lacks."""
+    missing = []
+    for opt, val in zip(cmd, cmd[1:]):
+        if (opt.startswith("-c:") or opt.startswith("-codec:") or opt in ("-c", "-vcodec", "-acodec")) \
+                and val != "copy" and not caps.has_encoder(val):
+            missing.append(f"encoder '{val}'")
+        elif opt == "-f" and val not in ("concat", "lavfi", "image2") and not caps.has_muxer(val):
+            missing.append(f"muxer '{val}'")
+        elif opt in ("-vf", "-af", "-lavfi", "-filter_complex", "-filter:v", "-filter:a"):
+            graph = re.sub(r"'[^']*'", "", val)  # drop quoted args (e.g. subtitle paths)
+            for name in _FILTER_NAME.findall(graph):
+                if not caps.has_filter(name):
+                    missing.append(f"filter '{name}'")
+    return missing
+
+def check_plan(plan: "CommandPlan", caps: Optional[FFmpegCapabilities] = None) -> List[str]:
+    caps = caps or get_capabilities()
+    if not caps.ok:
+        return []
+    missing = []
+    for cmd in plan.commands:
+        for m in check_command(cmd, caps):
+            if m not in missing:
+                missing.append(m)
+    return missing
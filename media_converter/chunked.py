@@ -0,0 +1,276 @@
+"""Chunked and resumable encodes: GOP-aligned segments encoded in parallel, then joined."""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields, replace
+from typing import Callable, List, Optional
+
+from .common import CONTAINER_MUXERS, FFMPEG, VIDEO_CONTAINERS
+from .caps import get_capabilities
+from .progress import Progress, format_seconds, parse_timestamp
+from .index import probe_keyframes, probe_media
+from .engine import (
+    JobSpec, _audio_codec_args, _common_inputs, _concat_entry, _flag, _inputs_fingerprint, _video_codec_args,
+    _video_filters, plan_job
+)
+from .governor import ProcessLimits, _whole_number
+from .runner import ChildUsage, _no_log, run_ffmpeg, run_plan
+
+CHUNK_SECONDS = 60  # default target segment length for chunked encodes
+
+def split_segments(keyframes: List[float], start: float, end: float, target: float):
+    """GOP-aligned (start, end) pairs of roughly `target` seconds covering [start, end]."""
+    bounds = [start]
+    for k in keyframes:
+        if k - bounds[-1] >= target and end - k >= target / 2:
+            bounds.append(k)
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+def _wants_segmented(job: JobSpec) -> bool:
+    if job.mode == "Subtitles: Burn into Video":
+        return _flag(job.resumable)
+    return job.mode == "Video → Video" and (_flag(job.chunked) or _flag(job.resumable)) \
+        and not job.video_codec.startswith("copy") and not job.renditions.strip() and not job.target_size.strip()
+
+def _concat_list(paths: List[str], list_path: str):
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in paths:
+            f.write(_concat_entry(p))
+
+def _fsync_file(path: str):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+class SegmentManifest:
+    """
+    Checkpoint of a resumable encode (manifest.json in its parts folder): the segment layout
+    and which parts are finished. A part is only marked once its file is flushed to disk, and
+    the manifest is replaced atomically, so after a crash it never claims an incomplete part.
+    The signature ties it to the input and settings; a different job starts over.
+    """
+
+    def __init__(self, work_dir: str, signature: str):
+        self.path = os.path.join(work_dir, "manifest.json")
+        self.signature = signature
+        self.segments = []
+        self.done = set()  # "v<index>" and "audio"
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("signature") != self.signature:
+            return False
+        self.segments = [tuple(s) for s in data["segments"]]
+        self.done = set(data.get("done", []))
+        return True
+
+    def mark(self, part: str):
+        with self._lock:
+            self.done.add(part)
+            self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature, "segments": self.segments, "done": sorted(self.done)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+def _segment_signature(job: JobSpec) -> str:
+    """Input fingerprint + every setting that changes the encoded parts (not paths, priorities or parallelism)."""
+    ignored = ("output", "chunked", "chunk_workers", "resumable", "cache", "threads", "nice", "cpus")
+    settings = {f.name: getattr(job, f.name) for f in fields(job) if f.name not in ignored}
+    payload = json.dumps([_inputs_fingerprint(job), settings, get_capabilities().version], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def resume_dir(job: JobSpec) -> str:
+    """Where a resumable job keeps its finished segments between runs."""
+    return job.output.strip() + ".parts"
+
+def _segment_video_args(job: JobSpec, seek: float) -> List[str]:
+    """Video encode arguments for one segment starting `seek` seconds into the input."""
+    vf = _video_filters(job)
+    if job.mode == "Subtitles: Burn into Video":
+        # Input seeking restarts timestamps at 0; shift them to source time so cues line up, then
+        # undo exactly that shift so the segment keeps the same timestamps as an unfiltered one.
+        subfile = job.image_pattern.strip().replace("\\", "/")
+        burn = f"setpts=PTS+{seek:.6f}/TB,subtitles='{subfile}',setpts=PTS-{seek:.6f}/TB"
+        return ["-vf", (vf + "," + burn) if vf else burn,
+                "-c:v", "libx264", "-preset", "medium", "-crf", job.crf.strip() or "20"]
+    return _video_codec_args(job) + (["-vf", vf] if vf else [])
+
+def segment_layout(job: JobSpec, info: dict):
+    """(start, end, segments) of a segmented encode: GOP-aligned (start, end) pairs over the trimmed input."""
+    target = parse_timestamp(job.chunk_seconds) or CHUNK_SECONDS
+    fmt_info = info.get("format", {})
+    offset = float(fmt_info.get("start_time") or 0.0)  # -ss is relative to the file start
+    length = float(fmt_info.get("duration") or 0.0)
+    start = parse_timestamp(job.start_time) or 0.0
+    limit = parse_timestamp(job.duration)
+    end = min(length, start + limit) if limit else length
+    keyframes = [k - offset for k in probe_keyframes(job.input.strip())] if end - start >= 2 * target else []
+    return start, end, split_segments([k for k in keyframes if start < k < end], start, end, target)
+
+def segment_command(job: JobSpec, segments, i: int, seg: str) -> List[str]:
+    """ffmpeg command encoding the video of segment i into seg."""
+    s, e = segments[i]
+    # Inner boundaries sit half a millisecond before the keyframe so it lands in the next segment.
+    ss = s - 0.0005 if i else s
+    cmd = [FFMPEG, "-y", "-ss", f"{ss:.6f}"]
+    if i < len(segments) - 1:
+        cmd += ["-t", f"{(e - 0.0005) - ss:.6f}"]
+    elif parse_timestamp(job.duration):
+        cmd += ["-t", f"{e - s:.6f}"]  # not e - ss: the nudge would let one extra frame in at the end
+    return cmd + ["-i", job.input.strip(), "-map", "0:v:0", "-an", "-sn", "-dn"] + _segment_video_args(job, ss) + [seg]
+
+def segment_audio_command(job: JobSpec, audio: str) -> List[str]:
+    """ffmpeg command encoding all audio of the (trimmed) input once, for joining with the segments."""
+    if job.mode == "Subtitles: Burn into Video":
+        audio_args = ["-c:a", "copy"]
+    else:
+        audio_args = _audio_codec_args(job, ["-c:a", "aac", "-b:a", "192k"])
+    return [FFMPEG, "-y"] + _common_inputs(job) + ["-i", job.input.strip(), "-map", "0:a", "-vn", "-sn", "-dn"] \
+        + audio_args + [audio]
+
+def segment_concat_command(job: JobSpec, seg_files: List[str], audio: Optional[str], list_path: str) -> List[str]:
+    """Writes the concat list and returns the stream-copy command joining segments (+ audio) into job.output."""
+    _concat_list(seg_files, list_path)
+    cmd = [FFMPEG, "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio:
+        cmd += ["-i", audio, "-map", "0:v", "-map", "1:a"]
+    cmd += ["-c", "copy"]
+    fmt = job.out_format.lower()
+    if fmt in VIDEO_CONTAINERS:
+        cmd += ["-f", CONTAINER_MUXERS.get(fmt, fmt)]
+    return cmd + [job.output.strip()]
+
+def run_segmented_video(job: JobSpec, log: Callable[[str], None] = _no_log,
+                        on_progress: Optional[Callable[[Progress], None]] = None, usage: Optional[ChildUsage] = None):
+    """
+    Video → Video (or subtitle burn-in) split at keyframes: each segment is encoded by its own
+    ffmpeg (concurrently when chunked), audio is encoded once on its own, then everything is
+    joined with the concat demuxer using stream copy. Resumable jobs keep the parts next to the
+    output with a SegmentManifest, so a rerun after a crash starts at the first unfinished
+    segment. Falls back to the normal single-process encode for short inputs.
+    """
+    out = job.output.strip()
+    resumable = _flag(job.resumable)
+    target = parse_timestamp(job.chunk_seconds) or CHUNK_SECONDS
+    if _flag(job.chunked):
+        workers = max(1, _whole_number(job.chunk_workers, "Chunk workers") or (os.cpu_count() or 1) // 4)
+    else:
+        workers = 1
+    if job.mode == "Subtitles: Burn into Video" and not os.path.exists(job.image_pattern.strip()):
+        raise RuntimeError("Pick a subtitle file to burn (use the Images section's 'Browse…' to select .srt/.ass).")
+
+    info = probe_media(job.input.strip())
+    manifest = None
+    if resumable:
+        work_dir = resume_dir(job)
+        os.makedirs(work_dir, exist_ok=True)
+        manifest = SegmentManifest(work_dir, _segment_signature(job))
+        if manifest.load():
+            log(f"Resuming from {work_dir}: {len(manifest.done)} part(s) already done\n")
+        else:
+            for name in os.listdir(work_dir):
+                os.remove(os.path.join(work_dir, name))  # parts of a different job or settings
+    if manifest and manifest.segments:
+        segments = manifest.segments
+        start, end = segments[0][0], segments[-1][1]
+    else:
+        start, end, segments = segment_layout(job, info)
+    if len(segments) < 2:
+        log("Input too short (or no keyframes found) for a segmented encode; encoding in one pass.\n")
+        if resumable:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        plan = plan_job(job)
+        plan.usage = usage
+        run_plan(plan, log, on_progress, end - start if end > start else None)
+        return
+    if manifest and not manifest.segments:
+        manifest.segments = segments
+        manifest.save()
+
+    has_audio = any(s.get("codec_type") == "audio" for s in info.get("streams", []))
+    if not resumable:
+        work_dir = tempfile.mkdtemp(prefix="umc_chunks_", dir=os.path.dirname(os.path.abspath(out)))
+    log(f"Segmented encode: {len(segments)} segments of ~{target:g}s, {workers} at a time\n")
+    limits = ProcessLimits.from_job(job)
+    seg_limits = replace(limits, threads=max(1, limits.threads // workers)) if limits and limits.threads else limits
+    lock = threading.Lock()
+    seg_time = {}
+    t0 = time.monotonic()
+
+    def finished(part: str, path: str) -> bool:
+        return manifest is not None and part in manifest.done and os.path.isfile(path)
+
+    def report(i: int, p: Progress):
+        if not on_progress:
+            return
+        with lock:
+            seg_len = segments[i][1] - segments[i][0]
+            seg_time[i] = (seg_len, 0.0) if p.done else (min(p.out_time, seg_len), p.fps)
+            done = sum(t for t, _ in seg_time.values())
+            fps = sum(f for _, f in seg_time.values())
+        elapsed = time.monotonic() - t0
+        on_progress(Progress(out_time=done, total=end - start, fps=fps, elapsed=elapsed,
+                             speed=done / elapsed if elapsed else 0.0))
+
+    def encode(i: int) -> str:
+        seg = os.path.join(work_dir, f"seg_{i:05d}.mkv")
+        if finished(f"v{i}", seg):
+            report(i, Progress(done=True))
+            return seg
+        cmd = segment_command(job, segments, i, seg)
+        if seg_limits:
+            cmd = seg_limits.command(cmd)
+        run_ffmpeg(cmd, lambda text: log(f"[seg {i}] {text}"), on_progress=lambda p: report(i, p), limits=seg_limits,
+                   usage=usage)
+        if manifest:
+            _fsync_file(seg)
+            manifest.mark(f"v{i}")
+        return seg
+
+    ok = False
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(encode, i) for i in range(len(segments))]
+            audio = os.path.join(work_dir, "audio.mka")
+            try:
+                if has_audio and not finished("audio", audio):
+                    run_ffmpeg(segment_audio_command(job, audio), log, limits=limits, usage=usage)
+                    if manifest:
+                        _fsync_file(audio)
+                        manifest.mark("audio")
+                seg_files = [f.result() for f in futures]
+            except BaseException:
+                # Don't let the pool's shutdown wait for segments that haven't started.
+                for f in futures:
+                    f.cancel()
+                raise
+
+        cmd = segment_concat_command(job, seg_files, audio if has_audio else None,
+                                     os.path.join(work_dir, "segments.txt"))
+        run_ffmpeg(cmd, log, limits=limits, usage=usage)
+        ok = True
+        elapsed = time.monotonic() - t0
+        if on_progress:
+            on_progress(Progress(out_time=end - start, total=end - start, elapsed=elapsed,
+                                 speed=(end - start) / elapsed if elapsed else 0.0, done=True))
+        log(f"Segmented encode finished in {format_seconds(elapsed)}\n")
+    finally:
+        if ok or not resumable:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            log(f"Finished parts are kept in {work_dir}; run the same job again to resume.\n")
@@ -0,0 +1,417 @@
+"""Command-line interface."""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import Optional
+
+from .common import APP_NAME, AUDIO_CODECS, FFMPEG, VIDEO_CODECS, app_data_dir, default_workers
+from .caps import AUDIO_CODEC_ENCODERS, VIDEO_CODEC_ENCODERS, ffmpeg_exists, get_capabilities
+from .progress import Progress, format_seconds, parse_timestamp
+from .index import use_media_index
+from .engine import JobResult, JobSpec, check_job, plan_job, resolve_mode
+from .governor import ResourceGovernor
+from .runner import ChildUsage, prepare_job
+from .estimate import ESTIMATE_SAMPLE_SECONDS, ESTIMATE_SAMPLES, estimate_job
+from .cache import output_cache
+from .metrics import MetricsSink, job_metrics
+from .batch import load_manifest, run_batch
+from .watch import WATCH_SETTLE_SECONDS, WatchQueue, load_watch_config, run_watch
+from .cluster import CLUSTER_MAX_ATTEMPTS, CLUSTER_PORT, Coordinator, _is_loopback, run_worker
+from .bench import BENCH_DURATIONS, BENCH_REGRESSION, BENCH_RESOLUTIONS, compare_benchmarks, run_benchmarks
+
+def _add_governor_args(p):
+    p.add_argument("--threads-total", type=int, default=0, help="Cores shared by all running jobs (default: all)")
+    p.add_argument("--nice", type=int, default=0, help="Run ffmpeg at this niceness 0-19 (also lowers I/O priority)")
+    p.add_argument("--pin", action="store_true", help="Pin each running job to its own set of CPUs (Linux)")
+    p.add_argument("--max-load", type=float, default=0, help="Start no new job while the 1-minute load average is above this")
+    p.add_argument("--min-free-mb", type=float, default=0, help="Start no new job while less memory than this is available")
+
+def _add_metrics_args(p):
+    p.add_argument("--metrics", metavar="FILE", help="Append one JSON line of metrics per finished job to FILE")
+    p.add_argument("--prom", metavar="FILE", help="Keep per-mode totals in FILE (Prometheus textfile format)")
+
+def _metrics_from_args(args) -> Optional[MetricsSink]:
+    return MetricsSink(args.metrics, args.prom) if args.metrics or args.prom else None
+
+def _governor_from_args(args, slots: int) -> ResourceGovernor:
+    return ResourceGovernor(slots, cores=args.threads_total or None, nice=args.nice, pin=args.pin,
+                            max_load=args.max_load, min_free_mb=args.min_free_mb)
+
+def _cli_batch(args) -> int:
+    jobs = load_manifest(args.manifest)
+    if args.cache:
+        for job in jobs:
+            job.cache = "1"
+    if args.cache_dir or args.cache_max_gb:
+        output_cache(args.cache_dir, int(args.cache_max_gb * 1024 ** 3) or None)
+    if args.index is not None:
+        use_media_index(args.index or None)
+    if args.dry_run:
+        for job in jobs:
+            plan = plan_job(prepare_job(job, lambda text: print("# " + text, end="")))
+            if not plan.commands:
+                print(f"# {job.input} -> {job.output} (in-process, no ffmpeg)")
+            for cmd in plan.commands:
+                print(" ".join(cmd))
+            plan.cleanup()
+        return 0
+    if not ffmpeg_exists():
+        print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+        return 2
+    # Static per-job check: jobs this ffmpeg build can't run are reported as failed, the rest still run.
+    rejected = []
+    for job in jobs:
+        try:
+            missing = check_job(job)
+        except RuntimeError as e:
+            missing = [str(e)]
+        if missing:
+            rejected.append(JobResult(job, False, 0.0, "This ffmpeg build is missing " + ", ".join(missing)))
+    total = len(jobs)
+    if rejected:
+        skip = {id(r.job) for r in rejected}
+        jobs = [job for job in jobs if id(job) not in skip]
+
+    workers = args.jobs or default_workers()
+    governor = _governor_from_args(args, max(1, min(workers, len(jobs))))
+    print(f"{total} job(s), {workers} worker(s), {governor.per_job} thread(s) per job")
+    counter = {"done": 0, "failed": 0}
+    active = {}  # id(job) -> (job, last progress, when out_time last advanced)
+    lock = threading.Lock()
+
+    def progress(job: JobSpec, p: Progress):
+        now = time.monotonic()
+        with lock:
+            prev = active.get(id(job))
+            advanced = prev[2] if prev and p.out_time <= prev[1].out_time and p.step == prev[1].step else now
+            active[id(job)] = (job, p, advanced)
+
+    def status():
+        while not stop.wait(args.status_interval):
+            now = time.monotonic()
+            with lock:
+                running = list(active.values())
+            if not running:
+                continue
+            print(f"-- {len(running)} running, {counter['done']}/{total} done")
+            for job, p, advanced in running:
+                stalled = f"  STALLED {format_seconds(now - advanced)}" if now - advanced > args.stall_after else ""
+                print(f"   {job.input or job.image_pattern}: {p.summary()}{stalled}")
+            sys.stdout.flush()
+
+    def report(res: JobResult):
+        with lock:
+            active.pop(id(res.job), None)
+        counter["done"] += 1
+        src = res.job.input or res.job.image_pattern
+        if res.ok:
+            print(f"[{counter['done']}/{total}] ok     {src} -> {res.job.output} ({res.elapsed:.1f}s)")
+        else:
+            counter["failed"] += 1
+            print(f"[{counter['done']}/{total}] FAILED {src}: {res.error}")
+            for line in res.log_tail:
+                print("    " + line.rstrip())
+        sys.stdout.flush()
+
+    metrics = _metrics_from_args(args)
+    for res in rejected:
+        report(res)
+        if metrics:
+            metrics.record(job_metrics(res, ChildUsage()))
+    stop = threading.Event()
+    if args.status_interval > 0:
+        threading.Thread(target=status, daemon=True).start()
+    t0 = time.monotonic()
+    try:
+        run_batch(jobs, workers=workers, on_result=report, on_progress=progress, log_dir=args.log_dir,
+                  governor=governor, metrics=metrics)
+    finally:
+        stop.set()
+    print(f"Finished {total} job(s) in {time.monotonic() - t0:.1f}s, {counter['failed']} failed")
+    return 1 if counter["failed"] else 0
+
+def _cli_index(args) -> int:
+    index = use_media_index(args.db)
+    if args.action == "scan":
+        if not ffmpeg_exists():
+            print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+            return 2
+        counter = {"n": 0}
+
+        def progress(path, ok):
+            counter["n"] += 1
+            if not ok:
+                print(f"  could not probe {path}")
+            elif counter["n"] % 500 == 0:
+                print(f"  {counter['n']} probed…")
+                sys.stdout.flush()
+
+        t0 = time.monotonic()
+        for root in args.paths:
+            probed, unchanged = index.scan(root, workers=args.jobs or None, keyframes=args.keyframes, on_file=progress)
+            print(f"{root}: {probed} probed, {unchanged} unchanged ({time.monotonic() - t0:.1f}s)")
+        return 0
+    for path in index.find(codec=args.codec, stream_type=args.stream_type, min_duration=args.min_duration,
+                           max_duration=args.max_duration, under=args.under):
+        print(path)
+    return 0
+
+def _cli_watch(args) -> int:
+    folders, options = load_watch_config(args.config)
+    if not ffmpeg_exists():
+        print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+        return 2
+    if args.index is not None:
+        use_media_index(args.index or None)
+    queue = WatchQueue(args.db or os.path.join(app_data_dir("watch"), "queue.sqlite"))
+    if args.retry_failed:
+        queue.recover(retry_failed=True)
+    max_gb = args.max_queued_gb if args.max_queued_gb is not None else options.get("max_queued_gb", 0)
+
+    def event(text: str):
+        print(time.strftime("%H:%M:%S ") + text, end="")
+        sys.stdout.flush()
+
+    max_in_flight = args.jobs or options.get("max_in_flight") or default_workers()
+    try:
+        run_watch(folders, queue, max_in_flight=max_in_flight,
+                  max_queued_bytes=int(float(max_gb) * 1024 ** 3),
+                  settle=args.settle if args.settle is not None else float(options.get("settle_seconds", WATCH_SETTLE_SECONDS)),
+                  poll=args.poll, once=args.once, on_event=event, log_dir=args.log_dir,
+                  governor=_governor_from_args(args, int(max_in_flight)), metrics=_metrics_from_args(args))
+    except KeyboardInterrupt:
+        print("Stopped; unfinished jobs stay queued for the next run.")
+    finally:
+        counts = queue.counts()
+        queue.close()
+    print(", ".join(f"{n} {state}" for state, n in sorted(counts.items())) or "queue empty")
+    return 1 if args.once and counts.get("failed") else 0
+
+def _cli_serve(args) -> int:
+    jobs = load_manifest(args.manifest)
+    if not ffmpeg_exists():
+        print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+        return 2
+    counter = {"done": 0, "failed": 0}
+
+    def event(text: str):
+        print(time.strftime("%H:%M:%S ") + text, end="")
+        sys.stdout.flush()
+
+    def report(res: JobResult):
+        counter["done"] += 1
+        src = res.job.input or res.job.image_pattern
+        if res.ok:
+            event(f"[{counter['done']}/{len(jobs)}] ok     {src} -> {res.job.output} ({res.elapsed:.1f}s)\n")
+        else:
+            counter["failed"] += 1
+            event(f"[{counter['done']}/{len(jobs)}] FAILED {src}: {res.error}\n")
+
+    if not args.token and not _is_loopback(args.host):
+        print(f"Refusing to listen on {args.host} without --token (anyone who can reach the port could "
+              f"submit work).", file=sys.stderr)
+        return 2
+    coord = Coordinator(jobs, max_attempts=args.max_attempts, on_result=report, on_event=event)
+    t0 = time.monotonic()
+    try:
+        coord.serve(args.host, args.port, args.token, args.status_interval)
+    except KeyboardInterrupt:
+        print("Stopped.")
+    print(f"Finished {counter['done']} of {len(jobs)} job(s) in {time.monotonic() - t0:.1f}s, {counter['failed']} failed")
+    return 1 if counter["failed"] or counter["done"] < len(jobs) else 0
+
+def _cli_worker(args) -> int:
+    slots = args.jobs or max(1, default_workers() // 4)
+
+    def event(text: str):
+        print(time.strftime("%H:%M:%S ") + text, end="")
+        sys.stdout.flush()
+
+    stop = threading.Event()
+    try:
+        run_worker(args.url, slots, args.name or "", args.stream, _governor_from_args(args, slots), args.token,
+                   on_event=event, stop=stop)
+    except KeyboardInterrupt:
+        stop.set()
+        print("Stopped; the coordinator will hand unfinished tasks to other workers.")
+    except OSError as e:
+        print(f"Cannot reach the coordinator at {args.url}: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+def _cli_bench(args) -> int:
+    if not ffmpeg_exists():
+        print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+        return 2
+    work = args.work_dir or app_data_dir("bench")
+    modes = [resolve_mode(m) for m in args.mode] if args.mode else None
+    resolutions = args.resolutions.split(",") if args.resolutions else BENCH_RESOLUTIONS
+    durations = [float(d) for d in args.durations.split(",")] if args.durations else BENCH_DURATIONS
+    report = run_benchmarks(work, resolutions, durations, args.repeat, modes,
+                            log=lambda text: (print(text, end=""), sys.stdout.flush()))
+    out = args.output or os.path.join(work, f"bench_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {out}")
+    failed = [r["case"] for r in report["results"] if not r["ok"]]
+    if failed:
+        print(f"{len(failed)} case(s) failed (see run.log under {os.path.join(work, 'out')})")
+    if not args.baseline:
+        return 1 if failed else 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    lines = compare_benchmarks(report, baseline, args.threshold / 100)
+    print(f"Compared with {args.baseline} (ffmpeg {baseline.get('ffmpeg', '?')}):")
+    for line in lines:
+        print("  " + line)
+    return 1 if failed or any(line.startswith("REGRESSION") for line in lines) else 0
+
+def _cli_estimate(args) -> int:
+    jobs = load_manifest(args.manifest)
+    if not ffmpeg_exists():
+        print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+        return 2
+    failed = 0
+    for job in jobs:
+        src = job.input or job.image_pattern
+        try:
+            est = estimate_job(job, args.samples, args.sample_seconds, args.jobs or None)
+        except RuntimeError as e:
+            failed += 1
+            print(f"{src}: cannot estimate: {e}")
+            continue
+        if args.json:
+            print(json.dumps({"input": src, "output": job.output, "size": est.size,
+                              "encode_seconds": round(est.encode_seconds, 1), "duration": est.duration}))
+        else:
+            print(f"{src} -> {job.output}: {est.summary()}")
+        sys.stdout.flush()
+    return 1 if failed else 0
+
+def _cli_caps(args) -> int:
+    caps = get_capabilities(refresh=args.refresh)
+    if not caps.ok:
+        print("ffmpeg/ffprobe are not installed or not found.", file=sys.stderr)
+        return 2
+    print(f"ffmpeg {caps.version} ({FFMPEG})")
+    print(f"{len(caps.encoders)} encoders, {len(caps.decoders)} decoders, "
+          f"{len(caps.muxers)} muxers, {len(caps.filters)} filters")
+    for label, choices, encoders in (("Video codecs", VIDEO_CODECS, VIDEO_CODEC_ENCODERS),
+                                     ("Audio codecs", AUDIO_CODECS, AUDIO_CODEC_ENCODERS)):
+        print(label + ":")
+        for c in choices:
+            if c in encoders:
+                print(f"  {'ok     ' if caps.has_encoder(encoders[c]) else 'MISSING'} {c} ({encoders[c]})")
+    return 0
+
+def _cli_gui(args) -> int:
+    from .gui import UniversalConverter  # Tkinter is only needed for the desktop app
+    app = UniversalConverter()
+    app.mainloop()
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="universal_media_converter", description=APP_NAME)
+    parser.set_defaults(func=_cli_gui)
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("gui", help="Open the desktop app (default)").set_defaults(func=_cli_gui)
+
+    p = sub.add_parser("batch", help="Run a manifest of jobs through a parallel worker pool")
+    p.add_argument("manifest", help="JSON / JSON Lines file of jobs (fields match the GUI form)")
+    p.add_argument("-j", "--jobs", type=int, default=0, help="Concurrent jobs (default: number of CPU cores)")
+    p.add_argument("--dry-run", action="store_true", help="Print the ffmpeg commands instead of running them")
+    p.add_argument("--status-interval", type=float, default=15, help="Seconds between progress reports (0 = off)")
+    p.add_argument("--log-dir", help="Write each job's full ffmpeg log to a file in this folder")
+    p.add_argument("--cache", action="store_true", help="Reuse results of identical earlier conversions (output cache)")
+    p.add_argument("--cache-dir", help="Output cache folder (default: app data folder)")
+    p.add_argument("--cache-max-gb", type=float, default=0, help="Output cache size bound in GB (default 20)")
+    p.add_argument("--index", nargs="?", const="", default=None, metavar="DB",
+                   help="Read/write ffprobe results through the media index (optional database path)")
+    p.add_argument("--stall-after", type=float, default=120, help="Flag a job as stalled after this many seconds without progress")
+    _add_governor_args(p)
+    _add_metrics_args(p)
+    p.set_defaults(func=_cli_batch)
+
+    p = sub.add_parser("index", help="Probe media folders into a local index, or query it")
+    p.add_argument("action", choices=["scan", "find"])
+    p.add_argument("paths", nargs="*", help="scan: folders to scan")
+    p.add_argument("--db", help="Index database (default: app data folder)")
+    p.add_argument("-j", "--jobs", type=int, default=0, help="Concurrent ffprobe processes (default: CPU cores)")
+    p.add_argument("--keyframes", action="store_true", help="Also index keyframe times (slower; used by chunked encodes)")
+    p.add_argument("--codec", help="find: files with a stream in this codec (e.g. hevc)")
+    p.add_argument("--stream-type", choices=["video", "audio", "subtitle", "data", "attachment"],
+                   help="find: files with a stream of this type")
+    p.add_argument("--min-duration", type=parse_timestamp, help="find: at least this long (seconds or HH:MM:SS)")
+    p.add_argument("--max-duration", type=parse_timestamp, help="find: at most this long")
+    p.add_argument("--under", help="find: only files inside this folder")
+    p.set_defaults(func=_cli_index)
+
+    p = sub.add_parser("watch", help="Convert files dropped into hot folders (runs until stopped)")
+    p.add_argument("config", help="JSON file listing watched folders and their presets")
+    p.add_argument("--db", help="Durable queue database (default: app data folder)")
+    p.add_argument("-j", "--jobs", type=int, default=0, help="Max concurrent jobs (default: config or CPU cores)")
+    p.add_argument("--max-queued-gb", type=float, help="Stop queuing new files above this many GB of queued input")
+    p.add_argument("--settle", type=float, help=f"Seconds a file must stay unchanged before it is queued (default {WATCH_SETTLE_SECONDS})")
+    p.add_argument("--poll", action="store_true", help="Rescan folders periodically instead of using inotify")
+    p.add_argument("--once", action="store_true", help="Process what is there now, then exit")
+    p.add_argument("--retry-failed", action="store_true", help="Requeue jobs that failed in earlier runs")
+    p.add_argument("--log-dir", help="Write each job's full ffmpeg log to a file in this folder")
+    p.add_argument("--index", nargs="?", const="", default=None, metavar="DB",
+                   help="Read/write ffprobe results through the media index (optional database path)")
+    _add_governor_args(p)
+    _add_metrics_args(p)
+    p.set_defaults(func=_cli_watch)
+
+    p = sub.add_parser("serve", help="Coordinate a manifest of jobs across worker machines (see 'worker')")
+    p.add_argument("manifest", help="JSON / JSON Lines file of jobs (same format as batch)")
+    p.add_argument("--host", default="127.0.0.1", help="Address to listen on (0.0.0.0 for other machines; needs --token)")
+    p.add_argument("--port", type=int, default=CLUSTER_PORT, help=f"Port (default {CLUSTER_PORT})")
+    p.add_argument("--token", default="", help="Shared secret workers must present (required off loopback)")
+    p.add_argument("--max-attempts", type=int, default=CLUSTER_MAX_ATTEMPTS, help="Tries per task before it fails")
+    p.add_argument("--status-interval", type=float, default=15, help="Seconds between progress reports (0 = off)")
+    p.set_defaults(func=_cli_serve)
+
+    p = sub.add_parser("worker", help="Run tasks for a coordinator started with 'serve'")
+    p.add_argument("url", help="Coordinator address, e.g. http://192.168.1.10:%d" % CLUSTER_PORT)
+    p.add_argument("-j", "--jobs", type=int, default=0, help="Tasks run at once (default: CPU cores / 4)")
+    p.add_argument("--name", help="Worker name shown by the coordinator (default: host name)")
+    p.add_argument("--stream", action="store_true",
+                   help="No shared storage: read inputs over HTTP and upload outputs (single-file modes only)")
+    p.add_argument("--token", default="", help="Shared secret given to 'serve'")
+    _add_governor_args(p)
+    p.set_defaults(func=_cli_worker)
+
+    p = sub.add_parser("bench", help="Time every conversion mode on synthetic inputs")
+    p.add_argument("--resolutions", help="Comma-separated WxH list (default: " + ",".join(BENCH_RESOLUTIONS) + ")")
+    p.add_argument("--durations", help="Comma-separated input lengths in seconds (default: 5)")
+    p.add_argument("--mode", action="append", help="Only this mode (label or slug); repeatable")
+    p.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported")
+    p.add_argument("--work-dir", help="Where inputs and outputs go (default: app data folder)")
+    p.add_argument("-o", "--output", help="Results JSON path")
+    p.add_argument("--baseline", help="Earlier results JSON to compare against")
+    p.add_argument("--threshold", type=float, default=BENCH_REGRESSION * 100,
+                   help="Percent slower/larger that counts as a regression (default 10)")
+    p.set_defaults(func=_cli_bench)
+
+    p = sub.add_parser("estimate", help="Predict output size and encode time from short sample encodes")
+    p.add_argument("manifest", help="JSON / JSON Lines file of jobs (same format as batch)")
+    p.add_argument("--samples", type=int, default=ESTIMATE_SAMPLES, help="Excerpts encoded per job")
+    p.add_argument("--sample-seconds", type=float, default=ESTIMATE_SAMPLE_SECONDS, help="Length of each excerpt")
+    p.add_argument("-j", "--jobs", type=int, default=0, help="Concurrent sample encodes, sharing the CPU cores (default: samples, up to CPU cores)")
+    p.add_argument("--json", action="store_true", help="One JSON object per job (for schedulers)")
+    p.set_defaults(func=_cli_estimate)
+
+    p = sub.add_parser("caps", help="Show which codecs this ffmpeg build supports")
+    p.add_argument("--refresh", action="store_true", help="Ignore the cached probe and re-run ffmpeg")
+    p.set_defaults(func=_cli_caps)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,605 @@
+"""Spreading jobs over several machines: an HTTP coordinator and the workers that poll it."""
+import os
+import re
+import json
+import time
+import shutil
+import socket
+import threading
+import tempfile
+import urllib.parse
+from collections import deque
+from dataclasses import dataclass, field, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+from .common import FFMPEG, default_workers
+from .caps import FFmpegCapabilities, check_command, get_capabilities
+from .progress import Progress, format_seconds
+from .index import probe_media
+from .engine import JobResult, JobSpec, _flag, job_duration, plan_job
+from .governor import ProcessLimits, ResourceGovernor
+from .runner import _no_log, run_ffmpeg
+from .chunked import (
+    SegmentManifest, _fsync_file, _segment_signature, _wants_segmented, resume_dir, segment_audio_command,
+    segment_command, segment_concat_command, segment_layout
+)
+from .batch import _run_batch_job
+
+CLUSTER_PORT = 8765
+CLUSTER_LEASE_SECONDS = 30     # a running task goes back to the queue when its worker is silent this long
+CLUSTER_HEARTBEAT_SECONDS = 2  # worker progress reports / idle polling
+CLUSTER_MAX_ATTEMPTS = 3
+# Modes whose only input is job.input and whose output is one file: these can run on a worker
+# without the shared paths (ffmpeg reads the input over HTTP, the output is uploaded).
+_STREAMABLE_MODES = ("Video → Video", "Video → Audio", "Audio → Audio", "Video → GIF")
+
+@dataclass
+class ClusterTask:
+    """One unit of work for a worker: a whole job, or one ffmpeg command (segment / audio) of a split job."""
+    id: int
+    job: JobSpec
+    label: str
+    output: str
+    cmd: List[str] = field(default_factory=list)    # empty: run the whole job
+    checks: List[List[str]] = field(default_factory=list)  # commands whose encoders/filters the worker must have
+    duration: float = 0.0
+    group: Optional["_TaskGroup"] = None
+    state: str = "queued"  # queued, running, done, failed
+    worker: str = ""
+    lease: str = ""
+    deadline: float = 0.0
+    attempts: int = 0
+    failed_on: set = field(default_factory=set)
+    error: str = ""
+    started: Optional[float] = None
+    out_time: float = 0.0
+    speed: float = 0.0
+    upload: str = ""
+    part: str = ""  # SegmentManifest part name ("v<i>" / "audio") of a segment task
+
+    @property
+    def streamable(self) -> bool:
+        if self.cmd:
+            return self.job.mode != "Subtitles: Burn into Video"  # the subtitle file is a second input
+        # A streamed task uploads exactly one output file.
+        return (self.job.mode in _STREAMABLE_MODES and "%" not in self.output and not self.job.renditions.strip()
+                and not self.job.audio_formats.strip())
+
+    def payload(self) -> dict:
+        return {"id": self.id, "lease": self.lease, "label": self.label, "cmd": self.cmd[1:],
+                "job": {f.name: getattr(self.job, f.name) for f in fields(self.job)},
+                "input": self.job.input.strip(), "output": self.output, "duration": self.duration}
+
+@dataclass
+class _TaskGroup:
+    """The parts of one split job; joined by the coordinator once all are done."""
+    job: JobSpec
+    work_dir: str
+    parts: List[ClusterTask]
+    seg_files: List[str]
+    audio: Optional[str]
+    manifest: Optional[SegmentManifest] = None  # resumable jobs: finished parts survive a coordinator restart
+
+class Coordinator:
+    """
+    Hands a list of jobs to remote workers (run_worker) over HTTP and tracks them. Segmented jobs
+    (chunked/resumable Video → Video, subtitle burn-in) are split into keyframe-aligned segment
+    tasks plus one audio task so several workers share one long encode; the coordinator joins the
+    parts with a stream-copy concat. Workers only get tasks their ffmpeg build can run. A task
+    whose worker fails or goes silent is retried on another worker, up to max_attempts times.
+    """
+
+    def __init__(self, jobs: List[JobSpec], max_attempts: int = CLUSTER_MAX_ATTEMPTS,
+                 lease_seconds: float = CLUSTER_LEASE_SECONDS,
+                 on_result: Optional[Callable[[JobResult], None]] = None, on_event: Callable[[str], None] = _no_log):
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.on_result = on_result
+        self.on_event = on_event
+        self.tasks = []
+        self.workers = {}  # id -> {"name", "cores", "slots", "stream", "caps", "seen"}
+        self.results = []
+        self.total = len(jobs)
+        self._lock = threading.RLock()
+        self._finished = threading.Event()
+        for job in jobs:
+            try:
+                self._add_job(job)
+            except Exception as e:
+                self._job_done(JobResult(job, False, 0.0, str(e)))
+
+    def _add_job(self, job: JobSpec):
+        if _wants_segmented(job):
+            info = probe_media(job.input.strip())
+            work_dir = resume_dir(job)
+            name = os.path.basename(job.input.strip())
+            manifest = SegmentManifest(work_dir, _segment_signature(job)) if _flag(job.resumable) else None
+            if manifest and manifest.load() and manifest.segments:
+                segments = manifest.segments
+                start, end = segments[0][0], segments[-1][1]
+                self.on_event(f"resuming {name}: {len(manifest.done)} part(s) already done\n")
+            else:
+                start, end, segments = segment_layout(job, info)
+            if len(segments) >= 2:
+                os.makedirs(work_dir, exist_ok=True)
+                if manifest and not manifest.segments:
+                    for entry in os.listdir(work_dir):
+                        os.remove(os.path.join(work_dir, entry))  # parts of a different job or settings
+                    manifest.segments = segments
+                    manifest.save()
+                has_audio = any(s.get("codec_type") == "audio" for s in info.get("streams", []))
+                group = _TaskGroup(job, work_dir, [], [], os.path.join(work_dir, "audio.mka") if has_audio else None,
+                                   manifest)
+                for i, (s, e) in enumerate(segments):
+                    seg = os.path.join(work_dir, f"seg_{i:05d}.mkv")
+                    cmd = segment_command(job, segments, i, seg)
+                    group.seg_files.append(seg)
+                    self._new_part(group, f"v{i}", f"{name} seg {i + 1}/{len(segments)}", seg, cmd, e - s)
+                if group.audio:
+                    cmd = segment_audio_command(job, group.audio)
+                    self._new_part(group, "audio", f"{name} audio", group.audio, cmd, end - start)
+                if all(t.state == "done" for t in group.parts):
+                    threading.Thread(target=self._join_group, args=(group,), daemon=True).start()
+                return
+        plan = plan_job(job)
+        plan.cleanup()
+        task = self._new_task(job, os.path.basename(job.input.strip() or job.image_pattern.strip()),
+                              job.output.strip(), [], job_duration(job) or 0.0, None)
+        task.checks = plan.commands
+
+    def _new_task(self, job, label, output, cmd, duration, group) -> ClusterTask:
+        task = ClusterTask(len(self.tasks) + 1, job, label, output, cmd, [cmd] if cmd else [], duration, group)
+        self.tasks.append(task)
+        return task
+
+    def _new_part(self, group: _TaskGroup, part: str, label: str, output: str, cmd: List[str], duration: float):
+        task = self._new_task(group.job, label, output, cmd, duration, group)
+        task.part = part
+        if group.manifest and part in group.manifest.done and os.path.isfile(output):
+            task.state = "done"
+            task.started = time.monotonic()
+        group.parts.append(task)
+
+    # --- protocol handlers (called from HTTP threads) ---
+    def register(self, data: dict) -> dict:
+        known = {f.name for f in fields(FFmpegCapabilities)}
+        caps = data.get("caps") or {}
+        if not isinstance(caps, dict):
+            raise ValueError("caps must be an object")
+        caps = FFmpegCapabilities(**{k: v for k, v in caps.items() if k in known})
+        with self._lock:
+            worker_id = f"{data.get('name') or 'worker'}#{len(self.workers) + 1}"
+            self.workers[worker_id] = {"name": data.get("name", ""), "cores": int(data.get("cores") or 0),
+                                       "slots": int(data.get("slots") or 1), "stream": bool(data.get("stream")),
+                                       "caps": caps, "seen": time.monotonic()}
+        self.on_event(f"worker {worker_id} joined: {data.get('cores')} cores, {data.get('slots')} slot(s), "
+                      f"ffmpeg {caps.version or '?'}{', streaming' if data.get('stream') else ''}\n")
+        return {"worker": worker_id}
+
+    def claim(self, data: dict) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            worker = self.workers.get(data.get("worker"))
+            if worker is None:
+                return {"register": True}
+            worker["seen"] = now
+            if self._finished.is_set():
+                return {"finished": True}
+            live = sum(1 for w in self.workers.values() if now - w["seen"] < self.lease_seconds)
+            for task in self.tasks:
+                if task.state != "queued" or (worker["stream"] and not task.streamable):
+                    continue
+                if data.get("worker") in task.failed_on and len(task.failed_on) < live:
+                    continue  # leave it for a worker that has not failed it yet
+                if any(check_command(cmd, worker["caps"]) for cmd in task.checks):
+                    continue
+                task.state, task.worker, task.lease = "running", data.get("worker"), os.urandom(12).hex()
+                task.deadline = now + self.lease_seconds
+                task.attempts += 1
+                task.out_time = task.speed = 0.0
+                if task.started is None:
+                    task.started = now
+                return {"task": task.payload()}
+        return {"wait": CLUSTER_HEARTBEAT_SECONDS}
+
+    def _running(self, data: dict) -> Optional[ClusterTask]:
+        """The task a worker message refers to, if that worker still holds its lease."""
+        try:
+            index = int(data.get("task") or 0) - 1
+        except (ValueError, TypeError):
+            return None
+        if not 0 <= index < len(self.tasks):
+            return None
+        task = self.tasks[index]
+        return task if task.state == "running" and task.lease == data.get("lease") else None
+
+    def progress(self, data: dict) -> dict:
+        with self._lock:
+            task = self._running(data)
+            if task is None:
+                return {"cancel": True}
+            task.deadline = time.monotonic() + self.lease_seconds
+            task.out_time = float(data.get("out_time") or 0.0)
+            task.speed = float(data.get("speed") or 0.0)
+            if task.worker in self.workers:
+                self.workers[task.worker]["seen"] = time.monotonic()
+        return {"ok": True}
+
+    def done(self, data: dict) -> dict:
+        with self._lock:
+            task = self._running(data)
+            if task is None:
+                return {"ok": False}
+            if data.get("ok") and self.workers.get(task.worker, {}).get("stream"):
+                if not task.upload:
+                    data = dict(data, ok=False, error="worker reported success but uploaded no output")
+                else:
+                    os.replace(task.upload, task.output)
+            if data.get("ok"):
+                task.state = "done"
+                if task.group and task.group.manifest and os.path.isfile(task.output):
+                    _fsync_file(task.output)
+                    task.group.manifest.mark(task.part)
+                self.on_event(f"done   {task.label} on {task.worker}\n")
+            else:
+                self._retry(task, data.get("error") or "failed", data.get("log") or [])
+                if task.state != "failed":
+                    return {"ok": True}
+        self._task_done(task)
+        return {"ok": True}
+
+    def receive(self, task_id: int, lease: str, stream, length: int) -> bool:
+        """Store an uploaded output (streaming workers) next to its final path; done() moves it in place."""
+        with self._lock:
+            task = self._running({"task": task_id, "lease": lease})
+            if task is None:
+                return False
+            path = f"{task.output}.{lease}.upload"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            while length > 0:
+                chunk = stream.read(min(length, 1 << 20))
+                if not chunk:
+                    raise OSError("upload truncated")
+                f.write(chunk)
+                length -= len(chunk)
+        with self._lock:
+            task.upload = path
+        return True
+
+    def input_path(self, task_id: int, lease: str) -> Optional[str]:
+        with self._lock:
+            task = self._running({"task": task_id, "lease": lease})
+            return task.job.input.strip() if task else None
+
+    # --- bookkeeping ---
+    def _retry(self, task: ClusterTask, error: str, log_tail: List[str]):
+        task.failed_on.add(task.worker)
+        task.error = error
+        task.lease = ""
+        if task.upload:
+            try:
+                os.remove(task.upload)
+            except OSError:
+                pass
+            task.upload = ""
+        if task.attempts >= self.max_attempts:
+            task.state = "failed"
+            task.error = f"{error} (after {task.attempts} attempts)" + "".join("\n    " + line.rstrip() for line in log_tail)
+            self.on_event(f"FAILED {task.label} on {task.worker}: {error}; giving up\n")
+        else:
+            task.state = "queued"
+            self.on_event(f"retry  {task.label}: {error} on {task.worker}\n")
+
+    def expire(self):
+        """Requeue tasks whose worker stopped reporting."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for task in self.tasks:
+                if task.state == "running" and now > task.deadline:
+                    self._retry(task, "worker stopped responding", [])
+                    if task.state == "failed":
+                        expired.append(task)
+        for task in expired:
+            self._task_done(task)
+
+    def _task_done(self, task: ClusterTask):
+        group = task.group
+        elapsed = time.monotonic() - (task.started or time.monotonic())
+        if group is None:
+            self._job_done(JobResult(task.job, task.state == "done", elapsed, task.error))
+            return
+        with self._lock:
+            states = [t.state for t in group.parts]
+            if task.state == "failed":
+                for t in group.parts:
+                    if t.state == "queued":
+                        t.state = "failed"  # no point encoding the rest
+            first_fail = task.state == "failed" and states.count("failed") == 1
+            complete = all(s == "done" for s in states)
+        if first_fail:
+            self._job_done(JobResult(group.job, False, elapsed, task.error))
+        elif complete:
+            threading.Thread(target=self._join_group, args=(group,), daemon=True).start()
+
+    def _join_group(self, group: _TaskGroup):
+        started = min(t.started for t in group.parts)
+        try:
+            cmd = segment_concat_command(group.job, group.seg_files, group.audio, os.path.join(group.work_dir, "segments.txt"))
+            run_ffmpeg(cmd)
+            shutil.rmtree(group.work_dir, ignore_errors=True)
+            self._job_done(JobResult(group.job, True, time.monotonic() - started))
+        except Exception as e:
+            self._job_done(JobResult(group.job, False, time.monotonic() - started, f"joining segments: {e}"))
+
+    def _job_done(self, res: JobResult):
+        with self._lock:
+            self.results.append(res)
+            if self.on_result:
+                self.on_result(res)
+            if len(self.results) >= self.total:
+                self._finished.set()
+
+    def status(self) -> List[str]:
+        with self._lock:
+            lines = []
+            for task in self.tasks:
+                if task.state == "running":
+                    pct = f"{100 * min(1.0, task.out_time / task.duration):.0f}%" if task.duration else format_seconds(task.out_time)
+                    lines.append(f"{task.worker}: {task.label} {pct}" + (f" {task.speed:.2f}x" if task.speed else ""))
+            queued = [t for t in self.tasks if t.state == "queued"]
+            lines.insert(0, f"-- {len(lines)} running, {len(queued)} queued, {len(self.results)}/{self.total} jobs done")
+            needs = set()
+            for task in queued:
+                missing = [[m for cmd in task.checks for m in check_command(cmd, w["caps"])]
+                           + (["shared storage"] if w["stream"] and not task.streamable else [])
+                           for w in self.workers.values()]
+                if missing and all(missing):
+                    needs.update(missing[0])
+            if needs:
+                lines.append("   no connected worker can run some tasks; they need: " + ", ".join(sorted(needs)))
+            return lines
+
+    def serve(self, host: str = "127.0.0.1", port: int = CLUSTER_PORT, token: str = "",
+              status_interval: float = 15, stop: Optional[threading.Event] = None):
+        """Answer workers until every job has a result (or stop is set)."""
+        if not token and not _is_loopback(host):
+            raise RuntimeError(f"Refusing to listen on {host} without a token; set one (--token) for remote workers.")
+        server = ThreadingHTTPServer((host, port), _ClusterHandler)
+        server.daemon_threads = True
+        server.coordinator = self
+        server.token = token
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.on_event(f"Coordinator on http://{host}:{server.server_address[1]}, {len(self.tasks)} task(s) "
+                      f"for {self.total} job(s)\n")
+        stop = stop or threading.Event()
+        last = time.monotonic()
+        try:
+            while not self._finished.wait(1.0) and not stop.is_set():
+                self.expire()
+                if status_interval and time.monotonic() - last >= status_interval:
+                    last = time.monotonic()
+                    self.on_event("".join(line + "\n" for line in self.status()))
+            # Let polling workers hear "finished" before the port closes.
+            deadline = time.monotonic() + CLUSTER_HEARTBEAT_SECONDS * 2
+            while time.monotonic() < deadline and not stop.is_set():
+                time.sleep(0.2)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+def _is_loopback(host: str) -> bool:
+    """True if every address host resolves to is on this machine only (127.0.0.0/8, ::1)."""
+    try:
+        addrs = {a[4][0] for a in socket.getaddrinfo(host, None)}
+    except (OSError, UnicodeError):
+        return False
+    return bool(addrs) and all(a.startswith("127.") or a == "::1" for a in addrs)
+
+class _ClusterHandler(BaseHTTPRequestHandler):
+    """JSON POST /register, /claim, /progress, /done; GET /input/<task>/<lease>/<name> (Range); PUT /output/<task>/<lease>."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code: int, body: bytes = b"", ctype: str = "application/json"):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        coord = self.server.coordinator
+        handler = {"/register": coord.register, "/claim": coord.claim,
+                   "/progress": coord.progress, "/done": coord.done}.get(self.path)
+        if handler is None:
+            return self._reply(404)
+        if self.server.token and self.headers.get("X-UMC-Token") != self.server.token:
+            return self._reply(403)
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if not isinstance(data, dict):
+                raise ValueError("body must be a JSON object")
+            reply = handler(data)
+        except (ValueError, TypeError, KeyError):
+            return self._reply(400)  # malformed message; the coordinator's state is unchanged
+        self._reply(200, json.dumps(reply).encode("utf-8"))
+
+    def do_PUT(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "output" or not parts[1].isdigit():
+            return self._reply(404)
+        if self.server.token and self.headers.get("X-UMC-Token") != self.server.token:
+            return self._reply(403)
+        try:
+            ok = self.server.coordinator.receive(int(parts[1]), parts[2], self.rfile,
+                                                 int(self.headers.get("Content-Length") or 0))
+        except OSError:
+            ok = False
+        self._reply(200 if ok else 409)
+
+    def do_GET(self):
+        # The per-task lease in the path authorizes the read, so ffmpeg needs no extra headers.
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 4 or parts[0] != "input" or not parts[1].isdigit():
+            return self._reply(404)
+        path = self.server.coordinator.input_path(int(parts[1]), parts[2])
+        if not path or not os.path.isfile(path):
+            return self._reply(404)
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        m = re.match(r"bytes=(\d*)-(\d*)$", self.headers.get("Range", "").strip())
+        if m and (m.group(1) or m.group(2)):
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+            else:
+                start = max(0, size - int(m.group(2)))  # suffix range: last N bytes
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                left = end - start + 1
+                while left > 0:
+                    chunk = f.read(min(left, 1 << 20))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    left -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg drops the connection when it seeks
+
+def _cluster_call(url: str, path: str, data: dict, token: str = "", timeout: float = 30) -> dict:
+    req = urllib.request.Request(url.rstrip("/") + path, data=json.dumps(data).encode("utf-8"),
+                                 headers={"Content-Type": "application/json", "X-UMC-Token": token})
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return json.loads(r.read() or b"{}")
+
+def _upload_output(url: str, token: str, task: dict, path: str):
+    with open(path, "rb") as f:
+        req = urllib.request.Request(f"{url.rstrip('/')}/output/{task['id']}/{task['lease']}", data=f, method="PUT",
+                                     headers={"Content-Length": str(os.path.getsize(path)), "X-UMC-Token": token})
+        with urllib.request.urlopen(req, timeout=600) as r:
+            r.read()
+
+def _run_cluster_task(url: str, token: str, worker_id: str, task: dict, stream: bool,
+                      governor: Optional[ResourceGovernor], on_event: Callable[[str], None]):
+    ident = {"worker": worker_id, "task": task["id"], "lease": task["lease"]}
+    state = {"out_time": 0.0, "speed": 0.0}
+    src, out = task["input"], task["output"]
+    tmp_dir = tempfile.mkdtemp(prefix="umc_worker_") if stream else None
+    if stream:
+        src = f"{url.rstrip('/')}/input/{task['id']}/{task['lease']}/{urllib.parse.quote(os.path.basename(src))}"
+        out = os.path.join(tmp_dir, os.path.basename(out))
+    done = threading.Event()
+
+    def heartbeat():
+        while not done.wait(CLUSTER_HEARTBEAT_SECONDS):
+            try:
+                _cluster_call(url, "/progress", dict(ident, **state), token, timeout=10)
+            except (OSError, ValueError):
+                pass  # the lease outlives a few missed beats
+
+    def progress(p: Progress):
+        state.update(out_time=p.out_time, speed=p.speed)
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    on_event(f"start  {task['label']}\n")
+    t0 = time.monotonic()
+    try:
+        if task["cmd"]:
+            tail = deque(maxlen=20)
+            governed, slot = governor.admit(JobSpec()) if governor else (JobSpec(), None)
+            try:
+                limits = ProcessLimits.from_job(governed)
+                cmd = [FFMPEG] + [src if a == task["input"] else out if a == task["output"] else a for a in task["cmd"]]
+                run_ffmpeg(limits.command(cmd) if limits else cmd, tail.append, on_progress=progress,
+                           total=task["duration"] or None, limits=limits)
+                res = JobResult(JobSpec(), True, time.monotonic() - t0)
+            except Exception as e:
+                res = JobResult(JobSpec(), False, time.monotonic() - t0, str(e), list(tail))
+            finally:
+                if slot is not None:
+                    governor.release(slot)
+        else:
+            job = replace(JobSpec(**task["job"]), input=src, output=out)
+            res = _run_batch_job(job, lambda j, p: progress(p), None, governor)
+        if res.ok and stream:
+            _upload_output(url, token, task, out)
+    except (OSError, ValueError) as e:
+        res = JobResult(JobSpec(), False, time.monotonic() - t0, f"upload failed: {e}")
+    finally:
+        done.set()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    on_event(f"{'ok    ' if res.ok else 'FAILED'} {task['label']} ({res.elapsed:.1f}s){'' if res.ok else ': ' + res.error}\n")
+    for attempt in range(5):
+        try:
+            _cluster_call(url, "/done", dict(ident, ok=res.ok, error=res.error, log=res.log_tail[-10:]), token)
+            return
+        except (OSError, ValueError):
+            time.sleep(CLUSTER_HEARTBEAT_SECONDS)
+
+def run_worker(url: str, slots: Optional[int] = None, name: str = "", stream: bool = False,
+               governor: Optional[ResourceGovernor] = None, token: str = "",
+               on_event: Callable[[str], None] = _no_log, stop: Optional[threading.Event] = None):
+    """
+    Pull tasks from a Coordinator and run up to `slots` of them at once until it reports that all
+    jobs are finished (or stays unreachable longer than a lease). Without stream the worker uses
+    the coordinator's paths directly (shared storage); with stream, ffmpeg reads the input over
+    HTTP and the output is uploaded, for modes that have one input and one output file.
+    """
+    caps = get_capabilities()
+    if not caps.ok:
+        raise RuntimeError("ffmpeg/ffprobe are not installed or not found.")
+    slots = slots or max(1, default_workers() // 4)
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    stop = stop or threading.Event()
+    info = {"name": name, "cores": default_workers(), "slots": slots, "stream": stream, "caps": vars(caps)}
+    worker_id = [_cluster_call(url, "/register", info, token)["worker"]]
+    on_event(f"Registered as {worker_id[0]} with {url}, {slots} slot(s)\n")
+
+    def loop():
+        silent_since = None
+        while not stop.is_set():
+            try:
+                resp = _cluster_call(url, "/claim", {"worker": worker_id[0]}, token)
+                silent_since = None
+            except (OSError, ValueError):
+                silent_since = silent_since or time.monotonic()
+                if time.monotonic() - silent_since > CLUSTER_LEASE_SECONDS:
+                    on_event("Coordinator unreachable; stopping\n")
+                    stop.set()
+                stop.wait(CLUSTER_HEARTBEAT_SECONDS)
+                continue
+            if resp.get("finished"):
+                stop.set()
+            elif resp.get("register"):  # the coordinator restarted
+                worker_id[0] = _cluster_call(url, "/register", info, token)["worker"]
+            elif resp.get("task"):
+                _run_cluster_task(url, token, worker_id[0], resp["task"], stream, governor, on_event)
+            else:
+                stop.wait(resp.get("wait", CLUSTER_HEARTBEAT_SECONDS))
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(slots)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        while t.is_alive():
+            t.join(0.5)
@@ -0,0 +1,89 @@
+"""Paths, format lists and small helpers shared by every part of the converter."""
+import os
+import sys
+import glob
+import shutil
+from typing import Optional
+
+def _res_path(name: str) -> str:
+    """Find resource both in dev and PyInstaller .exe."""
+    base = getattr(sys, "_MEIPASS", os.path.dirname(sys.argv[0]))
+    return os.path.join(base, name)
+
+def app_data_dir(*parts: str) -> str:
+    """Per-user writable folder for logs and caches (created on demand)."""
+    if os.name == "nt":
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        base = os.path.join(root, "UniversalMediaConverter")
+    else:
+        root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(root, "universal-media-converter")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+APP_NAME = "Universal Media Converter (ffmpeg)"
+VERSION = "1.3"
+
+VIDEO_CONTAINERS = ["mp4", "mkv", "mov", "avi", "ts", "flv", "webm", "m4v", "3gp", "mpg"]
+AUDIO_FORMATS = ["mp3", "aac", "m4a", "wav", "flac", "ogg", "opus", "wma", "aiff", "amr"]
+IMAGE_FORMATS = ["png", "jpg", "jpeg", "bmp", "tiff", "webp"]
+SUB_FORMATS = ["srt", "vtt", "ass", "ssa"]
+# ffmpeg muxer names for containers whose extension isn't a muxer name
+CONTAINER_MUXERS = {"mkv": "matroska", "ts": "mpegts", "mpg": "mpeg", "m4v": "ipod"}
+
+VIDEO_CODECS = ["copy (no re-encode)", "h264", "hevc (h265)", "vp9", "av1"]
+AUDIO_CODECS = ["copy (no re-encode)", "aac", "mp3", "opus", "vorbis", "flac", "pcm_s16le"]
+GIF_PALETTES = ["auto (simple)", "optimized (palettegen)", "optimized (diff, moving areas)"]
+PACKAGING = ["files", "hls", "dash"]  # how Video → Video renditions are written
+
+LOG_MAX_LINES = 2000     # lines kept in the GUI log widget
+LOG_RING_LINES = 10000   # undrained lines buffered between UI refreshes (oldest dropped)
+LOG_DRAIN_MS = 100       # GUI log refresh interval
+LOG_KEEP_FILES = 50      # per-job log files kept in the app data folder
+PALETTE_CACHE_KEEP = 500 # cached GIF palettes (~1 KB each)
+
+MODES = [
+    "Video → Video",
+    "Video → Audio",
+    "Audio → Audio",
+    "Video → Images",
+    "Images → Video",
+    "Video → GIF",
+    "Subtitles: Extract",
+    "Subtitles: Convert",
+    "Subtitles: Burn into Video",
+    "Video → Thumbnails",
+]
+
+def _find(bin_name: str) -> str:
+    """
+    Prefer a binary placed next to the script/exe. Fallback to PATH.
+    This makes the packaged .exe portable if ffmpeg.exe / ffprobe.exe are shipped beside it.
+    """
+    here = os.path.dirname(sys.argv[0])  # Works for both .py and frozen .exe
+    local = os.path.join(here, bin_name + (".exe" if os.name == "nt" else ""))
+    if os.path.exists(local):
+        return local
+    return shutil.which(bin_name) or bin_name
+
+FFMPEG = _find("ffmpeg")
+FFPROBE = _find("ffprobe")
+
+def _float_or_none(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def prune_files(folder: str, pattern: str, keep: int):
+    """Delete all but the `keep` most recently modified files matching pattern."""
+    try:
+        files = sorted(glob.glob(os.path.join(folder, pattern)), key=os.path.getmtime)
+        for f in files[:-keep] if keep else files:
+            os.remove(f)
+    except OSError:
+        pass
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
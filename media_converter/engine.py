@@ -0,0 +1,1156 @@
+"""Jobs and the ffmpeg command plans they turn into (GUI-independent)."""
+import os
+import re
+import json
+import math
+import shutil
+import hashlib
+import threading
+import tempfile
+from dataclasses import dataclass, field, fields, replace
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional
+
+from .common import (
+    AUDIO_CODECS, CONTAINER_MUXERS, FFMPEG, GIF_PALETTES, IMAGE_FORMATS, MODES, PACKAGING, PALETTE_CACHE_KEEP,
+    SUB_FORMATS, VIDEO_CODECS, VIDEO_CONTAINERS, _float_or_none, app_data_dir, default_workers, prune_files
+)
+from .caps import FFmpegCapabilities, check_command, get_capabilities
+from .progress import Progress, format_seconds, parse_timestamp
+from .index import _first_stream, probe_duration, probe_media
+
+if TYPE_CHECKING:  # annotations only; both modules build on this one
+    from .governor import ProcessLimits
+    from .runner import ChildUsage
+
+@dataclass
+class JobSpec:
+    """One conversion job. Fields mirror the GUI form and are kept as strings like the Tk vars."""
+    mode: str = MODES[0]
+    input: str = ""
+    output: str = ""
+    out_format: str = ""
+    video_codec: str = VIDEO_CODECS[0]
+    audio_codec: str = AUDIO_CODECS[0]
+    crf: str = ""
+    bitrate: str = ""
+    scale: str = ""
+    fps: str = ""
+    audio_bitrate: str = ""
+    start_time: str = ""
+    duration: str = ""
+    gif_palette: str = GIF_PALETTES[1]
+    sub_stream_index: str = "0"
+    sub_in_fmt: str = SUB_FORMATS[0]
+    sub_out_fmt: str = SUB_FORMATS[1]
+    image_pattern: str = ""
+    images_fps: str = "24"
+    dedup: str = ""            # Video → Images/GIF: drop near-identical frames (mpdecimate): "1" or "hi/lo/frac"
+    audio_formats: str = ""    # Video/Audio → Audio: more formats from the same decode, e.g. "aac,opus,flac"
+    loudnorm: str = ""         # EBU R128 loudness normalization: "1" or target "I[/TP[/LRA]]", e.g. "-16/-1.5/11"
+    loudnorm_measured: str = ""  # set by run_job: JSON of the analysis pass (see measure_loudness)
+    append: str = ""           # "1": Images → Video from a folder: encode only frames added since the last run
+    palette_cache: str = "1"   # reuse GIF palettes across renders of the same clip
+    auto_copy: str = "1"       # stream-copy tracks that already match the target (see plan_stream_copy)
+    cache: str = ""            # "1": reuse/store the result in the output cache
+    chunked: str = ""          # "1": Video → Video split at keyframes and encoded in parallel
+    chunk_seconds: str = ""    # target segment length (default CHUNK_SECONDS)
+    chunk_workers: str = ""    # concurrent segment encoders (default cores / 4)
+    resumable: str = ""        # "1": Video → Video / Burn encoded in checkpointed segments; a rerun resumes
+    renditions: str = ""       # Video → Video ladder, e.g. "1080:5000k,720:2800k" (see parse_renditions)
+    packaging: str = PACKAGING[0]
+    thumb_interval: str = ""   # Video → Thumbnails: seconds between thumbnails (default THUMB_INTERVAL)
+    thumb_sheet: str = ""      # "CxR": tile thumbnails into contact sheets
+    thumb_vtt: str = ""        # "1": contact sheets + WebVTT sprite map
+    pix_fmt: str = ""          # Video → Images as .npy: raw pixel format (default rgb24, see RAW_PIX_FMTS)
+    sub_shift: str = ""        # seconds (may be negative) added to subtitle timings on convert/extract
+    target_size: str = ""      # Video → Video: output size budget, e.g. "700M" (bitrate chosen, two-pass x264/x265)
+    threads: str = ""          # ffmpeg thread budget (see ProcessLimits / ResourceGovernor)
+    nice: str = ""             # process priority 0-19 (higher = lower priority)
+    cpus: str = ""             # CPU affinity, e.g. "0-3" (Linux)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JobSpec":
+        """Build a job from a manifest entry, filling in format/output the way the GUI suggests them."""
+        known = {f.name for f in fields(cls)}
+        unknown = sorted(set(data) - known)
+        if unknown:
+            raise RuntimeError(f"Unknown job field(s): {', '.join(unknown)}")
+        job = cls(**{k: "" if v is None else str(v) for k, v in data.items()})
+        job.mode = resolve_mode(job.mode)
+        if not job.out_format:
+            ext = os.path.splitext(job.output)[1].lstrip(".").lower()
+            job.out_format = ext or default_format_for_mode(job.mode)
+        if not job.output:
+            job.output = suggest_output(job)
+        return job
+
+@dataclass
+class CommandPlan:
+    """Ordered ffmpeg invocations for one job, plus temp dirs to remove once it finishes."""
+    commands: List[List[str]]
+    temp_dirs: List[str] = field(default_factory=list)
+    on_success: List[Callable[[], None]] = field(default_factory=list)  # run after the last command succeeds
+    temp_files: List[str] = field(default_factory=list)
+    parallel: int = 0  # run all commands but the last up to this many at a time (independent passes)
+    fatal: bool = False  # every command must succeed, not just the last (earlier ones produce its inputs)
+    out_dirs: List[str] = field(default_factory=list)  # created by the runner, so planning touches no disk
+    limits: Optional["ProcessLimits"] = None
+    usage: Optional["ChildUsage"] = None  # filled in by the runner
+
+    def cleanup(self):
+        for d in self.temp_dirs:
+            shutil.rmtree(d, ignore_errors=True)
+        for f in self.temp_files:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+@dataclass
+class JobResult:
+    job: JobSpec
+    ok: bool
+    elapsed: float
+    error: str = ""
+    log_tail: List[str] = field(default_factory=list)
+    progress: Optional[Progress] = None  # last progress snapshot seen
+
+def _mode_slug(mode: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", mode.lower().replace("→", "to")).strip("-")
+
+def resolve_mode(mode: str) -> str:
+    """Accept a MODES label or its slug (e.g. 'video-to-gif', 'subtitles-burn-into-video')."""
+    if mode in MODES:
+        return mode
+    for m in MODES:
+        if _mode_slug(m) == _mode_slug(mode):
+            return m
+    raise RuntimeError(f"Unknown mode: {mode!r}")
+
+def default_format_for_mode(mode: str) -> str:
+    if mode == "Video → Video": return "mp4"
+    if mode == "Video → Audio": return "mp3"
+    if mode == "Audio → Audio": return "mp3"
+    if mode == "Video → Images": return "png"
+    if mode == "Images → Video": return "mp4"
+    if mode == "Video → GIF":   return "gif"
+    if mode == "Video → Thumbnails": return "jpg"
+    if mode.startswith("Subtitles"): return "srt"
+    return "mp4"
+
+def suggest_output(job: JobSpec) -> str:
+    src = job.input.strip() or job.image_pattern.strip()
+    if not src:
+        return ""
+    base = os.path.splitext(src.rstrip("/\\"))[0]
+    if job.mode == "Video → Images" and job.out_format != "npy":
+        return base + "_frame_%04d." + (job.out_format or "png")
+    if job.mode == "Video → Thumbnails":
+        return base + "_thumb_%04d." + (job.out_format or "jpg")
+    out = base + "." + (job.out_format or default_format_for_mode(job.mode))
+    if os.path.normcase(os.path.abspath(out)) == os.path.normcase(os.path.abspath(src)):
+        out = base + "_converted." + (job.out_format or default_format_for_mode(job.mode))
+    return out
+
+def _common_inputs(job: JobSpec):
+    args = []
+    if job.start_time.strip():
+        args += ["-ss", job.start_time.strip()]
+    if job.duration.strip():
+        args += ["-t", job.duration.strip()]
+    return args
+
+def _video_filters(job: JobSpec):
+    vf = []
+    if job.scale.strip():
+        vf.append(f"scale={job.scale.strip()}")
+    if job.fps.strip():
+        vf.append(f"fps={job.fps.strip()}")
+    return ",".join(vf) if vf else None
+
+def _video_codec_args(job: JobSpec):
+    vcodec = job.video_codec
+    if vcodec.startswith("copy"):
+        return ["-c:v", "copy"]
+    if vcodec == "h264":
+        return ["-c:v", "libx264", "-preset", "medium", "-crf", job.crf.strip() or "23"]
+    if vcodec.startswith("hevc"):
+        return ["-c:v", "libx265", "-preset", "medium", "-crf", job.crf.strip() or "28"]
+    if vcodec == "vp9":
+        return ["-c:v", "libvpx-vp9", "-b:v", job.bitrate.strip() or "0"]
+    if vcodec == "av1":
+        return ["-c:v", "libaom-av1", "-crf", job.crf.strip() or "30", "-b:v", "0"]
+    return ["-c:v", "libx264", "-crf", "23"]
+
+def _audio_codec_args(job: JobSpec, fallback):
+    acodec = job.audio_codec
+    if acodec.startswith("copy"):
+        return ["-c:a", "copy"]
+    if acodec == "auto":  # set by plan_stream_copy: the audio container's own encoder, else the muxer default
+        return list(AUDIO_FORMAT_ARGS.get(job.out_format.lower(), []))
+    if acodec == "aac":
+        return ["-c:a", "aac", "-b:a", job.audio_bitrate.strip() or "192k"]
+    if acodec == "mp3":
+        return ["-c:a", "libmp3lame", "-b:a", job.audio_bitrate.strip() or "192k"]
+    if acodec == "opus":
+        return ["-c:a", "libopus", "-b:a", job.audio_bitrate.strip() or "128k"]
+    if acodec == "vorbis":
+        return ["-c:a", "libvorbis", "-b:a", job.audio_bitrate.strip() or "160k"]
+    if acodec == "flac":
+        return ["-c:a", "flac"]
+    if acodec == "pcm_s16le":
+        return ["-c:a", "pcm_s16le"]
+    return list(fallback)
+
+def _cmd_video_to_video(job: JobSpec) -> CommandPlan:
+    if job.renditions.strip():
+        return _cmd_renditions(job)
+    if job.target_size.strip():
+        return _cmd_target_size(job)
+    inp = job.input.strip()
+    out = job.output.strip()
+    fmt = job.out_format.lower()
+
+    cmd = [FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp]
+    cmd += _video_codec_args(job)
+
+    vf = _video_filters(job)
+    if vf:
+        cmd += ["-vf", vf]
+
+    cmd += _audio_codec_args(job, ["-c:a", "aac", "-b:a", "192k"])
+
+    if fmt in VIDEO_CONTAINERS:
+        cmd += ["-f", CONTAINER_MUXERS.get(fmt, fmt)]
+
+    cmd += [out]
+    return CommandPlan([cmd])
+
+# ---- Multi-rendition (ABR ladder) ----
+ABR_KEYFRAME_SECONDS = 2   # forced keyframe interval, identical in every rendition
+ABR_SEGMENT_SECONDS = 6    # HLS/DASH segment length (a multiple of the keyframe interval)
+
+@dataclass
+class Rendition:
+    height: int
+    width: int = -2            # -2: keep aspect ratio, even width
+    bitrate: str = ""
+    crf: str = ""
+    codec: str = ""            # a VIDEO_CODECS choice; empty = the job's codec
+
+    @property
+    def label(self) -> str:
+        return f"{self.height}p" if self.width == -2 else f"{self.width}x{self.height}"
+
+def parse_renditions(text: str) -> List[Rendition]:
+    """
+    Parse a ladder like "1080:crf=20,720:2800k,480:1200k:codec=hevc".
+    Each entry: HEIGHT (or WxH), then optional ':'-separated bitrate (e.g. 2800k), crf=N, codec=NAME.
+    """
+    out = []
+    for entry in filter(None, (e.strip() for e in text.split(","))):
+        size, *opts = entry.split(":")
+        m = re.fullmatch(r"(?:(\d+)x)?(\d+)p?", size.strip().lower())
+        if not m:
+            raise RuntimeError(f"Bad rendition size {size!r} (use e.g. 720 or 1280x720)")
+        r = Rendition(int(m.group(2)), int(m.group(1)) if m.group(1) else -2)
+        for opt in (o.strip() for o in opts):
+            key, _, value = opt.partition("=")
+            if not value and re.fullmatch(r"\d+(\.\d+)?[kKmM]?", key):
+                r.bitrate = key
+            elif key == "bitrate":
+                r.bitrate = value
+            elif key == "crf":
+                r.crf = value
+            elif key == "codec":
+                r.codec = next((c for c in VIDEO_CODECS[1:] if c.split()[0] == value.lower()), "")
+                if not r.codec:
+                    raise RuntimeError(f"Unknown rendition codec {value!r}")
+            else:
+                raise RuntimeError(f"Bad rendition option {opt!r} in {entry!r}")
+        out.append(r)
+    return out
+
+def _double_rate(rate: str) -> str:
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([kKmM]?)", rate)
+    return f"{float(m.group(1)) * 2:g}{m.group(2)}" if m else rate
+
+def _rendition_codec_args(job: JobSpec, r: Rendition, index: Optional[int] = None) -> List[str]:
+    """Encoder args for one rendition; with index, options get a :v:N stream specifier (one muxer, many streams)."""
+    args = _video_codec_args(replace(job, video_codec=r.codec or job.video_codec, crf=r.crf or job.crf,
+                                     bitrate=r.bitrate or job.bitrate))
+    if args[1] == "copy":
+        raise RuntimeError("Renditions are re-encoded; pick a video codec other than copy.")
+    if r.bitrate:
+        args = _with_bitrate(args, r.bitrate) + ["-maxrate", r.bitrate, "-bufsize", _double_rate(r.bitrate)]
+    args += ["-force_key_frames", f"expr:gte(t,n_forced*{ABR_KEYFRAME_SECONDS})"]
+    if index is None:
+        return args
+    return [(a + f":{index}" if a in ("-c:v", "-b:v") else a + f":v:{index}") if a.startswith("-") and k % 2 == 0 else a
+            for k, a in enumerate(args)]
+
+def _cmd_renditions(job: JobSpec) -> CommandPlan:
+    """Decode once, split into N scaled renditions, write them as files or one HLS/DASH package."""
+    inp = job.input.strip()
+    out = job.output.strip()
+    ladder = parse_renditions(job.renditions)
+    if not ladder:
+        raise RuntimeError("No renditions given (e.g. 1080:5000k,720:2800k,480:1200k).")
+    n = len(ladder)
+    pre = f"fps={job.fps.strip()}," if job.fps.strip() else ""
+    graph = f"[0:v]{pre}split={n}" + "".join(f"[s{i}]" for i in range(n)) + ";" + ";".join(
+        f"[s{i}]scale={r.width}:{r.height}[v{i}]" for i, r in enumerate(ladder))
+    cmd = [FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp, "-filter_complex", graph]
+    audio = _audio_codec_args(job, ["-c:a", "aac", "-b:a", "128k"])
+    packaging = job.packaging.strip().lower() or PACKAGING[0]
+
+    if packaging == "files":
+        base, ext = os.path.splitext(out)
+        fmt = job.out_format.lower()
+        for i, r in enumerate(ladder):
+            cmd += ["-map", f"[v{i}]", "-map", "0:a:0?"] + _rendition_codec_args(job, r) + audio
+            if fmt in VIDEO_CONTAINERS:
+                cmd += ["-f", CONTAINER_MUXERS.get(fmt, fmt)]
+            cmd += [f"{base}_{r.label}{ext}"]
+        return CommandPlan([cmd])
+
+    streams = probe_media(inp).get("streams")
+    has_audio = streams is None or any(s.get("codec_type") == "audio" for s in streams)
+    for i, r in enumerate(ladder):
+        cmd += ["-map", f"[v{i}]"] + _rendition_codec_args(job, r, i)
+    if packaging == "hls":
+        folder, master = (os.path.dirname(out), os.path.basename(out)) if out.lower().endswith(".m3u8") \
+            else (os.path.splitext(out)[0] + "_hls", "master.m3u8")
+        stem = os.path.join(folder, os.path.splitext(master)[0])
+        if has_audio:
+            cmd += ["-map", "0:a:0"] * n + audio
+        variants = " ".join(f"v:{i}" + (f",a:{i}" if has_audio else "") + f",name:{r.label}" for i, r in enumerate(ladder))
+        cmd += ["-f", "hls", "-hls_time", str(ABR_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+                "-hls_segment_filename", stem + "_%v_%05d.ts", "-master_pl_name", master,
+                "-var_stream_map", variants, stem + "_%v.m3u8"]
+    elif packaging == "dash":
+        mpd = out if out.lower().endswith(".mpd") else os.path.join(os.path.splitext(out)[0] + "_dash", "manifest.mpd")
+        folder = os.path.dirname(mpd)
+        if has_audio:
+            cmd += ["-map", "0:a:0"] + audio
+        sets = "id=0,streams=v" + (" id=1,streams=a" if has_audio else "")
+        cmd += ["-f", "dash", "-seg_duration", str(ABR_SEGMENT_SECONDS), "-use_template", "1", "-use_timeline", "1",
+                "-adaptation_sets", sets, mpd]
+    else:
+        raise RuntimeError(f"Unknown packaging {job.packaging!r} (use one of: {', '.join(PACKAGING)})")
+    return CommandPlan([cmd], out_dirs=[folder] if folder else [])
+
+# ---- Target size (two-pass) ----
+TARGET_OVERHEAD = 0.02        # share of the byte budget kept for container overhead
+TARGET_MIN_VIDEO_BPS = 50_000
+TWO_PASS_ENCODERS = ("libx264", "libx265")
+
+def parse_size(text: str) -> Optional[int]:
+    """'700M', '1.5G', '25MB', '900k', '123456' -> bytes (K/M/G/T are binary: 1M = 1024*1024)."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*", (text or "").lower())
+    if not m:
+        return None
+    return int(float(m.group(1)) * 1024 ** " kmgt".index(m.group(2) or " "))
+
+def _rate_bps(rate: str) -> Optional[float]:
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*", rate or "")
+    if not m:
+        return None
+    return float(m.group(1)) * {"": 1, "k": 1e3, "m": 1e6}[m.group(2).lower()]
+
+def _with_bitrate(args: List[str], rate: str) -> List[str]:
+    """Codec args with CRF / bitrate settings replaced by an average bitrate."""
+    args = list(args)
+    for opt in ("-crf", "-b:v"):
+        if opt in args:
+            i = args.index(opt)
+            del args[i:i + 2]
+    return args + ["-b:v", rate]
+
+def _audio_bps(job: JobSpec, audio_args: List[str]) -> float:
+    """Bits per second the audio track will take, for budgeting the video bitrate."""
+    if "-b:a" in audio_args:
+        return _rate_bps(audio_args[audio_args.index("-b:a") + 1]) or 192e3
+    if "copy" in audio_args:
+        stream = _first_stream(probe_media(job.input.strip()), "audio")
+        if stream is None:
+            return 0.0
+        return _float_or_none(stream.get("bit_rate")) or 192e3
+    return 1411e3 if "pcm_s16le" in audio_args else 700e3 if "flac" in audio_args else 192e3
+
+def target_video_bitrate(job: JobSpec, audio_args: List[str]) -> int:
+    """Video bitrate (bits/s) that makes the whole output about job.target_size bytes."""
+    target = parse_size(job.target_size)
+    if not target:
+        raise RuntimeError(f"Bad target size {job.target_size!r} (use e.g. 700M or 1.5G)")
+    duration = job_duration(job)
+    if not duration:
+        raise RuntimeError("Target size needs the input duration, and ffprobe could not read it.")
+    video = target * 8 * (1 - TARGET_OVERHEAD) / duration - _audio_bps(job, audio_args)
+    if video < TARGET_MIN_VIDEO_BPS:
+        raise RuntimeError(f"{job.target_size} is too small for {format_seconds(duration)} of video.")
+    return int(video)
+
+def _cmd_target_size(job: JobSpec) -> CommandPlan:
+    """Average-bitrate encode sized to target_size: two passes for x264/x265, one for other encoders."""
+    if job.renditions.strip():
+        raise RuntimeError("Target size applies to a single output; clear Renditions or Target size.")
+    inp = job.input.strip()
+    out = job.output.strip()
+    fmt = job.out_format.lower()
+    codec_args = _video_codec_args(job)
+    if codec_args[1] == "copy":
+        raise RuntimeError("Target size needs re-encoding; pick a video codec other than copy.")
+    audio = _audio_codec_args(job, ["-c:a", "aac", "-b:a", "192k"])
+    rate = f"{target_video_bitrate(job, audio) // 1000}k"
+    codec_args = _with_bitrate(codec_args, rate)
+    head = [FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp]
+    vf = _video_filters(job)
+    filters = ["-vf", vf] if vf else []
+    mux = ["-f", CONTAINER_MUXERS.get(fmt, fmt)] if fmt in VIDEO_CONTAINERS else []
+    encoder = codec_args[1]
+    if encoder not in TWO_PASS_ENCODERS:
+        return CommandPlan([head + codec_args + filters + audio + mux + [out]])
+
+    temp_dir = tempfile.mkdtemp(prefix="umc_2pass_")
+    stats = os.path.join(temp_dir, "pass")
+    if encoder == "libx265":
+        x265_stats = stats.replace("\\", "/").replace(":", "\\:")  # x265-params uses ':' as separator
+        passes = [["-x265-params", f"pass={n}:stats={x265_stats}.log"] for n in (1, 2)]
+    else:
+        passes = [["-pass", str(n), "-passlogfile", stats] for n in (1, 2)]
+    first = head + codec_args + passes[0] + filters + ["-an", "-f", "null", "-"]
+    second = head + codec_args + passes[1] + filters + audio + mux + [out]
+    return CommandPlan([first, second], temp_dirs=[temp_dir])
+
+# ---- Audio fan-out and loudness ----
+# Encoder settings for each audio output format when it is written as an extra fan-out output.
+AUDIO_FORMAT_ARGS = {
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "192k"], "aac": ["-c:a", "aac", "-b:a", "192k"],
+    "m4a": ["-c:a", "aac", "-b:a", "192k"], "wav": ["-c:a", "pcm_s16le"], "flac": ["-c:a", "flac"],
+    "ogg": ["-c:a", "libvorbis", "-b:a", "160k"], "opus": ["-c:a", "libopus", "-b:a", "128k"],
+    "wma": ["-c:a", "wmav2", "-b:a", "192k"], "aiff": ["-c:a", "pcm_s16be"],
+    "amr": ["-c:a", "libopencore_amrnb", "-ar", "8000", "-ac", "1"],
+}
+LOUDNORM_TARGET = (-23.0, -1.0, 7.0)  # EBU R128: integrated LUFS, true peak dBTP, loudness range LU
+LOUDNORM_CACHE_KEEP = 2000            # cached measurements (~300 bytes each)
+
+def _fanout_outputs(job: JobSpec) -> List[tuple]:
+    """(format, path) of the extra audio outputs: the main output's name with each format's extension."""
+    base = os.path.splitext(job.output.strip())[0]
+    outputs = []
+    for fmt in filter(None, (f.strip().lower().lstrip(".") for f in job.audio_formats.split(","))):
+        if fmt not in AUDIO_FORMAT_ARGS:
+            raise RuntimeError(f"Unknown audio format {fmt!r} (use: {', '.join(AUDIO_FORMAT_ARGS)})")
+        if fmt != job.out_format.lower() and fmt not in (f for f, _ in outputs):
+            outputs.append((fmt, f"{base}.{fmt}"))
+    return outputs
+
+def loudnorm_target(value: str):
+    """'1' -> EBU R128 defaults; '-16' or '-16/-1.5/11' -> (I, TP, LRA) with missing parts defaulted."""
+    value = value.strip()
+    if _flag(value):
+        return LOUDNORM_TARGET
+    try:
+        parts = [float(p) for p in value.split("/")]
+    except ValueError:
+        raise RuntimeError(f"Loudness target {value!r} is not I[/TP[/LRA]], e.g. -16/-1.5/11")
+    if not 1 <= len(parts) <= 3:
+        raise RuntimeError(f"Loudness target {value!r} is not I[/TP[/LRA]], e.g. -16/-1.5/11")
+    return tuple(parts + list(LOUDNORM_TARGET[len(parts):]))
+
+def _loudness_cache_path(job: JobSpec) -> Optional[str]:
+    """
+    Measurement of this input + trim. The input_* values do not depend on the target, so any target
+    reuses them; target_offset does, and is only applied for the target it was measured at.
+    """
+    try:
+        fp = file_fingerprint(job.input.strip())
+    except OSError:
+        return None
+    key = "|".join([fp, job.start_time.strip(), job.duration.strip()])
+    return os.path.join(app_data_dir("loudness"), hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+def cached_loudness(job: JobSpec) -> Optional[dict]:
+    path = _loudness_cache_path(job)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, TypeError, ValueError):
+        return None
+
+def _loudnorm_filter(job: JobSpec) -> Optional[str]:
+    """
+    loudnorm for the job's target: linear second pass from the job's (or the cached) measurement,
+    otherwise single-pass (dynamic) normalization. run_job measures first, so real runs are two-pass.
+    """
+    if not job.loudnorm.strip():
+        return None
+    i, tp, lra = loudnorm_target(job.loudnorm)
+    flt = f"loudnorm=I={i:g}:TP={tp:g}:LRA={lra:g}"
+    try:
+        m = json.loads(job.loudnorm_measured) if job.loudnorm_measured.strip() else cached_loudness(job)
+    except ValueError:
+        raise RuntimeError(f"loudnorm_measured is not a loudnorm measurement: {job.loudnorm_measured!r}")
+    if m:
+        try:
+            if not all(math.isfinite(float(m[k])) for k in ("input_i", "input_tp", "input_lra", "input_thresh")):
+                return None  # digital silence: nothing to normalize
+        except (KeyError, ValueError):
+            m = None
+    if m:
+        flt += (f":measured_I={m['input_i']}:measured_TP={m['input_tp']}:measured_LRA={m['input_lra']}"
+                f":measured_thresh={m['input_thresh']}")
+        if m.get("target") == [i, tp, lra]:
+            flt += f":offset={m['target_offset']}"
+        flt += ":linear=true"
+    # loudnorm works at 192 kHz internally; return to the source rate.
+    rate = next((s.get("sample_rate") for s in probe_media(job.input.strip()).get("streams", [])
+                 if s.get("codec_type") == "audio" and s.get("sample_rate")), None)
+    return flt + f",aresample={rate or 48000}"
+
+def _cmd_video_to_audio(job: JobSpec) -> CommandPlan:
+    """
+    One decode, one or more outputs: the main output plus any audio_formats, each with its own
+    encoder. With loudnorm the filtered audio is split once and shared by every output.
+    """
+    inp = job.input.strip()
+    out = job.output.strip()
+    outputs = [(job.out_format.lower(), out, _audio_codec_args(job, ["-c:a", "libmp3lame", "-b:a", "192k"]))]
+    outputs += [(fmt, path, AUDIO_FORMAT_ARGS[fmt]) for fmt, path in _fanout_outputs(job)]
+    loud = _loudnorm_filter(job)
+    cmd = [FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp]
+    if loud:
+        labels = [f"[a{i}]" for i in range(len(outputs))]
+        split = f",asplit={len(outputs)}" if len(outputs) > 1 else ""
+        cmd += ["-filter_complex", f"[0:a:0]{loud}{split}" + "".join(labels)]
+    for i, (fmt, path, args) in enumerate(outputs):
+        if loud:
+            if "copy" in args:  # filtered audio has to be encoded
+                args = AUDIO_FORMAT_ARGS.get(fmt, ["-c:a", "libmp3lame", "-b:a", "192k"])
+            cmd += ["-map", labels[i]]
+        cmd += ["-vn"] + args + [path]
+    return CommandPlan([cmd])
+
+def _cmd_audio_to_audio(job: JobSpec) -> CommandPlan:
+    return _cmd_video_to_audio(job)
+
+def _dedup_filter(job: JobSpec) -> Optional[str]:
+    """
+    mpdecimate for job.dedup: "1" uses its defaults, "hi/lo/frac" sets the thresholds (8x8-block
+    differences; a frame is dropped when no block differs by more than hi and at most frac of them
+    by more than lo). Kept frames keep their timestamps, so outputs need -vsync vfr.
+    """
+    value = job.dedup.strip()
+    if not value:
+        return None
+    if _flag(value):
+        return "mpdecimate"
+    m = re.fullmatch(r"(\d+)/(\d+)/([\d.]+)", value)
+    if not m:
+        raise RuntimeError(f"Duplicate-frame thresholds must be 1 or hi/lo/frac (e.g. 768/320/0.33), not {value!r}")
+    return f"mpdecimate=hi={m.group(1)}:lo={m.group(2)}:frac={m.group(3)}"
+
+def _write_frame_index(path: str, frames_pattern: str, printed: str, job: JobSpec):
+    """JSON sidecar mapping each kept image to its pts (seconds from the trim start, as in the .npy sidecar)."""
+    with open(printed, "r", encoding="utf-8") as f:
+        pts = [float(t) for t in re.findall(r"pts_time:(\S+)", f.read())]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"source": job.input.strip(), "start": parse_timestamp(job.start_time) or 0.0,
+                   "dedup": _dedup_filter(job), "files": [os.path.basename(frames_pattern % (i + 1))
+                                                          for i in range(len(pts))], "pts": pts}, f)
+
+def _cmd_video_to_images(job: JobSpec) -> CommandPlan:
+    from .frames import _raw_frames_command, _wants_raw  # frames builds on this module
+    if _wants_raw(job):
+        return CommandPlan([_raw_frames_command(job)])  # executed by run_raw_frames
+    inp = job.input.strip()
+    out = job.output.strip()
+    if "%0" not in out:
+        raise RuntimeError("For 'Video → Images', set output like: C:/path/frame_%04d.png")
+    cmd = [FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp]
+    vf = _video_filters(job)
+    dedup = _dedup_filter(job)
+    if dedup:
+        # Only kept frames are written; metadata=print records their pts for the index sidecar.
+        fd, printed = tempfile.mkstemp(prefix="umc_kept_", suffix=".txt")
+        os.close(fd)
+        vf = ",".join(filter(None, [vf, dedup, "metadata=add:key=umc.kept:value=1",
+                                    f"metadata=print:key=umc.kept:file='{printed.replace(chr(92), '/')}'"]))
+        index = re.sub(r"_?%0\d+d", "", os.path.splitext(out)[0]) + ".json"
+        return CommandPlan([cmd + ["-vf", vf, "-vsync", "vfr", out]], temp_files=[printed],
+                           on_success=[lambda: _write_frame_index(index, out, printed, job)])
+    if vf:
+        cmd += ["-vf", vf]
+    if job.fps.strip():
+        cmd += ["-r", job.fps.strip()]
+    cmd += [out]
+    return CommandPlan([cmd])
+
+THUMB_INTERVAL = 10.0   # seconds between thumbnails
+THUMB_WIDTH = 320
+THUMB_SEEK_MAX = 120    # up to this many thumbnails: parallel input seeks; more: one keyframe-only pass
+THUMB_VTT_SHEET = "10x10"
+
+def _thumb_size(job: JobSpec, info: dict):
+    """Thumbnail (width, height) with even dimensions; height follows the source aspect when not given."""
+    m = re.fullmatch(r"\s*(\d+)\s*[:x]\s*(-?\d+)\s*", job.scale)
+    w, h = (int(m.group(1)), int(m.group(2))) if m else (THUMB_WIDTH, -1)
+    if h <= 0:
+        v = _first_stream(info, "video") or {}
+        sw, sh = v.get("width") or 16, v.get("height") or 9
+        h = max(2, int(round(w * sh / sw / 2)) * 2)
+    return w, h
+
+def _write_sprite_vtt(path: str, sheet_pattern: str, start: float, interval: float, duration: float,
+                      size, grid):
+    """WebVTT map from time ranges to tiles (file#xywh=x,y,w,h) of the contact sheets."""
+    (w, h), (cols, rows) = size, grid
+    count = int(-(-duration // interval))
+
+    def ts(t):
+        return f"{int(t // 3600):02d}:{int(t % 3600 // 60):02d}:{t % 60:06.3f}"
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\n\n")
+        for i in range(count):
+            sheet, pos = divmod(i, cols * rows)
+            a, b = start + i * interval, start + min((i + 1) * interval, duration)
+            tile = f"{os.path.basename(sheet_pattern % (sheet + 1))}#xywh={pos % cols * w},{pos // cols * h},{w},{h}"
+            f.write(f"{ts(a)} --> {ts(b)}\n{tile}\n\n")
+
+def _cmd_thumbnails(job: JobSpec) -> CommandPlan:
+    """
+    One thumbnail every thumb_interval seconds without decoding the whole video: few thumbnails ->
+    parallel keyframe seeks (one frame decoded each); many -> one pass decoding keyframes only.
+    Optional contact sheets (thumb_sheet "CxR") and a WebVTT sprite map (thumb_vtt).
+    """
+    inp = job.input.strip()
+    out = job.output.strip()
+    if "%0" not in out:
+        raise RuntimeError("For 'Video → Thumbnails', set output like: C:/path/thumb_%04d.jpg")
+    interval = parse_timestamp(job.thumb_interval) or THUMB_INTERVAL
+    vtt = _flag(job.thumb_vtt)
+    sheet = job.thumb_sheet.strip().lower() or (THUMB_VTT_SHEET if vtt else "")
+    grid = re.fullmatch(r"(\d+)x(\d+)", sheet)
+    if sheet and not grid:
+        raise RuntimeError(f"Contact sheet layout must look like 5x4, not {job.thumb_sheet!r}")
+    w, h = _thumb_size(job, probe_media(inp))
+    start = parse_timestamp(job.start_time) or 0.0
+    total = job_duration(job)
+    count = int(-(-total // interval)) if total else None
+    tile = f",tile={sheet}" if sheet else ""
+
+    if count and count <= THUMB_SEEK_MAX:
+        temp_dir = tempfile.mkdtemp(prefix="umc_thumbs_") if sheet else None
+        cmds = []
+        for i in range(count):
+            t = start + min(i * interval + interval / 2, max(0.0, total - 0.5))
+            dest = os.path.join(temp_dir, f"t_{i + 1:05d}.png") if sheet else out % (i + 1)
+            cmds.append([FFMPEG, "-y", "-skip_frame", "nokey", "-noaccurate_seek", "-ss", f"{t:.3f}", "-i", inp,
+                         "-an", "-sn", "-frames:v", "1", "-vf", f"scale={w}:{h}", "-update", "1", dest])
+        if sheet:
+            cmds.append([FFMPEG, "-y", "-framerate", "1", "-i", os.path.join(temp_dir, "t_%05d.png"),
+                         "-vf", tile.lstrip(","), out])
+        # A missing thumbnail would cut the image2 sheet input short and leave VTT cues without tiles.
+        plan = CommandPlan(cmds, temp_dirs=[temp_dir] if temp_dir else [], parallel=default_workers(), fatal=True)
+    else:
+        plan = CommandPlan([[FFMPEG, "-y", "-skip_frame", "nokey"] + _common_inputs(job) +
+                            ["-i", inp, "-an", "-sn", "-vf", f"fps=1/{interval:g},scale={w}:{h}{tile}", out]])
+    if vtt:
+        if not total:
+            raise RuntimeError("WebVTT sprites need the video duration, and ffprobe could not read it.")
+        vtt_path = re.sub(r"_?%0\d+d", "", os.path.splitext(out)[0]) + ".vtt"
+        plan.on_success.append(lambda: _write_sprite_vtt(
+            vtt_path, out, start, interval, total, (w, h), (int(grid.group(1)), int(grid.group(2)))))
+    return plan
+
+def _concat_entry(path: str) -> str:
+    """One 'file' line of a concat-demuxer list (single quotes escaped the concat way)."""
+    return "file '" + os.path.abspath(path).replace("'", "'\\''") + "'\n"
+
+_IMAGE_EXT_ALIASES = {".jpeg": ".jpg", ".tif": ".tiff"}
+
+def _natural_key(name: str):
+    """Sort key so frame2.png comes before frame10.png."""
+    return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", name)]
+
+def sequence_files(src_dir: str) -> List[str]:
+    """Image files in a folder (any IMAGE_FORMATS extension), in natural order."""
+    exts = {"." + e for e in IMAGE_FORMATS} | {".tif"}
+    with os.scandir(src_dir) as it:
+        names = [e.name for e in it if e.is_file() and os.path.splitext(e.name)[1].lower() in exts]
+    names.sort(key=_natural_key)
+    return [os.path.join(src_dir, n) for n in names]
+
+def _link_sequence(files: List[str], temp_dir: str, ext: str) -> bool:
+    """Hardlink (or symlink) files as img_%06d.<ext>; False if this filesystem allows neither."""
+    for link in (os.link, os.symlink):
+        try:
+            for i, f in enumerate(files, start=1):
+                link(os.path.abspath(f), os.path.join(temp_dir, f"img_{i:06d}{ext}"))
+            return True
+        except (OSError, NotImplementedError, AttributeError):
+            for name in os.listdir(temp_dir):
+                os.remove(os.path.join(temp_dir, name))
+    return False
+
+def _build_sequence_input(files: List[str], fps: str):
+    """
+    Turn a list of image files into ffmpeg input args without copying any pixels.
+    Files are hard/symlinked into a contiguous img_%06d sequence for the image2 demuxer;
+    where the filesystem allows neither, a concat-demuxer list with per-frame durations
+    is written instead. Returns (input_args, output_args, temp_dir).
+    """
+    if not files:
+        raise RuntimeError("No images found in selected folder.")
+    exts = {_IMAGE_EXT_ALIASES.get(e, e) for e in (os.path.splitext(f)[1].lower() for f in files)}
+    if len(exts) > 1:
+        # One decoder is picked for the whole sequence, so types can't be mixed.
+        raise RuntimeError(f"Folder mixes image types ({', '.join(sorted(exts))}); convert them to one format first.")
+    ext = exts.pop()
+    temp_dir = tempfile.mkdtemp(prefix="umc_seq_")
+    if _link_sequence(files, temp_dir, ext):
+        return ["-framerate", fps, "-i", os.path.join(temp_dir, f"img_%06d{ext}")], [], temp_dir
+    step = 1.0 / (parse_timestamp(fps) or 24.0)
+    list_path = os.path.join(temp_dir, "frames.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in files:
+            f.write(_concat_entry(path) + f"duration {step:.6f}\n")
+        # The concat demuxer ignores the last entry's duration unless the file is listed again;
+        # -frames:v keeps the output at exactly one frame per image.
+        f.write(_concat_entry(files[-1]))
+    return ["-f", "concat", "-safe", "0", "-i", list_path], ["-r", fps, "-frames:v", str(len(files))], temp_dir
+
+def _cmd_images_to_video(job: JobSpec) -> CommandPlan:
+    src = job.image_pattern.strip() or job.input.strip()
+    if os.path.isdir(src):
+        return _images_plan(job, sequence_files(src), job.output.strip())
+    fps = job.images_fps.strip() or "24"
+    return _images_plan(job, None, job.output.strip(), [FFMPEG, "-y", "-framerate", fps, "-i", src])
+
+def _images_plan(job: JobSpec, files: Optional[List[str]], out: str, cmd: Optional[List[str]] = None) -> CommandPlan:
+    """Encode a list of image files (or the input given in cmd) with the job's video settings."""
+    fmt = job.out_format.lower()
+    temp_dirs = []
+    out_args = []
+    if cmd is None:
+        in_args, out_args, temp_dir = _build_sequence_input(files, job.images_fps.strip() or "24")
+        temp_dirs.append(temp_dir)
+        cmd = [FFMPEG, "-y"] + in_args
+
+    vf = _video_filters(job)
+    if vf:
+        cmd += ["-vf", vf]
+
+    if fmt == "webm":
+        cmd += ["-c:v", "libvpx-vp9", "-b:v", job.bitrate.strip() or "0"]
+    else:
+        cmd += ["-c:v", "libx264", "-preset", "medium", "-crf", job.crf.strip() or "23"]
+
+    cmd += out_args + [out]
+    return CommandPlan([cmd], temp_dirs)
+
+def file_fingerprint(path: str, block: int = 1 << 16) -> str:
+    """
+    Cheap content fingerprint: size + mtime + SHA-1 of three sampled blocks (start, middle, end).
+    Reads at most 192 KiB regardless of file size.
+    """
+    st = os.stat(path)
+    h = hashlib.sha1(f"{st.st_size}|{int(st.st_mtime)}".encode("utf-8"))
+    with open(path, "rb") as f:
+        for pos in (0, max(0, st.st_size // 2 - block // 2), max(0, st.st_size - block)):
+            f.seek(pos)
+            h.update(f.read(block))
+    return h.hexdigest()
+
+def _palette_cache_path(job: JobSpec, vf: str, stats_mode: str) -> Optional[str]:
+    """
+    Cached palette for this clip, keyed by input fingerprint + trim + the color-affecting part
+    of the filter chain. scale/fps are left out of the key: the palette of a clip barely
+    depends on its size, so re-rendering at another size reuses it.
+    """
+    try:
+        fp = file_fingerprint(job.input.strip())
+    except OSError:
+        return None
+    color_filters = [f for f in vf.split(",") if not re.match(r"(scale|fps)\b", f.strip())]
+    key = "|".join([fp, job.start_time.strip(), job.duration.strip(), stats_mode] + color_filters)
+    return os.path.join(app_data_dir("palettes"), hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+def _store_palette(tmp: str, final: str):
+    if os.path.exists(tmp):
+        os.replace(tmp, final)
+        prune_files(os.path.dirname(final), "*.png", PALETTE_CACHE_KEEP)
+
+def _cmd_video_to_gif(job: JobSpec) -> CommandPlan:
+    """
+    Optimized GIFs decode the input once: split → palettegen → paletteuse in one filtergraph.
+    The palette is also written to the palette cache, and a cached palette skips palettegen.
+    """
+    inp = job.input.strip()
+    vf = _video_filters(job) or "fps=15,scale=640:-1:flags=lanczos"
+    dedup = _dedup_filter(job)
+    out = job.output.strip()
+    vsync = []
+    if dedup:
+        # Dropped frames lengthen the previous frame's delay, so playback timing is unchanged.
+        vf += "," + dedup
+        vsync = ["-vsync", "vfr"]
+    head = [FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp]
+
+    if not job.gif_palette.startswith("optimized"):
+        return CommandPlan([head + ["-vf", vf, *vsync, out]])
+
+    diff = "diff" in job.gif_palette
+    stats_mode = "diff" if diff else "full"
+    use = "paletteuse=diff_mode=rectangle" if diff else "paletteuse"
+    cached = _palette_cache_path(job, vf, stats_mode) if _flag(job.palette_cache) else None
+
+    if cached and os.path.exists(cached):
+        os.utime(cached)  # keep recently used palettes out of pruning
+        return CommandPlan([[FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp, "-i", cached,
+                             "-lavfi", f"[0:v]{vf}[x];[x][1:v]{use}", *vsync, out]])
+
+    graph = f"[0:v]{vf},split[a][b];[a]palettegen=stats_mode={stats_mode}"
+    if not cached:
+        return CommandPlan([head + ["-lavfi", f"{graph}[p];[b][p]{use}", *vsync, out]])
+    tmp = cached[:-4] + f".{os.getpid()}.{threading.get_ident()}.tmp.png"
+    cmd = head + ["-filter_complex", f"{graph},split[p1][p2];[b][p1]{use}[g]",
+                  "-map", "[g]", *vsync, out, "-map", "[p2]", "-frames:v", "1", "-update", "1", tmp]
+    return CommandPlan([cmd], on_success=[lambda: _store_palette(tmp, cached)], temp_files=[tmp])
+
+# ---- Subtitle engine (pure Python, SUB_FORMATS) ----
+TEXT_SUB_CODECS = {"subrip", "srt", "ass", "ssa", "webvtt", "mov_text", "text"}
+_SUB_ENCODINGS = ("utf-8", "cp1252", "latin-1")  # tried in order after BOM sniffing; latin-1 never fails
+_SUB_TIME = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})")
+_ASS_STYLES = {
+    "ass": ("[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, "
+            "Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            "Style: Default,Arial,16,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,1",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"),
+    "ssa": ("[V4 Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, TertiaryColour, BackColour, Bold, "
+            "Italic, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, AlphaLevel, Encoding",
+            "Style: Default,Arial,16,16777215,16777215,0,0,0,0,1,1,0,2,10,10,10,0,1",
+            "Format: Marked, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"),
+}
+
+@dataclass
+class Cue:
+    start: float
+    end: float
+    text: str                   # lines joined by "\n"; <i>/<b>/<u> tags for styling
+    fields: Optional[dict] = None  # original ASS/SSA event fields (Style, Layer, …), kept for round trips
+
+def detect_encoding(data: bytes) -> str:
+    """Guess a subtitle file's text encoding: BOM first, then strict UTF-8, then Windows-1252."""
+    for bom, enc in ((b"\xef\xbb\xbf", "utf-8-sig"), (b"\xff\xfe\x00\x00", "utf-32"), (b"\x00\x00\xfe\xff", "utf-32"),
+                     (b"\xff\xfe", "utf-16"), (b"\xfe\xff", "utf-16")):
+        if data.startswith(bom):
+            return enc
+    for enc in _SUB_ENCODINGS:
+        try:
+            data.decode(enc)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+def _parse_sub_time(text: str) -> Optional[float]:
+    m = _SUB_TIME.fullmatch(text.strip())
+    if not m:
+        return None
+    h, mi, s, frac = m.groups()
+    return int(h or 0) * 3600 + int(mi) * 60 + int(s) + int(frac.ljust(3, "0")) / 1000
+
+def _format_sub_time(t: float, fmt: str) -> str:
+    ms = int(round(max(0.0, t) * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    if fmt in ("ass", "ssa"):
+        return f"{h}:{m:02d}:{s:02d}.{ms // 10:02d}"
+    return f"{h:02d}:{m:02d}:{s:02d}{',' if fmt == 'srt' else '.'}{ms:03d}"
+
+def _ass_to_text(text: str) -> str:
+    tags = {"\\i1": "<i>", "\\i0": "</i>", "\\b1": "<b>", "\\b0": "</b>", "\\u1": "<u>", "\\u0": "</u>"}
+    text = re.sub(r"\{([^}]*)\}", lambda m: "".join(tags.get(t, "") for t in re.findall(r"\\[a-z]+\d*", m.group(1))), text)
+    return text.replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+
+def _text_to_ass(text: str) -> str:
+    tags = {"i": "\\i", "b": "\\b", "u": "\\u"}
+    text = re.sub(r"<(/?)([ibu])>", lambda m: "{" + tags[m.group(2)] + ("0" if m.group(1) else "1") + "}", text)
+    return re.sub(r"<[^>]+>", "", text).replace("\n", "\\N")
+
+def _parse_srt_vtt(lines: Iterable[str]):
+    block = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            block.append(line)
+            continue
+        yield from _srt_vtt_block(block)
+        block = []
+    yield from _srt_vtt_block(block)
+
+def _srt_vtt_block(block: List[str]):
+    for i, line in enumerate(block):
+        if "-->" in line:
+            a, _, b = line.partition("-->")
+            start, end = _parse_sub_time(a), _parse_sub_time(b.strip().split(" ")[0])
+            if start is not None and end is not None:
+                text = "\n".join(block[i + 1:])
+                text = re.sub(r"</?(?!/?[ibu]>)[^>]*>", "", text)  # keep <i>/<b>/<u>, drop <c.x>, <v Name>, …
+                yield Cue(start, end, text)
+            return
+
+def _parse_ass(lines: Iterable[str], header: Optional[List[str]]):
+    section, columns = "", None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            section = stripped.lower()
+        if section != "[events]":
+            if header is not None:
+                header.append(line)
+            continue
+        key, _, value = line.partition(":")
+        if key == "Format":
+            columns = [c.strip() for c in value.split(",")]
+        elif key == "Dialogue" and columns:
+            values = [v.strip() if i < len(columns) - 1 else v for i, v in
+                      enumerate(value.lstrip().split(",", len(columns) - 1))]
+            ev = dict(zip(columns, values))
+            start, end = _parse_sub_time(ev.get("Start", "")), _parse_sub_time(ev.get("End", ""))
+            if start is not None and end is not None:
+                yield Cue(start, end, _ass_to_text(ev.get("Text", "")), ev)
+
+def read_subtitles(path: str, fmt: Optional[str] = None, header: Optional[List[str]] = None):
+    """
+    Yield the cues of an SRT/VTT/ASS/SSA file lazily. For ASS/SSA, the script header
+    (everything before [Events]) is appended to `header` as it is read.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in SUB_FORMATS:
+        raise RuntimeError(f"Unsupported subtitle format: {fmt!r}")
+    with open(path, "rb") as f:
+        head = f.read(1 << 16)
+    with open(path, "r", encoding=detect_encoding(head), errors="replace", newline="") as f:
+        lines = (line.lstrip("\ufeff") for line in f)
+        if fmt in ("ass", "ssa"):
+            yield from _parse_ass(lines, header)
+        else:
+            yield from _parse_srt_vtt(lines)
+
+def write_subtitles(path: str, cues: Iterable[Cue], fmt: Optional[str] = None,
+                    header: Optional[List[str]] = None) -> int:
+    """Write cues as SRT/VTT/ASS/SSA (UTF-8). An ASS/SSA header from read_subtitles is reused if given."""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in SUB_FORMATS:
+        raise RuntimeError(f"Unsupported subtitle format: {fmt!r}")
+    n = 0
+    tmp = path + ".part"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        cues = iter(cues)
+        first = next(cues, None)  # ASS headers are collected while the first event is read
+        if fmt == "vtt":
+            f.write("WEBVTT\n\n")
+        elif fmt in ("ass", "ssa"):
+            styles, style_format, style, event_format = _ASS_STYLES[fmt]
+            own = [l for l in header or [] if l.strip()]
+            if any(l.strip().lower() == styles.lower() for l in own):
+                f.write("\n".join(own) + "\n\n")
+            else:
+                f.write(f"[Script Info]\nScriptType: {'v4.00+' if fmt == 'ass' else 'v4.00'}\n"
+                        f"PlayResX: 384\nPlayResY: 288\n\n{styles}\n{style_format}\n{style}\n\n")
+            f.write(f"[Events]\n{event_format}\n")
+        for cue in _chain_first(first, cues):
+            n += 1
+            if fmt == "srt":
+                f.write(f"{n}\n{_format_sub_time(cue.start, fmt)} --> {_format_sub_time(cue.end, fmt)}\n{cue.text}\n\n")
+            elif fmt == "vtt":
+                f.write(f"{_format_sub_time(cue.start, fmt)} --> {_format_sub_time(cue.end, fmt)}\n{cue.text}\n\n")
+            else:
+                ev = cue.fields or {}
+                first_col = ("Layer", "0") if fmt == "ass" else ("Marked", "Marked=0")
+                f.write("Dialogue: " + ",".join([
+                    ev.get(first_col[0], first_col[1]), _format_sub_time(cue.start, fmt), _format_sub_time(cue.end, fmt),
+                    ev.get("Style", "Default"), ev.get("Name", ""), ev.get("MarginL", "0"), ev.get("MarginR", "0"),
+                    ev.get("MarginV", "0"), ev.get("Effect", ""), _text_to_ass(cue.text)]) + "\n")
+    os.replace(tmp, path)
+    return n
+
+def _chain_first(first, rest):
+    if first is not None:
+        yield first
+        yield from rest
+
+def shift_cues(cues: Iterable[Cue], offset: float):
+    """Move every cue by offset seconds; cues pushed entirely before 0 are dropped."""
+    for cue in cues:
+        if cue.end + offset <= 0:
+            continue
+        yield replace(cue, start=max(0.0, cue.start + offset), end=cue.end + offset)
+
+def convert_subtitles(src: str, dst: str, offset: float = 0.0, in_fmt: Optional[str] = None,
+                      out_fmt: Optional[str] = None) -> int:
+    """Convert/shift one subtitle file without ffmpeg. Returns the number of cues written."""
+    header = []
+    cues = read_subtitles(src, in_fmt, header)
+    if offset:
+        cues = shift_cues(cues, offset)
+    return write_subtitles(dst, cues, out_fmt, header)
+
+def _is_sub_path(path: str) -> bool:
+    return os.path.splitext(path)[1].lstrip(".").lower() in SUB_FORMATS
+
+def _sub_shift(job: JobSpec) -> float:
+    text = job.sub_shift.strip()
+    if not text:
+        return 0.0
+    sign = -1.0 if text.startswith("-") else 1.0
+    value = parse_timestamp(text.lstrip("+-"))
+    if value is None:
+        raise RuntimeError(f"Bad subtitle shift {job.sub_shift!r} (seconds or HH:MM:SS.mmm, may be negative)")
+    return sign * value
+
+def _cmd_sub_extract(job: JobSpec) -> CommandPlan:
+    inp = job.input.strip()
+    out = job.output.strip()
+    idx = job.sub_stream_index.strip() or "0"
+    shift = _sub_shift(job)
+    if idx.lower() != "all":
+        outputs = [out]
+        cmd = [FFMPEG, "-y", "-i", inp, "-map", f"0:s:{idx}", out]
+    else:
+        # Every text subtitle stream in one read of the container: <name>.<n>[.<lang>].<ext>
+        base, ext = os.path.splitext(out)
+        outputs, cmd = [], [FFMPEG, "-y", "-i", inp]
+        streams = [s for s in probe_media(inp).get("streams", []) if s.get("codec_type") == "subtitle"]
+        for k, s in enumerate(streams):
+            if s.get("codec_name") in TEXT_SUB_CODECS:
+                lang = s.get("tags", {}).get("language")
+                outputs.append(f"{base}.{k}{'.' + lang if lang else ''}{ext}")
+                cmd += ["-map", f"0:s:{k}", outputs[-1]]
+        if not outputs:
+            raise RuntimeError("No text subtitle streams found in the input.")
+    plan = CommandPlan([cmd])
+    if shift and _is_sub_path(out):
+        plan.on_success.append(lambda: [convert_subtitles(p, p, shift) for p in outputs])
+    return plan
+
+def _cmd_sub_convert(job: JobSpec) -> CommandPlan:
+    inp = job.input.strip()
+    out = job.output.strip()
+    shift = _sub_shift(job)
+    if _is_sub_path(inp) and _is_sub_path(out):
+        # Parsed and written in-process by the success hook; there is no ffmpeg command to run.
+        return CommandPlan([], on_success=[lambda: convert_subtitles(inp, out, shift)])
+    return CommandPlan([[FFMPEG, "-y"] + (["-itsoffset", f"{shift:g}"] if shift else []) + ["-i", inp, out]])
+
+def _cmd_sub_burn(job: JobSpec) -> CommandPlan:
+    inp = job.input.strip()
+    out = job.output.strip()
+    subfile = job.image_pattern.strip()
+    if not subfile or not os.path.exists(subfile):
+        raise RuntimeError("Pick a subtitle file to burn (use the Images section's 'Browse…' to select .srt/.ass).")
+    vf = _video_filters(job)
+    subfile_fixed = subfile.replace("\\", "/")
+    subfilter = f"subtitles='{subfile_fixed}'"
+    vf = (vf + "," + subfilter) if vf else subfilter
+    return CommandPlan([[FFMPEG, "-y"] + _common_inputs(job) + ["-i", inp, "-vf", vf, "-c:v", "libx264", "-preset", "medium", "-crf", job.crf.strip() or "20", "-c:a", "copy", out]])
+
+COMMAND_BUILDERS = {
+    "Video → Video": _cmd_video_to_video,
+    "Video → Audio": _cmd_video_to_audio,
+    "Audio → Audio": _cmd_audio_to_audio,
+    "Video → Images": _cmd_video_to_images,
+    "Images → Video": _cmd_images_to_video,
+    "Video → GIF": _cmd_video_to_gif,
+    "Subtitles: Extract": _cmd_sub_extract,
+    "Subtitles: Convert": _cmd_sub_convert,
+    "Subtitles: Burn into Video": _cmd_sub_burn,
+    "Video → Thumbnails": _cmd_thumbnails,
+}
+
+def check_job(job: JobSpec, caps: Optional[FFmpegCapabilities] = None) -> List[str]:
+    """
+    Cheap static version of check_plan: the encoders and filters the job's fields ask for, without
+    building a plan (no probing, linking or folders). run_job still checks the real plan.
+    """
+    caps = caps or get_capabilities()
+    if not caps.ok:
+        return []
+    cmd = [FFMPEG]
+    filters = []
+    if job.mode == "Video → Video":
+        cmd += _video_codec_args(job) + _audio_codec_args(job, [])
+    elif job.mode in ("Video → Audio", "Audio → Audio"):
+        cmd += _audio_codec_args(job, [])
+        for fmt, _ in _fanout_outputs(job):
+            cmd += AUDIO_FORMAT_ARGS[fmt]
+        if job.loudnorm.strip():
+            filters += ["loudnorm", "aresample"]
+    elif job.mode == "Video → GIF" and job.gif_palette.startswith("optimized"):
+        filters += ["palettegen", "paletteuse"]
+    elif job.mode == "Subtitles: Burn into Video":
+        cmd += ["-c:v", "libx264"]
+        filters.append("subtitles")
+    if job.dedup.strip() and job.mode in ("Video → Images", "Video → GIF"):
+        filters.append("mpdecimate")
+    if filters:
+        cmd += ["-vf", ",".join(filters)]
+    return check_command(cmd, caps)
+
+def plan_job(job: JobSpec) -> CommandPlan:
+    builder = COMMAND_BUILDERS.get(job.mode)
+    if builder is None:
+        raise RuntimeError("Unknown mode")
+    from .governor import ProcessLimits  # governor builds on this module
+    plan = builder(job)
+    plan.limits = ProcessLimits.from_job(job)
+    if plan.limits:
+        plan.commands = [plan.limits.command(c) for c in plan.commands]
+    return plan
+
+def job_duration(job: JobSpec) -> Optional[float]:
+    """Expected output duration in seconds, honoring -ss/-t the same way _common_inputs applies them."""
+    if job.mode == "Images → Video":
+        src = job.image_pattern.strip() or job.input.strip()
+        fps = parse_timestamp(job.images_fps) or 24.0
+        if os.path.isdir(src):
+            n = len(sequence_files(src))
+            return n / fps if n else None
+        return None
+    if job.mode == "Subtitles: Convert":
+        return None
+    start = parse_timestamp(job.start_time) or 0.0
+    limit = parse_timestamp(job.duration)
+    total = probe_duration(job.input.strip())
+    if total is None:
+        return limit
+    remaining = max(0.0, total - start)
+    return min(remaining, limit) if limit else remaining
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _inputs_fingerprint(job: JobSpec) -> str:
+    """Fingerprint of everything the job reads: input file, image folder, burned-in subtitle file."""
+    parts = []
+    src = (job.image_pattern.strip() or job.input.strip()) if job.mode == "Images → Video" else job.input.strip()
+    if job.mode == "Images → Video" and os.path.isdir(src):
+        h = hashlib.sha1()
+        for f in sequence_files(src):
+            st = os.stat(f)
+            h.update(f"{os.path.basename(f)}|{st.st_size}|{int(st.st_mtime)}\n".encode("utf-8"))
+        parts.append(h.hexdigest())
+    else:
+        parts.append(file_fingerprint(src))
+    if job.mode == "Subtitles: Burn into Video":
+        parts.append(file_fingerprint(job.image_pattern.strip()))
+    return "|".join(parts)
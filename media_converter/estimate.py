@@ -0,0 +1,83 @@
+"""Output size and encode time predictions from short sample encodes."""
+import os
+import time
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+from .common import default_workers
+from .progress import format_seconds, parse_timestamp
+from .engine import JobSpec, job_duration, parse_size, plan_job
+from .governor import _whole_number
+from .runner import _no_log, prepare_job, run_plan
+
+ESTIMATE_SAMPLES = 4
+ESTIMATE_SAMPLE_SECONDS = 5.0
+ESTIMATE_MODES = ("Video → Video", "Video → Audio", "Audio → Audio", "Video → GIF", "Subtitles: Burn into Video")
+
+@dataclass
+class Estimate:
+    size: int                 # predicted output bytes
+    encode_seconds: float     # predicted wall time of the full encode on this machine
+    duration: float           # media seconds the job covers
+    samples: int
+    sample_seconds: float
+
+    @property
+    def bitrate(self) -> float:
+        return self.size * 8 / self.duration if self.duration else 0.0
+
+    def summary(self) -> str:
+        return (f"~{self.size / 1024 ** 2:.1f} MB, ~{format_seconds(self.encode_seconds)} to encode "
+                f"({self.bitrate / 1000:.0f} kb/s over {format_seconds(self.duration)}, "
+                f"from {self.samples} x {self.sample_seconds:g}s samples)")
+
+def estimate_job(job: JobSpec, samples: int = ESTIMATE_SAMPLES, sample_seconds: float = ESTIMATE_SAMPLE_SECONDS,
+                 workers: Optional[int] = None, log: Callable[[str], None] = _no_log) -> Estimate:
+    """
+    Encode `samples` short, evenly spaced excerpts with the job's settings and extrapolate output
+    size and encode time to the full duration. Concurrent samples split the job's thread budget,
+    and each sample's time is scaled back to the whole budget, assuming the encoder scales linearly.
+    """
+    if job.mode not in ESTIMATE_MODES or job.renditions.strip():
+        raise RuntimeError(f"Estimates are available for: {', '.join(ESTIMATE_MODES)} (single output)")
+    total = job_duration(job)
+    if not total:
+        raise RuntimeError("Cannot estimate: ffprobe could not read the input duration.")
+    if total <= samples * sample_seconds * 1.5:
+        samples, sample_seconds = 1, total
+    start = parse_timestamp(job.start_time) or 0.0
+    job = prepare_job(job, log)
+    target = parse_size(job.target_size) if job.target_size.strip() else None
+    ext = os.path.splitext(job.output.strip())[1] or "." + job.out_format
+    workers = max(1, min(samples, workers or default_workers()))
+    budget = _whole_number(job.threads, "Threads") or os.cpu_count() or 1
+    threads = max(1, budget // workers)
+    temp_dir = tempfile.mkdtemp(prefix="umc_estimate_")
+    try:
+        parts = []
+        for i in range(samples):
+            t = start + min(max(0.0, total * (i + 0.5) / samples - sample_seconds / 2), total - sample_seconds)
+            parts.append(replace(job, start_time=f"{t:.3f}", duration=f"{sample_seconds:.3f}",
+                                 output=os.path.join(temp_dir, f"sample{i}{ext}"), chunked="", cache="",
+                                 threads=str(threads),
+                                 palette_cache="", thumb_vtt="",
+                                 # same bitrate as the full job: the budget scales with the sample length
+                                 target_size=str(int(target * sample_seconds / total)) if target else ""))
+
+        def timed(part: JobSpec) -> float:
+            t0 = time.monotonic()
+            run_plan(plan_job(part), log)
+            return time.monotonic() - t0
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            seconds = sum(pool.map(timed, parts)) * threads / budget
+        encoded = sum(os.path.getsize(p.output) for p in parts if os.path.exists(p.output))
+        if not encoded:
+            raise RuntimeError("Sample encodes produced no output; see the log.")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    scale = total / (samples * sample_seconds)
+    return Estimate(target or int(encoded * scale), seconds * scale, total, samples, sample_seconds)
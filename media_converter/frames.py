@@ -0,0 +1,171 @@
+"""Raw frame pipelines that read decoded video straight from ffmpeg."""
+import os
+import re
+import json
+import subprocess
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+
+from .common import FFMPEG, _float_or_none
+from .progress import Progress, ProgressTracker
+from .engine import JobSpec, _common_inputs, _dedup_filter, _video_filters, job_duration
+from .governor import ProcessLimits
+from .runner import ChildUsage, _no_log, _wait_child
+
+# pix_fmt -> (numpy dtype string, channels); channels == 1 gives (height, width) frames
+RAW_PIX_FMTS = {"rgb24": ("|u1", 3), "bgr24": ("|u1", 3), "rgba": ("|u1", 4), "gray": ("|u1", 1),
+                "gray16le": ("<u2", 1), "rgb48le": ("<u2", 3)}
+_SHOWINFO = re.compile(r"Parsed_showinfo.*\bpts_time:\s*(\S+).*\bs:(\d+)x(\d+)")
+_NPY_HEADER_LEN = 128  # fixed so the shape can be patched in once the frame count is known
+
+def _raw_pix_fmt(job: JobSpec) -> str:
+    pix_fmt = job.pix_fmt.strip() or "rgb24"
+    if pix_fmt not in RAW_PIX_FMTS:
+        raise RuntimeError(f"Unsupported raw pixel format {pix_fmt!r} (use one of: {', '.join(RAW_PIX_FMTS)})")
+    return pix_fmt
+
+def _raw_frames_command(job: JobSpec) -> List[str]:
+    """ffmpeg writing bare frames to stdout; showinfo on stderr supplies each frame's pts and size."""
+    vf = _video_filters(job)
+    return [FFMPEG, "-hide_banner", "-nostats"] + _common_inputs(job) + [
+        "-i", job.input.strip(), "-an", "-sn", "-vf", ",".join(filter(None, [vf, _dedup_filter(job), "showinfo"])),
+        "-vsync", "passthrough", "-f", "rawvideo", "-pix_fmt", _raw_pix_fmt(job), "pipe:1"]
+
+def _wants_raw(job: JobSpec) -> bool:
+    return job.mode == "Video → Images" and job.out_format.lower() == "npy"
+
+class RawFrameStream:
+    """
+    Iterate (pts, data, width, height) over the decoded frames of job.input, where data is the
+    frame's bytes in job.pix_fmt. Stopping early kills ffmpeg.
+    """
+
+    def __init__(self, job: JobSpec, log: Callable[[str], None] = _no_log,
+                 on_progress: Optional[Callable[[Progress], None]] = None, usage: Optional[ChildUsage] = None):
+        self.job = job
+        self.pix_fmt = _raw_pix_fmt(job)
+        self.log = log
+        self.on_progress = on_progress
+        self.usage = usage
+        dtype, channels = RAW_PIX_FMTS[self.pix_fmt]
+        self.bytes_per_pixel = channels * int(dtype[-1])
+
+    def __iter__(self):
+        cmd = _raw_frames_command(self.job)
+        limits = ProcessLimits.from_job(self.job)
+        if limits:
+            cmd = limits.command(cmd)
+        if self.on_progress:
+            cmd = [cmd[0], "-progress", "pipe:2"] + cmd[1:]
+            tracker = ProgressTracker(job_duration(self.job))
+        self.log("\n$ " + " ".join(cmd) + "\n")
+        proc = (limits.popen if limits else subprocess.Popen)(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        frames = deque()
+        ready = threading.Condition()
+        tail = deque(maxlen=20)
+
+        def read_stderr():
+            for raw in proc.stderr:
+                line = raw.decode("utf-8", "replace")
+                m = _SHOWINFO.search(line)
+                if m:
+                    with ready:
+                        frames.append((_float_or_none(m.group(1)), int(m.group(2)), int(m.group(3))))
+                        ready.notify()
+                    continue
+                if self.on_progress:
+                    consumed, snapshot = tracker.feed(line)
+                    if snapshot:
+                        self.on_progress(snapshot)
+                    if consumed:
+                        continue
+                tail.append(line)
+                self.log(line)
+            with ready:
+                frames.append(None)
+                ready.notify()
+
+        reader = threading.Thread(target=read_stderr, daemon=True)
+        reader.start()
+        try:
+            while True:
+                with ready:
+                    while not frames:
+                        ready.wait()
+                    info = frames.popleft()
+                if info is None:
+                    break
+                pts, w, h = info
+                data = proc.stdout.read(w * h * self.bytes_per_pixel)
+                if len(data) < w * h * self.bytes_per_pixel:
+                    break
+                yield pts, data, w, h
+            rc = _wait_child(proc, self.usage)
+            reader.join()
+            if rc != 0:
+                raise RuntimeError(f"ffmpeg exited with code {rc}: {''.join(tail).strip()[-300:]}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+def iter_frames(path: str, pix_fmt: str = "rgb24", scale: str = "", fps: str = "",
+                start: str = "", duration: str = ""):
+    """
+    Yield (pts, frame) for each frame of a video, frame being a read-only NumPy array of shape
+    (height, width, channels) (or (height, width) for gray formats) viewing ffmpeg's bytes without a copy.
+    Requires numpy.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("iter_frames needs numpy (pip install numpy)")
+    job = JobSpec(mode="Video → Images", input=path, pix_fmt=pix_fmt, scale=scale, fps=fps,
+                  start_time=start, duration=duration)
+    dtype, channels = RAW_PIX_FMTS[_raw_pix_fmt(job)]
+    for pts, data, w, h in RawFrameStream(job):
+        shape = (h, w) if channels == 1 else (h, w, channels)
+        yield pts, np.frombuffer(data, dtype=dtype).reshape(shape)
+
+def _npy_header(dtype: str, shape) -> bytes:
+    """NumPy .npy v1.0 header padded to _NPY_HEADER_LEN bytes."""
+    text = "{'descr': '%s', 'fortran_order': False, 'shape': (%s), }" % (dtype, "".join(f"{n}, " for n in shape))
+    pad = _NPY_HEADER_LEN - 10 - len(text) - 1
+    if pad < 0:
+        raise RuntimeError("Frame array shape too large for the .npy header")
+    return b"\x93NUMPY\x01\x00" + (_NPY_HEADER_LEN - 10).to_bytes(2, "little") + (text + " " * pad + "\n").encode("latin1")
+
+def run_raw_frames(job: JobSpec, log: Callable[[str], None] = _no_log,
+                   on_progress: Optional[Callable[[Progress], None]] = None, usage: Optional[ChildUsage] = None):
+    """
+    Video → Images into one .npy array (frames, height, width[, channels]) without any image encoding;
+    open it with numpy.load(path, mmap_mode="r") for random access. A JSON sidecar beside it
+    records pix_fmt, shape and each frame's pts.
+    """
+    out = job.output.strip()
+    pix_fmt = _raw_pix_fmt(job)
+    dtype, channels = RAW_PIX_FMTS[pix_fmt]
+    pts, size = [], None
+    tmp = out + ".part"
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _NPY_HEADER_LEN)
+        for t, data, w, h in RawFrameStream(job, log, on_progress, usage):
+            if size is None:
+                size = (w, h)
+            elif size != (w, h):
+                raise RuntimeError(f"Frame size changed mid-stream ({size[0]}x{size[1]} -> {w}x{h}); set a scale")
+            f.write(data)
+            pts.append(t)
+        if size is None:
+            raise RuntimeError("ffmpeg produced no frames.")
+        shape = (len(pts), size[1], size[0]) + ((channels,) if channels > 1 else ())
+        f.seek(0)
+        f.write(_npy_header(dtype, shape))
+    os.replace(tmp, out)
+    with open(os.path.splitext(out)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump({"source": job.input.strip(), "pix_fmt": pix_fmt, "dtype": dtype, "shape": shape,
+                   "pts": pts}, f)
+    if on_progress:
+        on_progress(Progress(total=1.0, out_time=1.0, done=True))
@@ -0,0 +1,172 @@
+"""Per-process limits (threads, priority, CPU affinity) and the admission control for concurrent jobs."""
+import os
+import sys
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional
+
+from .common import default_workers
+from .engine import JobSpec
+
+_IONICE = shutil.which("ionice") if sys.platform.startswith("linux") else None
+_NICE = shutil.which("nice") if os.name == "posix" else None
+_TASKSET = shutil.which("taskset") if sys.platform.startswith("linux") else None
+# ffmpeg options that take no value; every other option consumes the next argument.
+_FFMPEG_FLAGS = {"-y", "-n", "-nostdin", "-nostats", "-stats", "-hide_banner", "-an", "-vn", "-sn", "-dn",
+                 "-re", "-shortest", "-copyts", "-accurate_seek", "-noaccurate_seek"}
+
+@dataclass
+class ProcessLimits:
+    """How one job's ffmpeg processes may use the machine."""
+    threads: int = 0                                # ffmpeg thread budget (0: ffmpeg decides, usually all cores)
+    nice: int = 0                                   # 0-19; on Windows >0 means below-normal priority
+    cpus: List[int] = field(default_factory=list)   # CPU affinity (Linux), empty = any CPU
+
+    @classmethod
+    def from_job(cls, job: JobSpec) -> Optional["ProcessLimits"]:
+        if not (job.threads.strip() or job.nice.strip() or job.cpus.strip()):
+            return None
+        return cls(_whole_number(job.threads, "Threads"), max(0, min(19, _whole_number(job.nice, "Nice"))),
+                   _parse_cpus(job.cpus))
+
+    def command(self, cmd: List[str]) -> List[str]:
+        """cmd with decoder, encoder (every output) and filter threads capped at the budget."""
+        if not self.threads:
+            return list(cmd)
+        n = str(self.threads)
+        out = [cmd[0], "-filter_threads", n, "-filter_complex_threads", n]
+        value = False  # the previous argument was an option that takes this one as its value
+        for arg in cmd[1:]:
+            if value:
+                value = False
+            elif arg.startswith("-") and arg != "-":
+                if arg == "-i":
+                    out += ["-threads", n]  # input option: decoder threads
+                value = arg not in _FFMPEG_FLAGS
+            else:
+                out += ["-threads", n]  # output option: encoder threads for this output
+            out.append(arg)
+        return out
+
+    def launcher(self) -> List[str]:
+        """
+        Wrappers that set I/O priority, niceness and affinity before ffmpeg is exec'd, so every
+        thread it starts inherits them (they exec in place, so the pid is ffmpeg's).
+        """
+        pre = []
+        if self.nice and _IONICE:
+            pre += [_IONICE, "-c", "3" if self.nice >= 19 else "2", "-n", "7"]
+        if self.nice and _NICE:
+            pre += [_NICE, "-n", str(self.nice)]
+        if self.cpus and _TASKSET:
+            pre += [_TASKSET, "-c", ",".join(map(str, self.cpus))]
+        return pre
+
+    def popen_kwargs(self) -> dict:
+        if os.name == "nt" and self.nice:
+            flag = "IDLE_PRIORITY_CLASS" if self.nice >= 15 else "BELOW_NORMAL_PRIORITY_CLASS"
+            return {"creationflags": getattr(subprocess, flag, 0)}
+        return {}
+
+    def apply(self, pid: int):
+        """Best-effort fallback for what launcher() could not wrap; only reaches ffmpeg's main thread."""
+        try:
+            if self.nice and not _NICE and hasattr(os, "setpriority"):
+                os.setpriority(os.PRIO_PROCESS, pid, self.nice)
+            if self.cpus and not _TASKSET and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(pid, self.cpus)
+        except OSError:
+            pass  # the process may already have exited, or the OS refuses; limits are advisory
+
+    def popen(self, cmd: List[str], **kwargs) -> subprocess.Popen:
+        proc = subprocess.Popen(self.launcher() + list(cmd), **kwargs, **self.popen_kwargs())
+        self.apply(proc.pid)
+        return proc
+
+def _whole_number(value: str, name: str) -> int:
+    try:
+        return int(value.strip() or 0)
+    except ValueError:
+        raise RuntimeError(f"{name} must be a whole number: {value!r}")
+
+def _parse_cpus(text: str) -> List[int]:
+    """'0-3,6' -> [0, 1, 2, 3, 6]"""
+    cpus = []
+    for part in filter(None, (p.strip() for p in (text or "").split(","))):
+        a, _, b = part.partition("-")
+        try:
+            cpus += range(int(a), int(b or a) + 1)
+        except ValueError:
+            raise RuntimeError(f"CPUs must look like 0-3,6: {text!r}")
+    return cpus
+
+def free_memory_mb() -> Optional[float]:
+    """Available memory (Linux MemAvailable); None where it can't be read cheaply."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class ResourceGovernor:
+    """
+    Splits a global core budget among concurrently running jobs and admits a job only when a
+    slot is free and, while other jobs run, the load average and free memory are within limits.
+    admit() returns the job with threads/nice/cpus filled in plus a slot to release() afterwards.
+    """
+
+    def __init__(self, slots: int, cores: Optional[int] = None, nice: int = 0, pin: bool = False,
+                 max_load: float = 0.0, min_free_mb: float = 0.0, poll: float = 2.0):
+        self.cores = cores or default_workers()
+        self.slots = max(1, slots)
+        self.per_job = max(1, self.cores // self.slots)
+        self.nice = nice
+        self.max_load = max_load
+        self.min_free_mb = min_free_mb
+        self.poll = poll
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self._cpus = cpus if pin and len(cpus) >= self.slots else []
+        self._free = list(range(self.slots))
+        self._running = 0
+        self._cond = threading.Condition()
+
+    def pressure(self) -> str:
+        """Why a new job should wait right now ('' if it may start)."""
+        if self.max_load and hasattr(os, "getloadavg") and os.getloadavg()[0] > self.max_load:
+            return f"load {os.getloadavg()[0]:.1f} > {self.max_load:g}"
+        free = free_memory_mb() if self.min_free_mb else None
+        if free is not None and free < self.min_free_mb:
+            return f"{free:.0f} MB free < {self.min_free_mb:g} MB"
+        return ""
+
+    def admit(self, job: JobSpec, on_wait: Optional[Callable[[str], None]] = None):
+        waited = ""
+        with self._cond:
+            while True:
+                reason = "" if self._free else "no free slot"
+                if not reason and self._running:
+                    reason = self.pressure()  # never hold back the only job
+                if not reason:
+                    break
+                if on_wait and reason != waited and reason != "no free slot":
+                    on_wait(reason)
+                waited = reason
+                self._cond.wait(self.poll)
+            slot = self._free.pop(0)
+            self._running += 1
+        share = len(self._cpus) // self.slots
+        cpus = self._cpus[slot * share:(slot + 1) * share] if self._cpus else []
+        return replace(job, threads=job.threads or str(len(cpus) or self.per_job),
+                       nice=job.nice or (str(self.nice) if self.nice else ""),
+                       cpus=job.cpus or ",".join(map(str, cpus))), slot
+
+    def release(self, slot: int):
+        with self._cond:
+            self._free.append(slot)
+            self._running -= 1
+            self._cond.notify()
@@ -0,0 +1,503 @@
+"""The Tkinter desktop app."""
+import os
+import threading
+from typing import Optional
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from .common import (
+    APP_NAME, AUDIO_CODECS, AUDIO_FORMATS, FFMPEG, FFPROBE, GIF_PALETTES, IMAGE_FORMATS, LOG_DRAIN_MS,
+    LOG_MAX_LINES, MODES, PACKAGING, SUB_FORMATS, VERSION, VIDEO_CODECS, VIDEO_CONTAINERS, _res_path, app_data_dir
+)
+from .caps import available_audio_codecs, available_video_codecs, ffmpeg_exists, get_capabilities
+from .progress import Progress
+from .engine import THUMB_INTERVAL, JobSpec, default_format_for_mode
+from .runner import run_job
+from .chunked import CHUNK_SECONDS
+from .estimate import estimate_job
+from .logs import LogPump, job_log_path, prune_logs
+
+if os.name == "nt":
+    try:
+        import ctypes
+        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(
+            "MachSquare.UniversalMediaConverter"
+        )
+    except Exception:
+        pass
+
+class UniversalConverter(tk.Tk):
+    def __init__(self):
+        super().__init__()
+
+
+
+
+        icon_path = _res_path("app_icon.ico")
+        try:
+            # Windows supports .ico directly
+            self.iconbitmap(icon_path)
+            win = tk.Toplevel(self)
+            win.iconbitmap(_res_path("app_icon.ico"))
+        except Exception:
+            # Fallback for other platforms: use a PNG if you have one
+            try:
+                ico_png = _res_path("app_icon.png")
+                self.iconphoto(True, tk.PhotoImage(file=ico_png))
+            except Exception:
+                pass
+ 
+
+
+
+        # ----- Window behavior -----
+        self.title(f"{APP_NAME} v{VERSION}")
+        self.minsize(1100, 720)
+        try:
+            self.state('zoomed')  # Windows maximize (no-op elsewhere)
+        except Exception:
+            pass
+        self.configure(padx=16, pady=14)
+
+        # Base font
+        base_font = ("Segoe UI", 10)
+        self.option_add("*Font", base_font)
+
+        # ----- State vars -----
+        self.mode = tk.StringVar(value=MODES[0])
+        self.input_var = tk.StringVar()
+        self.output_var = tk.StringVar()
+        self.out_format = tk.StringVar(value="mp4")
+        self.video_codec = tk.StringVar(value=VIDEO_CODECS[0])
+        self.audio_codec = tk.StringVar(value=AUDIO_CODECS[0])
+        self.crf = tk.StringVar(value="")
+        self.bitrate = tk.StringVar(value="")
+        self.scale = tk.StringVar(value="")
+        self.fps = tk.StringVar(value="")
+        self.audio_bitrate = tk.StringVar(value="")
+        self.start_time = tk.StringVar(value="")
+        self.duration = tk.StringVar(value="")
+        self.gif_palette = tk.StringVar(value=GIF_PALETTES[1])
+        self.sub_stream_index = tk.StringVar(value="0")
+        self.sub_in_fmt = tk.StringVar(value=SUB_FORMATS[0])
+        self.sub_out_fmt = tk.StringVar(value=SUB_FORMATS[1])
+        self.image_pattern = tk.StringVar(value="")
+        self.images_fps = tk.StringVar(value="24")
+        self.append_frames = tk.BooleanVar(value=False)
+        self.chunked = tk.BooleanVar(value=False)
+        self.resumable = tk.BooleanVar(value=False)
+        self.auto_copy = tk.BooleanVar(value=True)
+        self.use_cache = tk.BooleanVar(value=False)
+        self.low_priority = tk.BooleanVar(value=True)
+        self.chunk_seconds = tk.StringVar(value=str(CHUNK_SECONDS))
+        self.renditions = tk.StringVar(value="")
+        self.packaging = tk.StringVar(value=PACKAGING[0])
+        self.thumb_interval = tk.StringVar(value=f"{THUMB_INTERVAL:g}")
+        self.thumb_sheet = tk.StringVar(value="")
+        self.thumb_vtt = tk.BooleanVar(value=False)
+        self.sub_shift = tk.StringVar(value="")
+        self.target_size = tk.StringVar(value="")
+        self.audio_formats = tk.StringVar(value="")
+        self.loudnorm = tk.StringVar(value="")
+        self.dedup = tk.BooleanVar(value=False)
+
+        # Layout growth
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(9, weight=1)  # log row
+
+        # Header
+        title = ttk.Label(self, text=APP_NAME, font=("Segoe UI", 18, "bold"))
+        title.grid(row=0, column=0, sticky="w")
+        subtitle = ttk.Label(self, text="Powered by FFmpeg • Remux, transcode, extract audio, images, GIFs, and subtitles")
+        subtitle.grid(row=1, column=0, sticky="w", pady=(0, 10))
+
+        # Mode
+        mode_row = ttk.Frame(self)
+        mode_row.grid(row=2, column=0, sticky="ew", pady=(0,6))
+        mode_row.grid_columnconfigure(2, weight=1)
+        ttk.Label(mode_row, text="Mode:", width=10).grid(row=0, column=0, sticky="w")
+        mode_combo = ttk.Combobox(mode_row, values=MODES, textvariable=self.mode, state="readonly", width=32)
+        mode_combo.grid(row=0, column=1, sticky="w")
+        mode_combo.bind("<<ComboboxSelected>>", lambda e: self._refresh_options())
+
+        # IO
+        io = ttk.Frame(self)
+        io.grid(row=3, column=0, sticky="ew", pady=(4,6))
+        io.grid_columnconfigure(1, weight=1)
+
+        ttk.Label(io, text="Input", width=10).grid(row=0, column=0, sticky="w")
+        in_entry = ttk.Entry(io, textvariable=self.input_var)
+        in_entry.grid(row=0, column=1, sticky="ew", padx=(6,6))
+        ttk.Button(io, text="Browse…", command=self.browse_input, width=12).grid(row=0, column=2, sticky="e")
+
+        ttk.Label(io, text="Output", width=10).grid(row=1, column=0, sticky="w", pady=(6,0))
+        out_entry = ttk.Entry(io, textvariable=self.output_var)
+        out_entry.grid(row=1, column=1, sticky="ew", padx=(6,6), pady=(6,0))
+        ttk.Button(io, text="Browse…", command=self.browse_output, width=12).grid(row=1, column=2, sticky="e", pady=(6,0))
+
+        # Format/codec
+        fmt = ttk.Frame(self)
+        fmt.grid(row=4, column=0, sticky="ew", pady=(4,10))
+        ttk.Label(fmt, text="Output format", width=14).grid(row=0, column=0, sticky="w")
+        self.format_combo = ttk.Combobox(fmt, values=VIDEO_CONTAINERS + AUDIO_FORMATS + IMAGE_FORMATS + ["npy"] + SUB_FORMATS + ["gif"], textvariable=self.out_format, width=10, state="readonly")
+        self.format_combo.grid(row=0, column=1, sticky="w", padx=(6,12))
+        ttk.Label(fmt, text="Video codec", width=12).grid(row=0, column=2, sticky="w")
+        self.vcodec_combo = ttk.Combobox(fmt, values=VIDEO_CODECS, textvariable=self.video_codec, width=20, state="readonly")
+        self.vcodec_combo.grid(row=0, column=3, sticky="w", padx=(6,12))
+        ttk.Label(fmt, text="Audio codec", width=12).grid(row=0, column=4, sticky="w")
+        self.acodec_combo = ttk.Combobox(fmt, values=AUDIO_CODECS, textvariable=self.audio_codec, width=20, state="readonly")
+        self.acodec_combo.grid(row=0, column=5, sticky="w", padx=(6,12))
+
+        # Advanced
+        adv = ttk.LabelFrame(self, text="Advanced")
+        adv.grid(row=5, column=0, sticky="ew", pady=(0,10))
+        for c in range(12):
+            adv.grid_columnconfigure(c, weight=0)
+
+        r = 0
+        ttk.Label(adv, text="CRF (blank = default)").grid(row=r, column=0, sticky="w", padx=6, pady=6)
+        ttk.Entry(adv, width=7, textvariable=self.crf).grid(row=r, column=1, sticky="w")
+        ttk.Label(adv, text="Video bitrate (e.g. 2500k)").grid(row=r, column=2, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=12, textvariable=self.bitrate).grid(row=r, column=3, sticky="w")
+        ttk.Label(adv, text="Audio bitrate").grid(row=r, column=4, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=10, textvariable=self.audio_bitrate).grid(row=r, column=5, sticky="w")
+        ttk.Label(adv, text="Scale (WxH)").grid(row=r, column=6, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=12, textvariable=self.scale).grid(row=r, column=7, sticky="w")
+        ttk.Label(adv, text="FPS").grid(row=r, column=8, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=7, textvariable=self.fps).grid(row=r, column=9, sticky="w")
+
+        r += 1
+        ttk.Label(adv, text="Start at (HH:MM:SS)").grid(row=r, column=0, sticky="w", padx=6, pady=6)
+        ttk.Entry(adv, width=12, textvariable=self.start_time).grid(row=r, column=1, sticky="w")
+        ttk.Label(adv, text="Duration (HH:MM:SS)").grid(row=r, column=2, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=12, textvariable=self.duration).grid(row=r, column=3, sticky="w")
+        ttk.Label(adv, text="GIF palette").grid(row=r, column=4, sticky="w", padx=(14,6))
+        ttk.Combobox(adv, values=GIF_PALETTES, textvariable=self.gif_palette, width=30, state="readonly").grid(row=r, column=5, sticky="w")
+        ttk.Label(adv, text="Sub idx").grid(row=r, column=6, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=5, textvariable=self.sub_stream_index).grid(row=r, column=7, sticky="w")
+        ttk.Label(adv, text="Sub in").grid(row=r, column=8, sticky="w", padx=(14,6))
+        ttk.Combobox(adv, values=SUB_FORMATS, textvariable=self.sub_in_fmt, width=7, state="readonly").grid(row=r, column=9, sticky="w")
+        ttk.Label(adv, text="Sub out").grid(row=r, column=10, sticky="w", padx=(14,6))
+        ttk.Combobox(adv, values=SUB_FORMATS, textvariable=self.sub_out_fmt, width=7, state="readonly").grid(row=r, column=11, sticky="w")
+
+        r += 1
+        ttk.Checkbutton(adv, text="Parallel chunks", variable=self.chunked).grid(row=r, column=0, sticky="w", padx=6, pady=6)
+        ttk.Checkbutton(adv, text="Resumable", variable=self.resumable).grid(row=r, column=1, sticky="w")
+        ttk.Label(adv, text="Chunk length (s)").grid(row=r, column=2, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=7, textvariable=self.chunk_seconds).grid(row=r, column=3, sticky="w")
+        ttk.Checkbutton(adv, text="Auto stream copy", variable=self.auto_copy).grid(row=r, column=4, sticky="w", padx=(14,6))
+        ttk.Checkbutton(adv, text="Reuse cached results", variable=self.use_cache).grid(row=r, column=5, sticky="w", padx=(14,6))
+        ttk.Checkbutton(adv, text="Low priority (keep PC responsive)", variable=self.low_priority).grid(row=r, column=6, columnspan=4, sticky="w", padx=(14,6))
+
+        r += 1
+        ttk.Label(adv, text="Renditions").grid(row=r, column=0, sticky="w", padx=6, pady=6)
+        ttk.Entry(adv, width=40, textvariable=self.renditions).grid(row=r, column=1, columnspan=4, sticky="w")
+        ttk.Label(adv, text="e.g. 1080:5000k,720:2800k,480:1200k").grid(row=r, column=5, sticky="w", padx=(6,6))
+        ttk.Label(adv, text="Packaging").grid(row=r, column=6, sticky="w", padx=(14,6))
+        ttk.Combobox(adv, values=PACKAGING, textvariable=self.packaging, width=7, state="readonly").grid(row=r, column=7, sticky="w")
+
+        r += 1
+        ttk.Label(adv, text="Thumbnail every (s)").grid(row=r, column=0, sticky="w", padx=6, pady=6)
+        ttk.Entry(adv, width=7, textvariable=self.thumb_interval).grid(row=r, column=1, sticky="w")
+        ttk.Label(adv, text="Contact sheet (e.g. 5x4)").grid(row=r, column=2, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=7, textvariable=self.thumb_sheet).grid(row=r, column=3, sticky="w")
+        ttk.Checkbutton(adv, text="WebVTT sprites", variable=self.thumb_vtt).grid(row=r, column=4, sticky="w", padx=(14,6))
+        ttk.Label(adv, text="Sub shift (s)").grid(row=r, column=6, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=7, textvariable=self.sub_shift).grid(row=r, column=7, sticky="w")
+        ttk.Label(adv, text="Target size (e.g. 700M)").grid(row=r, column=8, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=9, textvariable=self.target_size).grid(row=r, column=9, sticky="w")
+
+        r += 1
+        ttk.Label(adv, text="Also export (e.g. aac,opus)").grid(row=r, column=0, sticky="w", padx=6, pady=6)
+        ttk.Entry(adv, width=14, textvariable=self.audio_formats).grid(row=r, column=1, columnspan=2, sticky="w")
+        ttk.Label(adv, text="Loudnorm (1 or I/TP/LRA)").grid(row=r, column=3, sticky="w", padx=(14,6))
+        ttk.Entry(adv, width=12, textvariable=self.loudnorm).grid(row=r, column=4, columnspan=2, sticky="w")
+        ttk.Checkbutton(adv, text="Drop duplicate frames (images/GIF)", variable=self.dedup).grid(row=r, column=6, columnspan=4, sticky="w", padx=(14,6))
+
+        # Images
+        imgs = ttk.LabelFrame(self, text="Images")
+        imgs.grid(row=6, column=0, sticky="ew", pady=(0,10))
+        imgs.grid_columnconfigure(1, weight=1)
+        ttk.Label(imgs, text="Image pattern or folder", width=20).grid(row=0, column=0, sticky="w", padx=6, pady=6)
+        ttk.Entry(imgs, textvariable=self.image_pattern).grid(row=0, column=1, sticky="ew", padx=(6,6))
+        ttk.Button(imgs, text="Browse…", command=self.browse_images, width=12).grid(row=0, column=2, sticky="e")
+        ttk.Label(imgs, text="Images FPS").grid(row=0, column=3, sticky="w", padx=(16,6))
+        ttk.Entry(imgs, width=7, textvariable=self.images_fps).grid(row=0, column=4, sticky="w")
+        ttk.Checkbutton(imgs, text="Append new frames", variable=self.append_frames).grid(row=0, column=5, sticky="w", padx=(16,6))
+
+        # Controls
+        ctrl = ttk.Frame(self)
+        ctrl.grid(row=7, column=0, sticky="ew")
+        ctrl.grid_columnconfigure(1, weight=1)
+        self.convert_btn = ttk.Button(ctrl, text="Convert", command=self.on_convert, width=14)
+        self.convert_btn.grid(row=0, column=0, sticky="w")
+        self.prog = ttk.Progressbar(ctrl, mode="indeterminate", maximum=100)
+        self.prog.grid(row=0, column=1, sticky="ew", padx=(10,0))
+        self.prog_text = tk.StringVar(value="")
+        ttk.Label(ctrl, textvariable=self.prog_text, width=48).grid(row=0, column=2, sticky="e", padx=(10,0))
+        self.estimate_btn = ttk.Button(ctrl, text="Estimate", command=self.on_estimate, width=10)
+        self.estimate_btn.grid(row=0, column=3, sticky="e", padx=(10,0))
+        self._progress = None  # latest Progress, written by the worker thread, read by _poll_progress
+        self._busy = False
+        self._job_error = None
+
+        # Log
+        ttk.Label(self, text="Log").grid(row=8, column=0, sticky="w", pady=(10,4))
+        self.log = tk.Text(self, height=14, wrap="word")
+        self.log.grid(row=9, column=0, sticky="nsew")
+        self.log_pump = LogPump()
+        self.after(LOG_DRAIN_MS, self._drain_log)
+        self._append(f"Tip: FFmpeg binary: {FFMPEG}\n")
+        self._append(f"Tip: FFprobe binary: {FFPROBE}\n")
+
+        # Capability probe runs off the Tk thread (it's a disk cache hit after the first launch).
+        self._caps = None
+        threading.Thread(target=self._probe_caps, daemon=True).start()
+        self.after(100, self._apply_caps)
+
+        self._refresh_options()
+
+    # ---------------- UI helpers ----------------
+    def _append(self, text: str):
+        # Safe from any thread: the widget is only touched by _drain_log on the Tk loop.
+        self.log_pump.write(text)
+
+    def _drain_log(self):
+        chunks, dropped = self.log_pump.drain()
+        if chunks:
+            if dropped:
+                chunks.insert(0, f"… {dropped} log lines skipped (see full log file) …\n")
+            self.log.insert("end", "".join(chunks))
+            lines = int(self.log.index("end-1c").split(".")[0])
+            if lines > LOG_MAX_LINES:
+                self.log.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
+            self.log.see("end")
+        self.after(LOG_DRAIN_MS, self._drain_log)
+
+    def set_busy(self, busy: bool):
+        if busy:
+            self.convert_btn.configure(state="disabled")
+            self.estimate_btn.configure(state="disabled")
+            self._progress = None
+            self.prog_text.set("")
+            self.prog.configure(mode="indeterminate", value=0)
+            self.prog.start(10)
+            self._busy = True
+            self._job_error = None
+            self.after(250, self._poll_progress)
+        else:
+            self._busy = False
+            self.convert_btn.configure(state="normal")
+            self.estimate_btn.configure(state="normal")
+            self.prog.stop()
+
+    def _probe_caps(self):
+        self._caps = get_capabilities()
+
+    def _apply_caps(self):
+        caps = self._caps
+        if caps is None:
+            self.after(100, self._apply_caps)
+            return
+        if not caps.ok:
+            self._append("Warning: ffmpeg/ffprobe not detected.\n")
+            return
+        self._append(f"FFmpeg {caps.version}\n")
+        vcodecs, acodecs = available_video_codecs(caps), available_audio_codecs(caps)
+        self.vcodec_combo.configure(values=vcodecs)
+        self.acodec_combo.configure(values=acodecs)
+        skipped = [c for c in VIDEO_CODECS + AUDIO_CODECS if c not in vcodecs + acodecs]
+        if skipped:
+            self._append(f"Not available in this ffmpeg build: {', '.join(skipped)}\n")
+
+    def _on_progress(self, p: Progress):
+        # Called from the worker thread: just hand over the snapshot, Tk is touched in _poll_progress.
+        self._progress = p
+
+    def _poll_progress(self):
+        p = self._progress
+        if p is not None:
+            pct = p.percent
+            if pct is not None:
+                if str(self.prog.cget("mode")) != "determinate":
+                    self.prog.stop()
+                    self.prog.configure(mode="determinate")
+                self.prog.configure(value=pct)
+            self.prog_text.set(p.summary())
+        if self._busy:
+            self.after(250, self._poll_progress)
+            return
+        # Worker finished: reset the controls and report from the Tk thread.
+        self.set_busy(False)
+        if self._job_error:
+            messagebox.showerror("Error", self._job_error)
+
+    def browse_input(self):
+        m = self.mode.get()
+        if m in ("Images → Video",):
+            path = filedialog.askdirectory(title="Choose folder with images (or cancel)")
+            if path:
+                self.image_pattern.set(path)
+        else:
+            types = [("All media", "*.*")]
+            path = filedialog.askopenfilename(title="Choose input file", filetypes=types)
+            if path:
+                self.input_var.set(path)
+                self._suggest_output()
+
+    def browse_output(self):
+        fmt = self.out_format.get().lower()
+        initial = self.output_var.get() or f"output.{fmt}"
+        path = filedialog.asksaveasfilename(
+            title="Save as",
+            initialfile=os.path.basename(initial),
+            defaultextension=f".{fmt}",
+            filetypes=[(fmt.upper(), f"*.{fmt}"), ("All files","*.*")]
+        )
+        if path:
+            root, ext = os.path.splitext(path)
+            want = f".{fmt}"
+            if ext.lower() != want:
+                path = root + want
+            self.output_var.set(path)
+
+    def browse_images(self):
+        path = filedialog.askdirectory(title="Choose images folder")
+        if path:
+            self.image_pattern.set(path)
+
+    def _suggest_output(self):
+        m = self.mode.get()
+        fmt = self._default_format_for_mode()
+        inpath = self.input_var.get().strip()
+        if inpath and fmt:
+            base = os.path.splitext(inpath)[0]
+            # If video->images, suggest numbered pattern
+            if m == "Video → Images":
+                self.output_var.set(base + "_frame_%04d.png")
+                self.out_format.set("png")
+            elif m == "Video → Thumbnails":
+                self.output_var.set(base + "_thumb_%04d." + fmt)
+                self.out_format.set(fmt)
+            else:
+                self.output_var.set(base + "." + fmt)
+                self.out_format.set(fmt)
+
+    def _default_format_for_mode(self):
+        return default_format_for_mode(self.mode.get())
+
+    def _refresh_options(self):
+        m = self.mode.get()
+        if m in ("Video → Video", "Images → Video"):
+            self.vcodec_combo.configure(state="readonly")
+            self.acodec_combo.configure(state="readonly")
+        elif m in ("Video → GIF", "Video → Images", "Video → Thumbnails"):
+            self.vcodec_combo.configure(state="disabled")
+            self.acodec_combo.configure(state="disabled")
+        elif m in ("Video → Audio", "Audio → Audio"):
+            self.vcodec_combo.configure(state="disabled")
+            self.acodec_combo.configure(state="readonly")
+        elif m.startswith("Subtitles"):
+            self.vcodec_combo.configure(state="disabled")
+            self.acodec_combo.configure(state="disabled")
+        self._suggest_output()
+
+    # ---------------- Main convert ----------------
+    def on_convert(self):
+        job = self._validated_job()
+        if job:
+            self.set_busy(True)
+            threading.Thread(target=self._run_mode, args=(job,), daemon=True).start()
+
+    def on_estimate(self):
+        job = self._validated_job()
+        if job:
+            self.set_busy(True)
+            threading.Thread(target=self._run_estimate, args=(job,), daemon=True).start()
+
+    def _validated_job(self) -> Optional[JobSpec]:
+        """Check the form (showing an error dialog) and snapshot it, or None if it can't run."""
+        if not ffmpeg_exists():
+            messagebox.showerror("ffmpeg not found", "ffmpeg/ffprobe are not installed or not found.\n\nPlace ffmpeg.exe & ffprobe.exe next to this app, or add them to PATH.")
+            return None
+        m = self.mode.get()
+        if m in ("Video → Video", "Images → Video") and self.video_codec.get() not in self.vcodec_combo.cget("values"):
+            messagebox.showerror("Codec not available", f"{self.video_codec.get()} is not available in this ffmpeg build.")
+            return None
+        if m != "Images → Video" and not self.input_var.get().strip():
+            messagebox.showerror("Missing input", "Please choose an input file.")
+            return None
+        if not self.output_var.get().strip():
+            self._suggest_output()
+        if not self.output_var.get().strip():
+            messagebox.showerror("Missing output", "Please choose an output file.")
+            return None
+        return self._job_spec()
+
+    def _job_spec(self) -> JobSpec:
+        """Snapshot the form into an engine job."""
+        return JobSpec(
+            mode=self.mode.get(),
+            input=self.input_var.get().strip(),
+            output=self.output_var.get().strip(),
+            out_format=self.out_format.get().lower(),
+            video_codec=self.video_codec.get(),
+            audio_codec=self.audio_codec.get(),
+            crf=self.crf.get(),
+            bitrate=self.bitrate.get(),
+            scale=self.scale.get(),
+            fps=self.fps.get(),
+            audio_bitrate=self.audio_bitrate.get(),
+            start_time=self.start_time.get(),
+            duration=self.duration.get(),
+            gif_palette=self.gif_palette.get(),
+            sub_stream_index=self.sub_stream_index.get(),
+            sub_in_fmt=self.sub_in_fmt.get(),
+            sub_out_fmt=self.sub_out_fmt.get(),
+            image_pattern=self.image_pattern.get().strip(),
+            images_fps=self.images_fps.get(),
+            append="1" if self.append_frames.get() else "",
+            chunked="1" if self.chunked.get() else "",
+            chunk_seconds=self.chunk_seconds.get(),
+            resumable="1" if self.resumable.get() else "",
+            auto_copy="1" if self.auto_copy.get() else "",
+            cache="1" if self.use_cache.get() else "",
+            renditions=self.renditions.get().strip(),
+            packaging=self.packaging.get(),
+            thumb_interval=self.thumb_interval.get(),
+            thumb_sheet=self.thumb_sheet.get().strip(),
+            thumb_vtt="1" if self.thumb_vtt.get() else "",
+            sub_shift=self.sub_shift.get().strip(),
+            target_size=self.target_size.get().strip(),
+            audio_formats=self.audio_formats.get().strip(),
+            loudnorm=self.loudnorm.get().strip(),
+            dedup="1" if self.dedup.get() else "",
+            nice="10" if self.low_priority.get() else "",
+        )
+
+    def _run_estimate(self, job: JobSpec):
+        # Worker thread, like _run_mode.
+        try:
+            self._append("\nEncoding samples to estimate size and time…\n")
+            self._append(f"Estimate: {estimate_job(job, log=self._append).summary()}\n")
+        except Exception as e:
+            self._append(f"\n❌ Error: {e}\n")
+            self._job_error = str(e)
+        finally:
+            self._busy = False
+
+    def _run_mode(self, job: JobSpec):
+        # Worker thread: no Tk calls here, _poll_progress picks up the outcome.
+        log_dir = app_data_dir("logs")
+        try:
+            log_path = job_log_path(log_dir, job)
+            self.log_pump.spill_to(log_path)
+            self._append(f"Full log: {log_path}\n")
+            run_job(job, log=self._append, on_progress=self._on_progress)
+        except Exception as e:
+            self._append(f"\n❌ Error: {e}\n")
+            self._job_error = str(e)
+        finally:
+            self.log_pump.close_spill()
+            prune_logs(log_dir)
+            self._busy = False
@@ -0,0 +1,237 @@
+"""ffprobe access and the SQLite media index that can answer probes without re-running ffprobe."""
+import os
+import json
+import time
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from .common import AUDIO_FORMATS, FFPROBE, VIDEO_CONTAINERS, _float_or_none, app_data_dir, default_workers
+
+def probe_duration(path: str) -> Optional[float]:
+    if _media_index is not None:
+        return _float_or_none(probe_media(path).get("format", {}).get("duration"))
+    try:
+        out = subprocess.run(
+            [FFPROBE, "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True, timeout=60,
+        ).stdout.strip()
+        return float(out)
+    except Exception:
+        return None
+
+def probe_media(path: str) -> dict:
+    """ffprobe -show_format -show_streams as a dict ({} if the probe fails). Uses the media index if enabled."""
+    index = _media_index
+    if index is None:
+        return _ffprobe_media(path)
+    info = index.info(path)
+    if info is None:
+        info = _ffprobe_media(path)
+        if info:
+            try:
+                index.store(path, info)
+            except OSError:
+                pass
+    return info
+
+def _ffprobe_media(path: str) -> dict:
+    try:
+        out = subprocess.run([FFPROBE, "-v", "error", "-of", "json", "-show_format", "-show_streams", path],
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True,
+                             timeout=120).stdout
+        return json.loads(out or "{}")
+    except Exception:
+        return {}
+
+def probe_keyframes(path: str) -> List[float]:
+    """Keyframe times of the first video stream, from packet flags (no decoding). Uses the media index if enabled."""
+    index = _media_index
+    if index is None:
+        return _ffprobe_keyframes(path)
+    times = index.keyframes(path)
+    if times is None:
+        times = _ffprobe_keyframes(path)
+        info = probe_media(path)
+        if info:
+            try:
+                index.store(path, info, times)
+            except OSError:
+                pass
+    return times
+
+def _ffprobe_keyframes(path: str) -> List[float]:
+    out = subprocess.run([FFPROBE, "-v", "error", "-select_streams", "v:0",
+                          "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path],
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+    times = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                times.append(float(pts))
+            except ValueError:
+                pass
+    return sorted(times)
+
+def _first_stream(info: dict, codec_type: str) -> Optional[dict]:
+    for s in info.get("streams", []):
+        if s.get("codec_type") == codec_type and not s.get("disposition", {}).get("attached_pic"):
+            return s
+    return None
+
+MEDIA_EXTENSIONS = set(VIDEO_CONTAINERS + AUDIO_FORMATS) | {"mts", "m2ts", "wmv", "mxf", "vob", "ogv", "wma"}
+
+class MediaIndex:
+    """
+    SQLite cache of ffprobe results (format, streams, optionally keyframes) for media files.
+    Rows are keyed by absolute path and trusted only while size + mtime still match.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime REAL, duration REAL,
+                format TEXT, bit_rate INTEGER, info TEXT, keyframes TEXT, probed_at REAL);
+            CREATE TABLE IF NOT EXISTS streams (
+                path TEXT, idx INTEGER, type TEXT, codec TEXT, width INTEGER, height INTEGER,
+                channels INTEGER, sample_rate INTEGER, language TEXT, PRIMARY KEY (path, idx));
+            CREATE INDEX IF NOT EXISTS streams_codec ON streams (codec);
+            CREATE INDEX IF NOT EXISTS streams_type ON streams (type);
+        """)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _stat(path: str):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime
+
+    def _row(self, path: str, column: str):
+        path = os.path.abspath(path)
+        try:
+            size, mtime = self._stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._db.execute(f"SELECT size, mtime, {column} FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == size and row[1] == mtime and row[2] is not None:
+            return row[2]
+        return None
+
+    def info(self, path: str) -> Optional[dict]:
+        raw = self._row(path, "info")
+        return json.loads(raw) if raw else None
+
+    def keyframes(self, path: str) -> Optional[List[float]]:
+        raw = self._row(path, "keyframes")
+        return json.loads(raw) if raw else None
+
+    def store(self, path: str, info: dict, keyframes: Optional[List[float]] = None):
+        path = os.path.abspath(path)
+        size, mtime = self._stat(path)
+        fmt = info.get("format", {})
+        with self._lock, self._db:
+            old = self._db.execute("SELECT size, mtime, keyframes FROM files WHERE path = ?", (path,)).fetchone()
+            if keyframes is None and old and old[0] == size and old[1] == mtime:
+                keyframes = json.loads(old[2]) if old[2] else None
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                path, size, mtime, _float_or_none(fmt.get("duration")), fmt.get("format_name"),
+                _float_or_none(fmt.get("bit_rate")), json.dumps(info),
+                json.dumps(keyframes) if keyframes is not None else None, time.time()))
+            self._db.execute("DELETE FROM streams WHERE path = ?", (path,))
+            self._db.executemany("INSERT INTO streams VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (path, s.get("index"), s.get("codec_type"), s.get("codec_name"), s.get("width"), s.get("height"),
+                 s.get("channels"), _float_or_none(s.get("sample_rate")), s.get("tags", {}).get("language"))
+                for s in info.get("streams", [])])
+
+    def forget(self, paths: Iterable[str]):
+        with self._lock, self._db:
+            for p in paths:
+                self._db.execute("DELETE FROM files WHERE path = ?", (p,))
+                self._db.execute("DELETE FROM streams WHERE path = ?", (p,))
+
+    def scan(self, root: str, workers: Optional[int] = None, keyframes: bool = False,
+             on_file: Optional[Callable[[str, bool], None]] = None):
+        """
+        Walk root and (re)probe files whose size/mtime changed, `workers` ffprobes at a time.
+        Rows for files that disappeared under root are removed. Returns (probed, unchanged).
+        """
+        root = os.path.abspath(root)
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            known = {r[0]: r[1:] for r in self._db.execute(
+                "SELECT path, size, mtime, keyframes IS NOT NULL FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix))}
+        seen, stale = set(), []
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                if os.path.splitext(name)[1].lstrip(".").lower() not in MEDIA_EXTENSIONS:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                row = known.get(path)
+                if not (row and row[0] == st.st_size and row[1] == st.st_mtime and (row[2] or not keyframes)):
+                    stale.append(path)
+        self.forget(p for p in known if p not in seen)
+
+        def probe(path):
+            info = _ffprobe_media(path)
+            return path, info, (_ffprobe_keyframes(path) if keyframes and info else None)
+
+        with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+            for path, info, kf in pool.map(probe, stale):
+                if info:
+                    try:
+                        self.store(path, info, kf)
+                    except OSError:
+                        info = None
+                if on_file:
+                    on_file(path, bool(info))
+        return len(stale), len(seen) - len(stale)
+
+    def find(self, codec: Optional[str] = None, stream_type: Optional[str] = None,
+             min_duration: Optional[float] = None, max_duration: Optional[float] = None,
+             under: Optional[str] = None) -> List[str]:
+        """Paths matching all given conditions, e.g. find(codec="hevc", min_duration=3600)."""
+        sql = "SELECT DISTINCT f.path FROM files f LEFT JOIN streams s ON s.path = f.path WHERE 1"
+        args = []
+        if codec:
+            sql += " AND s.codec = ?"
+            args.append(codec)
+        if stream_type:
+            sql += " AND s.type = ?"
+            args.append(stream_type)
+        if min_duration is not None:
+            sql += " AND f.duration >= ?"
+            args.append(min_duration)
+        if max_duration is not None:
+            sql += " AND f.duration <= ?"
+            args.append(max_duration)
+        if under:
+            prefix = os.path.abspath(under).rstrip(os.sep) + os.sep
+            sql += " AND substr(f.path, 1, ?) = ?"
+            args += [len(prefix), prefix]
+        with self._lock:
+            return [r[0] for r in self._db.execute(sql + " ORDER BY f.path", args)]
+
+_media_index = None
+
+def use_media_index(db_path: Optional[str] = None) -> MediaIndex:
+    """Route probe_media/probe_keyframes/probe_duration through an index (default: app data folder)."""
+    global _media_index
+    _media_index = MediaIndex(db_path or os.path.join(app_data_dir("index"), "media.sqlite"))
+    return _media_index
@@ -0,0 +1,62 @@
+"""Per-job log files and the buffered log pump behind the GUI log view."""
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import deque
+
+from .common import LOG_KEEP_FILES, LOG_RING_LINES, prune_files
+from .engine import JobSpec
+
+class LogPump:
+    """
+    Thread-safe log sink. Reader threads write(); the UI drain()s in batches.
+    At most `capacity` undrained chunks are held (oldest dropped and counted), while
+    an optional spill file receives everything.
+    """
+
+    def __init__(self, capacity: int = LOG_RING_LINES):
+        self._lines = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._spill = None
+
+    def write(self, text: str):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(text)
+            if self._spill:
+                self._spill.write(text)
+
+    def drain(self):
+        """Returns (chunks, dropped) accumulated since the last drain."""
+        with self._lock:
+            lines, dropped = list(self._lines), self._dropped
+            self._lines.clear()
+            self._dropped = 0
+        return lines, dropped
+
+    def spill_to(self, path: str):
+        with self._lock:
+            if self._spill:
+                self._spill.close()
+            self._spill = open(path, "w", encoding="utf-8", errors="replace")
+
+    def close_spill(self):
+        with self._lock:
+            if self._spill:
+                self._spill.close()
+                self._spill = None
+
+def job_log_path(log_dir: str, job: JobSpec) -> str:
+    """Unique, readable log file name for a job: <time>_<output name>_<hash>.log"""
+    os.makedirs(log_dir, exist_ok=True)
+    name = os.path.basename(job.output.strip() or job.input.strip()) or "job"
+    name = re.sub(r"[^\w.-]+", "_", name)[:60]
+    tag = hashlib.sha1(f"{job.input}|{job.output}|{time.time()}".encode("utf-8")).hexdigest()[:8]
+    return os.path.join(log_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{tag}.log")
+
+def prune_logs(log_dir: str, keep: int = LOG_KEEP_FILES):
+    prune_files(log_dir, "*.log", keep)
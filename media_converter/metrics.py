@@ -0,0 +1,111 @@
+"""Per-job metrics written as JSON Lines or Prometheus text."""
+import os
+import re
+import glob
+import json
+import time
+import threading
+from typing import Optional
+
+from .caps import get_capabilities
+from .engine import JobResult, JobSpec, _mode_slug, sequence_files
+from .runner import ChildUsage
+
+def _input_bytes(job: JobSpec) -> int:
+    src = job.image_pattern.strip() if job.mode == "Images → Video" else job.input.strip()
+    try:
+        if os.path.isdir(src):
+            return sum(os.path.getsize(f) for f in sequence_files(src))
+        return os.path.getsize(src) if os.path.isfile(src) else 0
+    except OSError:
+        return 0
+
+def _output_bytes(output: str) -> int:
+    if "%0" in output:
+        return sum(os.path.getsize(f) for f in glob.glob(re.sub(r"%0\d+d", "*", output)))
+    return os.path.getsize(output) if os.path.exists(output) else 0
+
+def job_metrics(res: JobResult, usage: ChildUsage) -> dict:
+    """One finished job as a flat record (the JSON-lines schema of MetricsSink)."""
+    job, p = res.job, res.progress
+    media = (p.total if p.done and p.total else p.out_time) if p else 0.0
+    return {
+        "time": round(time.time(), 3),
+        "mode": _mode_slug(job.mode),
+        "input": job.input.strip() or job.image_pattern.strip(),
+        "output": job.output.strip(),
+        "ok": res.ok,
+        "exit_code": 0 if res.ok else usage.exit_code,
+        "error": res.error,
+        "wall_seconds": round(res.elapsed, 3),
+        "cpu_user_seconds": round(usage.cpu_user, 3),
+        "cpu_system_seconds": round(usage.cpu_system, 3),
+        "peak_rss_bytes": usage.peak_rss,
+        "processes": usage.processes,
+        "media_seconds": round(media, 3),
+        "fps": round(p.frame / res.elapsed, 2) if p and p.frame and res.elapsed else None,
+        "speed": round(media / res.elapsed, 3) if media and res.elapsed else None,
+        "input_bytes": _input_bytes(job),
+        "output_bytes": _output_bytes(job.output.strip()) if res.ok else 0,
+        "ffmpeg": get_capabilities().version,
+    }
+
+_PROM_METRICS = [  # (name, type, help, record field)
+    ("umc_jobs_total", "counter", "Finished conversion jobs.", None),
+    ("umc_job_wall_seconds_total", "counter", "Wall-clock time spent in jobs.", "wall_seconds"),
+    ("umc_job_cpu_seconds_total", "counter", "CPU time (user + system) of the jobs' ffmpeg processes.", "cpu_seconds"),
+    ("umc_job_media_seconds_total", "counter", "Media duration converted.", "media_seconds"),
+    ("umc_job_input_bytes_total", "counter", "Bytes read by jobs.", "input_bytes"),
+    ("umc_job_output_bytes_total", "counter", "Bytes written by successful jobs.", "output_bytes"),
+    ("umc_job_peak_rss_bytes", "gauge", "Largest ffmpeg resident set size seen.", "peak_rss_bytes"),
+]
+
+class MetricsSink:
+    """
+    Appends one JSON line per finished job and, optionally, rewrites a Prometheus textfile
+    (node_exporter textfile collector format) with totals per mode since this process started.
+    Speed and CPU per media second are ratios of those counters, e.g. in PromQL
+    rate(umc_job_media_seconds_total[1h]) / rate(umc_job_wall_seconds_total[1h]).
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None, prom_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self._totals = {}  # (metric, mode, status) -> value
+        self._last = 0.0
+        self._lock = threading.Lock()
+        for path in (jsonl_path, prom_path):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, m: dict):
+        with self._lock:
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(m) + "\n")
+            if self.prom_path:
+                m = dict(m, cpu_seconds=m["cpu_user_seconds"] + m["cpu_system_seconds"])
+                status = "ok" if m["ok"] else "failed"
+                for name, kind, _, key in _PROM_METRICS:
+                    k = (name, m["mode"], status if key is None else "")
+                    value = 1 if key is None else (m[key] or 0)
+                    self._totals[k] = max(self._totals.get(k, 0), value) if kind == "gauge" else self._totals.get(k, 0) + value
+                self._last = m["time"]
+                self._write_prom(m["ffmpeg"])
+
+    def _write_prom(self, ffmpeg_version: str):
+        lines = []
+        for name, kind, text, key in _PROM_METRICS:
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            for (metric, mode, status), value in sorted(self._totals.items()):
+                if metric == name:
+                    labels = f'mode="{mode}"' + (f',status="{status}"' if status else "")
+                    lines.append(f"{name}{{{labels}}} {value:.15g}")
+        lines += ["# HELP umc_last_job_timestamp_seconds When the last job finished.",
+                  "# TYPE umc_last_job_timestamp_seconds gauge", f"umc_last_job_timestamp_seconds {self._last:.3f}",
+                  "# HELP umc_ffmpeg_info ffmpeg build used by the converter.", "# TYPE umc_ffmpeg_info gauge",
+                  'umc_ffmpeg_info{version="%s"} 1' % ffmpeg_version.replace("\\", "\\\\").replace('"', '\\"')]
+        tmp = self.prom_path + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prom_path)  # the collector must never read a half-written file
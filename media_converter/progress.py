@@ -0,0 +1,110 @@
+"""Parsing of `ffmpeg -progress` output into percent / speed / ETA snapshots."""
+import re
+import time
+from dataclasses import dataclass, fields
+from typing import Optional
+
+@dataclass
+class Progress:
+    """One snapshot of ffmpeg's -progress output, with percent/ETA when the total duration is known."""
+    out_time: float = 0.0           # seconds of output written so far
+    total: Optional[float] = None   # expected output duration in seconds
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0              # multiple of realtime
+    bitrate: str = ""
+    elapsed: float = 0.0            # wall-clock seconds since this command started
+    step: int = 1                   # which command of the plan is running
+    steps: int = 1
+    done: bool = False
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.total:
+            return None
+        if self.done:
+            return 100.0
+        return max(0.0, min(100.0, 100.0 * self.out_time / self.total))
+
+    @property
+    def eta(self) -> Optional[float]:
+        if not self.total or self.out_time <= 0:
+            return None
+        remaining = max(0.0, self.total - self.out_time)
+        return remaining * self.elapsed / self.out_time
+
+    def summary(self) -> str:
+        parts = []
+        if self.steps > 1:
+            parts.append(f"step {self.step}/{self.steps}")
+        pct = self.percent
+        parts.append(f"{pct:.1f}%" if pct is not None else format_seconds(self.out_time))
+        if self.speed:
+            parts.append(f"{self.speed:.2f}x")
+        if self.fps:
+            parts.append(f"{self.fps:.0f} fps")
+        if self.bitrate:
+            parts.append(self.bitrate)
+        eta = self.eta
+        if eta is not None and not self.done:
+            parts.append(f"ETA {format_seconds(eta)}")
+        return " • ".join(parts)
+
+def format_seconds(sec: float) -> str:
+    sec = int(round(sec))
+    return f"{sec // 3600}:{sec % 3600 // 60:02d}:{sec % 60:02d}"
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """Parse ffmpeg time syntax ('90', '1:30', '00:01:30.5', '1500ms') into seconds."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        for suffix, scale in (("ms", 1e-3), ("us", 1e-6), ("s", 1.0)):
+            if value.endswith(suffix):
+                return float(value[:-len(suffix)]) * scale
+        sign = -1.0 if value.startswith("-") else 1.0
+        total = 0.0
+        for part in value.lstrip("+-").split(":"):
+            total = total * 60 + float(part)
+        return sign * total
+    except ValueError:
+        return None
+
+_PROGRESS_LINE = re.compile(r"^(frame|fps|stream_\d+_\d+_q|bitrate|total_size|out_time_us|out_time_ms|out_time|"
+                            r"dup_frames|drop_frames|speed|progress)=(.*)$")
+
+class ProgressTracker:
+    """Folds the key=value lines of `ffmpeg -progress` into Progress snapshots (one per block)."""
+
+    def __init__(self, total: Optional[float] = None, step: int = 1, steps: int = 1):
+        self.t0 = time.monotonic()
+        self.latest = Progress(total=total, step=step, steps=steps)
+
+    def feed(self, line: str):
+        """Returns (consumed, snapshot). snapshot is set when a block ends with 'progress=...'."""
+        m = _PROGRESS_LINE.match(line.strip())
+        if not m:
+            return False, None
+        key, value = m.group(1), m.group(2).strip()
+        p = self.latest
+        try:
+            if key == "frame":
+                p.frame = int(value)
+            elif key == "fps":
+                p.fps = float(value)
+            elif key == "bitrate":
+                p.bitrate = "" if value == "N/A" else value
+            elif key in ("out_time_us", "out_time_ms"):
+                # out_time_ms is microseconds too (long-standing ffmpeg quirk)
+                p.out_time = max(p.out_time, int(value) / 1e6)
+            elif key == "speed":
+                p.speed = float(value.rstrip("x"))
+            elif key == "progress":
+                p.elapsed = time.monotonic() - self.t0
+                p.done = value == "end"
+                snapshot = Progress(**{f.name: getattr(p, f.name) for f in fields(Progress)})
+                return True, snapshot
+        except ValueError:
+            pass  # N/A values early in the encode
+        return True, None
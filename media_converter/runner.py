@@ -0,0 +1,231 @@
+"""Running command plans: ffmpeg child processes, progress reporting, retries and cleanup."""
+import os
+import sys
+import json
+import time
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional
+
+from .common import FFMPEG, prune_files
+from .caps import check_plan
+from .progress import Progress, ProgressTracker
+from .index import probe_media
+from .engine import (
+    LOUDNORM_CACHE_KEEP, CommandPlan, JobSpec, _common_inputs, _flag, _loudness_cache_path, cached_loudness,
+    job_duration, loudnorm_target, plan_job
+)
+from .governor import ProcessLimits
+from .streamcopy import plan_stream_copy
+
+def _no_log(text: str):
+    pass
+
+@dataclass
+class ChildUsage:
+    """CPU time and peak memory of the ffmpeg processes one job ran (from os.wait4, where available)."""
+    processes: int = 0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    peak_rss: int = 0                # bytes, largest single process
+    exit_code: Optional[int] = None  # last non-zero ffmpeg exit code
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, ru, exit_code: int):
+        with self._lock:
+            self.processes += 1
+            self.cpu_user += ru.ru_utime
+            self.cpu_system += ru.ru_stime
+            self.peak_rss = max(self.peak_rss, ru.ru_maxrss * (1 if sys.platform == "darwin" else 1024))  # KiB elsewhere
+            if exit_code:
+                self.exit_code = exit_code
+
+def _wait_child(proc: subprocess.Popen, usage: Optional[ChildUsage] = None) -> int:
+    """proc.wait(), adding the child's rusage to usage when given (per process, unlike RUSAGE_CHILDREN)."""
+    if usage is None or not hasattr(os, "wait4"):
+        return proc.wait()
+    _, status, ru = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    usage.add(ru, proc.returncode)
+    return proc.returncode
+
+def run_ffmpeg(cmd, log: Callable[[str], None] = _no_log, allow_fail=False,
+               on_progress: Optional[Callable[[Progress], None]] = None,
+               total: Optional[float] = None, step=1, steps=1, limits: Optional[ProcessLimits] = None,
+               usage: Optional[ChildUsage] = None):
+    """Run one ffmpeg command. limits only sets priority/affinity; thread caps are already in cmd."""
+    if on_progress:
+        cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + cmd[1:]
+        tracker = ProgressTracker(total, step, steps)
+    log("\n$ " + " ".join(cmd) + "\n")
+    try:
+        proc = (limits.popen if limits else subprocess.Popen)(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                              universal_newlines=True)
+        for line in proc.stdout:
+            if on_progress:
+                consumed, snapshot = tracker.feed(line)
+                if snapshot:
+                    on_progress(snapshot)
+                if consumed:
+                    continue
+            log(line)
+        rc = _wait_child(proc, usage)
+        if rc != 0 and not allow_fail:
+            raise RuntimeError(f"ffmpeg exited with code {rc}")
+    except Exception as e:
+        if allow_fail:
+            log(f"(non-fatal) {e}\n")
+        else:
+            raise
+
+def run_plan(plan: CommandPlan, log: Callable[[str], None] = _no_log,
+             on_progress: Optional[Callable[[Progress], None]] = None, total: Optional[float] = None):
+    """Run every command in order; only the last one is fatal (earlier ones are prep passes) unless plan.fatal."""
+    steps = len(plan.commands)
+    try:
+        for d in plan.out_dirs:
+            os.makedirs(d, exist_ok=True)
+        if plan.parallel > 1 and steps > 2:
+            _run_parallel(plan.commands[:-1], plan.parallel, log, on_progress, plan.limits, plan.usage, plan.fatal)
+            run_ffmpeg(plan.commands[-1], log, on_progress=on_progress, total=total, step=steps, steps=steps,
+                       limits=plan.limits, usage=plan.usage)
+        else:
+            for i, cmd in enumerate(plan.commands):
+                run_ffmpeg(cmd, log, allow_fail=(i < steps - 1 and not plan.fatal), on_progress=on_progress,
+                           total=total, step=i + 1, steps=steps, limits=plan.limits, usage=plan.usage)
+        for hook in plan.on_success:
+            hook()
+    finally:
+        plan.cleanup()
+
+def _run_parallel(cmds: List[List[str]], workers: int, log: Callable[[str], None],
+                  on_progress: Optional[Callable[[Progress], None]], limits: Optional[ProcessLimits] = None,
+                  usage: Optional[ChildUsage] = None, fatal: bool = False):
+    """
+    Run independent passes concurrently; progress counts finished commands. With fatal, the first
+    failure cancels the passes not yet started and is raised once the running ones finish.
+    """
+    t0 = time.monotonic()
+    done = [0]
+    lock = threading.Lock()
+
+    def one(cmd):
+        run_ffmpeg(cmd, log, allow_fail=not fatal, limits=limits, usage=usage)
+        with lock:
+            done[0] += 1
+            if on_progress:
+                on_progress(Progress(out_time=done[0], total=len(cmds) + 1, elapsed=time.monotonic() - t0))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(one, cmd) for cmd in cmds]
+        try:
+            for f in futures:
+                f.result()
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+
+def measure_loudness(job: JobSpec, log: Callable[[str], None] = _no_log,
+                     usage: Optional[ChildUsage] = None) -> dict:
+    """
+    loudnorm analysis pass (input_i, input_tp, input_lra, input_thresh, and target_offset for the
+    [I, TP, LRA] stored as "target"), cached per input.
+    """
+    if job.loudnorm_measured.strip():
+        return json.loads(job.loudnorm_measured)
+    measured = cached_loudness(job)
+    if measured is not None:
+        log("Loudness: reusing the cached measurement of this input.\n")
+        return measured
+    i, tp, lra = loudnorm_target(job.loudnorm)
+    lines = []
+
+    def capture(text: str):
+        lines.append(text)
+        log(text)
+
+    log("Loudness: measuring (analysis pass)…\n")
+    cmd = [FFMPEG, "-hide_banner", "-nostats"] + _common_inputs(job) + ["-i", job.input.strip(), "-vn", "-sn",
+           "-map", "0:a:0", "-af", f"loudnorm=I={i:g}:TP={tp:g}:LRA={lra:g}:print_format=json", "-f", "null", "-"]
+    limits = ProcessLimits.from_job(job)
+    run_ffmpeg(limits.command(cmd) if limits else cmd, capture, limits=limits, usage=usage)
+    text = "".join(lines)
+    start = text.rfind("{")
+    try:
+        measured = json.loads(text[start:text.index("}", start) + 1])
+        measured = {k: measured[k] for k in ("input_i", "input_tp", "input_lra", "input_thresh", "target_offset")}
+        measured["target"] = [i, tp, lra]
+    except (ValueError, KeyError):
+        raise RuntimeError("Could not read the loudnorm measurement from ffmpeg's output")
+    path = _loudness_cache_path(job)
+    if path:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(measured, f)
+        os.replace(path + ".tmp", path)
+        prune_files(os.path.dirname(path), "*.json", LOUDNORM_CACHE_KEEP)
+    return measured
+
+def prepare_job(job: JobSpec, log: Callable[[str], None] = _no_log) -> JobSpec:
+    """Apply probe-driven decisions (stream copy) to a job before it is planned."""
+    if _flag(job.auto_copy) and job.mode in ("Video → Video", "Video → Audio", "Audio → Audio") \
+            and not job.renditions.strip():
+        info = probe_media(job.input.strip())
+        if info:
+            job, report = plan_stream_copy(job, info)
+            for line in report:
+                log(f"Plan: {line}\n")
+    return job
+
+def run_job(job: JobSpec, log: Callable[[str], None] = _no_log,
+            on_progress: Optional[Callable[[Progress], None]] = None, usage: Optional[ChildUsage] = None):
+    if job.input and os.path.normcase(os.path.abspath(job.input)) == os.path.normcase(os.path.abspath(job.output)):
+        raise RuntimeError("Output file is the same as the input file.")
+    # The specialised runners and the cache build on this module, so they are looked up here.
+    from .cache import _cacheable, output_cache
+    from .chunked import _wants_segmented, run_segmented_video
+    from .frames import _wants_raw, run_raw_frames
+    from .timelapse import _wants_append, run_timelapse_append
+    out_dir = os.path.dirname(job.output.strip())
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    # The cache key is taken before probing: prepare_job's decisions follow from the same inputs.
+    cache = output_cache() if _cacheable(job) else None
+    key = None
+    if cache:
+        key = cache.key_for(job)
+        if key and cache.fetch(key, job.output.strip()):
+            log(f"Cache hit: {job.output.strip()} reused from an earlier identical conversion.\n")
+            if on_progress:
+                on_progress(Progress(total=1.0, out_time=1.0, done=True))
+            return
+
+    job = prepare_job(job, log)
+    if job.loudnorm.strip() and job.mode in ("Video → Audio", "Audio → Audio"):
+        job = replace(job, loudnorm_measured=json.dumps(measure_loudness(job, log, usage)))
+    plan = plan_job(job)
+    missing = check_plan(plan)
+    if missing:
+        plan.cleanup()
+        raise RuntimeError("This ffmpeg build is missing " + ", ".join(missing))
+    # A previous cache hit may have hardlinked this output; never truncate the shared file.
+    if os.path.isfile(job.output.strip()) and os.stat(job.output.strip()).st_nlink > 1:
+        os.remove(job.output.strip())
+
+    if _wants_segmented(job):
+        plan.cleanup()
+        run_segmented_video(job, log, on_progress, usage)
+    elif _wants_raw(job):
+        run_raw_frames(job, log, on_progress, usage)
+    elif _wants_append(job):
+        plan.cleanup()
+        run_timelapse_append(job, log, on_progress, usage)
+    else:
+        total = job_duration(job) if on_progress else None
+        plan.usage = usage
+        run_plan(plan, log, on_progress, total)
+    if key:
+        cache.store(key, job.output.strip())
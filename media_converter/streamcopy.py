@@ -0,0 +1,112 @@
+"""Deciding per stream whether a Video → Video job can copy instead of re-encode."""
+from dataclasses import replace
+
+from .common import AUDIO_CODECS, VIDEO_CODECS
+from .progress import parse_timestamp
+from .index import _first_stream, probe_keyframes
+from .engine import JobSpec, _flag, _video_filters
+
+# ffprobe codec_name of what each GUI codec choice produces
+VIDEO_CHOICE_CODECS = {"h264": "h264", "hevc (h265)": "hevc", "vp9": "vp9", "av1": "av1"}
+AUDIO_CHOICE_CODECS = {"aac": "aac", "mp3": "mp3", "opus": "opus", "vorbis": "vorbis",
+                       "flac": "flac", "pcm_s16le": "pcm_s16le"}
+
+# Codecs each output container can carry as-is: (video, audio). None means anything goes.
+CONTAINER_CODECS = {
+    "mp4": ({"h264", "hevc", "av1", "vp9", "mpeg4", "mpeg2video"}, {"aac", "mp3", "alac", "opus", "flac", "ac3", "eac3"}),
+    "m4v": ({"h264", "hevc", "av1", "mpeg4"}, {"aac", "alac", "ac3", "eac3"}),
+    "mov": ({"h264", "hevc", "prores", "mpeg4", "mjpeg", "av1"}, {"aac", "mp3", "alac", "ac3", "pcm_s16le", "pcm_s24le"}),
+    "mkv": (None, None),
+    "webm": ({"vp8", "vp9", "av1"}, {"opus", "vorbis"}),
+    "avi": ({"h264", "mpeg4", "mjpeg", "msmpeg4v3", "mpeg2video"}, {"mp3", "ac3", "aac", "pcm_s16le"}),
+    "ts": ({"h264", "hevc", "mpeg2video", "mpeg1video"}, {"aac", "mp3", "mp2", "ac3", "eac3"}),
+    "flv": ({"h264", "flv1"}, {"aac", "mp3"}),
+    "3gp": ({"h264", "h263", "mpeg4"}, {"aac", "amr_nb", "amr_wb"}),
+    "mpg": ({"mpeg1video", "mpeg2video"}, {"mp2", "mp3", "ac3"}),
+    "mp3": (set(), {"mp3"}),
+    "aac": (set(), {"aac"}),
+    "m4a": (set(), {"aac", "alac"}),
+    "wav": (set(), {"pcm_s16le", "pcm_s24le", "pcm_s32le", "pcm_f32le", "pcm_u8"}),
+    "flac": (set(), {"flac"}),
+    "ogg": (set(), {"vorbis", "opus", "flac"}),
+    "opus": (set(), {"opus"}),
+    "wma": (set(), {"wmav1", "wmav2"}),
+    "aiff": (set(), {"pcm_s16be", "pcm_s24be"}),
+    "amr": (set(), {"amr_nb", "amr_wb"}),
+}
+# GUI codec choice to fall back to when "copy" can't go into the container
+CONTAINER_DEFAULT_CODECS = {
+    "webm": ("vp9", "opus"), "mp3": (None, "mp3"), "aac": (None, "aac"), "m4a": (None, "aac"),
+    "wav": (None, "pcm_s16le"), "flac": (None, "flac"), "ogg": (None, "vorbis"), "opus": (None, "opus"),
+}
+
+def _fits(fmt: str, kind: int, codec: str) -> bool:
+    allowed = CONTAINER_CODECS.get(fmt, (None, None))[kind]
+    return allowed is None or codec in allowed
+
+def plan_stream_copy(job: JobSpec, info: dict):
+    """
+    Decide per stream whether to copy or transcode, from ffprobe info. A stream is copied when
+    it is already in the requested codec, fits the target container, no filter or non-keyframe
+    trim needs decoded frames, and no explicit crf/bitrate asks for a particular quality. "copy" requests the container can't take are
+    switched to the container's default codec. Returns (adjusted job, report lines).
+    """
+    fmt = job.out_format.lower()
+    updates = {}
+    report = []
+    kinds = (("video", 0, "video_codec", VIDEO_CHOICE_CODECS), ("audio", 1, "audio_codec", AUDIO_CHOICE_CODECS))
+    for kind, idx, attr, choices in kinds:
+        if kind == "video" and job.mode != "Video → Video":
+            continue
+        stream = _first_stream(info, kind)
+        if stream is None:
+            continue
+        src = stream.get("codec_name", "?")
+        choice = getattr(job, attr)
+        label = f"{kind} #{stream.get('index')} {src}"
+        if kind == "video" and stream.get("width"):
+            label += f" {stream['width']}x{stream['height']}"
+        fits = _fits(fmt, idx, src)
+
+        if choice.startswith("copy"):
+            default = CONTAINER_DEFAULT_CODECS.get(fmt, ("h264", "aac"))[idx]
+            if kind == "audio" and not fits and not (default and _fits(fmt, idx, AUDIO_CHOICE_CODECS[default])):
+                # No GUI choice fits (aiff, amr, wma, mpg, …): let the container pick its encoder.
+                updates[attr] = "auto"
+                report.append(f"{label}: transcode with the .{fmt} default encoder ({src} can't go into .{fmt})")
+            elif not fits and default:
+                updates[attr] = default
+                report.append(f"{label}: transcode to {default} ({src} can't go into .{fmt})")
+            else:
+                report.append(f"{label}: copy (requested)")
+            continue
+        if choices.get(choice) != src:
+            report.append(f"{label}: transcode to {choice} (source is {src})")
+            continue
+        if not fits:
+            blocker = f"{src} can't go into .{fmt}"
+        elif kind == "video" and (job.crf.strip() or job.bitrate.strip()):
+            blocker = "crf/bitrate set"
+        elif kind == "audio" and job.audio_bitrate.strip():
+            blocker = "audio bitrate set"
+        elif kind == "video" and _video_filters(job):
+            blocker = "scale/fps filters need re-encoding"
+        elif kind == "video" and job.target_size.strip():
+            blocker = "target size needs re-encoding"
+        elif kind == "video" and (_flag(job.chunked) or _flag(job.resumable)):
+            blocker = "chunked/resumable encode requested"
+        elif kind == "video" and not _starts_on_keyframe(job, info):
+            blocker = "start time is not on a keyframe"
+        else:
+            updates[attr] = VIDEO_CODECS[0] if kind == "video" else AUDIO_CODECS[0]
+            report.append(f"{label}: copy (already {src}, fits .{fmt})")
+            continue
+        report.append(f"{label}: transcode to {choice} ({blocker})")
+    return replace(job, **updates), report
+
+def _starts_on_keyframe(job: JobSpec, info: dict) -> bool:
+    start = parse_timestamp(job.start_time) or 0.0
+    if start <= 0:
+        return True
+    offset = float(info.get("format", {}).get("start_time") or 0.0)
+    return any(abs(k - offset - start) < 0.001 for k in probe_keyframes(job.input.strip()))
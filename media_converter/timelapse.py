@@ -0,0 +1,106 @@
+"""Appending new images to an existing timelapse without re-encoding it."""
+import os
+import json
+import hashlib
+from typing import Callable, List, Optional
+
+from .common import CONTAINER_MUXERS, FFMPEG
+from .caps import get_capabilities
+from .progress import Progress, parse_timestamp
+from .index import probe_media
+from .engine import JobSpec, _flag, _images_plan, sequence_files
+from .governor import ProcessLimits
+from .runner import ChildUsage, _no_log, run_ffmpeg
+from .chunked import _concat_list
+
+def _wants_append(job: JobSpec) -> bool:
+    return job.mode == "Images → Video" and _flag(job.append) and os.path.isdir(job.image_pattern.strip() or job.input.strip())
+
+def _append_signature(job: JobSpec) -> str:
+    """Everything that must match for a new piece to be stream-copied onto the existing output."""
+    settings = [job.images_fps.strip() or "24", job.scale.strip(), job.fps.strip(), job.crf.strip(),
+                job.bitrate.strip(), job.out_format.lower(), get_capabilities().version]
+    return hashlib.sha1(json.dumps(settings).encode("utf-8")).hexdigest()
+
+def _frames_digest(files: List[str]) -> str:
+    return hashlib.sha1("\n".join(os.path.basename(f) for f in files).encode("utf-8")).hexdigest()
+
+def _video_geometry(path: str):
+    for s in probe_media(path).get("streams", []):
+        if s.get("codec_type") == "video":
+            return s.get("codec_name"), s.get("width"), s.get("height"), s.get("pix_fmt")
+    return None
+
+def run_timelapse_append(job: JobSpec, log: Callable[[str], None] = _no_log,
+                         on_progress: Optional[Callable[[Progress], None]] = None, usage: Optional[ChildUsage] = None):
+    """
+    Images → Video from a folder that keeps growing. A manifest beside the output (<output>.frames.json)
+    records how many frames (in natural order) are already in it; a rerun encodes only the frames
+    after those with the same codec settings and joins the new piece onto the output with a
+    concat stream copy. The folder is re-encoded from scratch when the settings, the ffmpeg build,
+    the already-encoded frames or the output itself changed.
+    """
+    src = job.image_pattern.strip() or job.input.strip()
+    out = job.output.strip()
+    fps = job.images_fps.strip() or "24"
+    manifest_path = out + ".frames.json"
+    files = sequence_files(src)
+    if not files:
+        raise RuntimeError("No images found in selected folder.")
+    signature = _append_signature(job)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        st = os.stat(out)
+        done = int(state["frames"])
+        valid = (state.get("signature") == signature and st.st_size == state.get("size")
+                 and st.st_mtime_ns == state.get("mtime_ns") and len(files) >= done
+                 and _frames_digest(files[:done]) == state.get("digest"))
+    except (OSError, ValueError, KeyError, TypeError):
+        state, valid = {}, False
+    step = 1.0 / (parse_timestamp(fps) or 24.0)
+    new = files[done:] if valid else files
+    if valid and not new:
+        log(f"No new frames since the last run ({done} already in {os.path.basename(out)}).\n")
+        if on_progress:
+            on_progress(Progress(total=1.0, out_time=1.0, done=True))
+        return
+
+    ext = os.path.splitext(out)[1]
+    piece = f"{out}.new{ext}" if valid else out
+    plan = _images_plan(job, new, piece)
+    plan.limits = ProcessLimits.from_job(job)
+    if plan.limits:
+        plan.commands = [plan.limits.command(c) for c in plan.commands]
+    if valid:
+        log(f"Appending {len(new)} new frame(s) to {len(files) - len(new)} already encoded.\n")
+        joined = f"{out}.joined{ext}"
+        plan.temp_files += [piece, joined, out + ".concat.txt"]
+    else:
+        if state:
+            log("Settings, frames or output changed since the last run; encoding the whole folder again.\n")
+        else:
+            log(f"Encoding {len(new)} frame(s); later runs append only new frames.\n")
+    try:
+        # Fatal at every step: a broken piece must never be appended.
+        for cmd in plan.commands:
+            run_ffmpeg(cmd, log, on_progress=on_progress, total=len(new) * step, limits=plan.limits, usage=usage)
+        if valid:
+            if _video_geometry(piece) != tuple(state.get("geometry") or ()):
+                raise RuntimeError("New frames encode to a different size/format than the existing video; "
+                                   "turn off append (or set a scale) to rebuild it.")
+            _concat_list([out, piece], out + ".concat.txt")
+            fmt = job.out_format.lower()
+            run_ffmpeg([FFMPEG, "-y", "-f", "concat", "-safe", "0", "-i", out + ".concat.txt", "-c", "copy",
+                        "-f", CONTAINER_MUXERS.get(fmt, fmt), joined], log, limits=plan.limits, usage=usage)
+            os.replace(joined, out)
+    finally:
+        plan.cleanup()
+    st = os.stat(out)
+    geometry = _video_geometry(out)
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"signature": signature, "frames": len(files), "digest": _frames_digest(files),
+                   "last": os.path.basename(files[-1]), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                   "geometry": list(geometry) if geometry else None}, f)
+    os.replace(tmp, manifest_path)
@@ -0,0 +1,359 @@
+"""Hot folders: files dropped into watched folders are queued durably and converted."""
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Callable, List, Optional
+
+from .common import AUDIO_FORMATS, MODES, SUB_FORMATS, default_workers
+from .index import MEDIA_EXTENSIONS
+from .engine import JobSpec, resolve_mode
+from .governor import ResourceGovernor
+from .runner import _no_log
+from .metrics import MetricsSink
+from .batch import _run_batch_job
+
+WATCH_SETTLE_SECONDS = 5   # a file must keep the same size/mtime this long before it is queued
+WATCH_POLL_SECONDS = 5     # rescan interval without inotify
+WATCH_RESCAN_SECONDS = 60  # safety-net rescan interval with inotify
+WATCH_SKIP_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download", ".filepart")
+
+@dataclass
+class WatchFolder:
+    """A hot folder: new files in `path` are converted with `preset` into `output_dir`."""
+    path: str
+    output_dir: str
+    preset: dict
+    extensions: List[str]
+
+    def accepts(self, name: str) -> bool:
+        if name.startswith(".") or name.lower().endswith(WATCH_SKIP_SUFFIXES):
+            return False
+        return os.path.splitext(name)[1].lstrip(".").lower() in self.extensions
+
+    def job_for(self, src: str) -> JobSpec:
+        job = JobSpec.from_dict({**self.preset, "input": src, "output": ""})
+        base = os.path.splitext(os.path.basename(src))[0]
+        if job.mode == "Video → Images" and job.out_format != "npy":
+            name = base + "_frame_%04d." + job.out_format
+        elif job.mode == "Video → Thumbnails":
+            name = base + "_thumb_%04d." + job.out_format
+        else:
+            name = base + "." + job.out_format
+        job.output = os.path.join(self.output_dir, name)
+        return job
+
+def _watch_extensions(mode: str) -> List[str]:
+    if mode == "Audio → Audio":
+        return list(AUDIO_FORMATS)
+    if mode == "Subtitles: Convert":
+        return list(SUB_FORMATS)
+    return sorted(MEDIA_EXTENSIONS - set(AUDIO_FORMATS) - {"wma"})
+
+def load_watch_config(path: str):
+    """
+    Read a watch config:
+      {"max_in_flight": 2, "max_queued_gb": 50, "settle_seconds": 5,
+       "folders": [{"path": "in/gif", "output_dir": "out/gif", "preset": {"mode": "video-to-gif", "fps": "12"}}]}
+    output_dir defaults to <path>/converted; "extensions" overrides the accepted file types.
+    Returns (folders, options).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    folders = []
+    for i, entry in enumerate(data.get("folders", []), start=1):
+        try:
+            folder = os.path.abspath(os.path.join(base, entry["path"]))
+            preset = dict(entry.get("preset", {}))
+            mode = resolve_mode(preset.get("mode", MODES[0]))
+            if mode == "Images → Video":
+                raise RuntimeError("Images → Video takes whole folders and cannot be watched per file")
+            JobSpec.from_dict({**preset, "input": os.path.join(folder, "probe.tmp")})  # validate field names
+            exts = [e.lower().lstrip(".") for e in entry.get("extensions", [])] or _watch_extensions(mode)
+            out = os.path.abspath(os.path.join(base, entry.get("output_dir") or os.path.join(entry["path"], "converted")))
+            if os.path.normcase(out) == os.path.normcase(folder):
+                raise RuntimeError("output_dir must differ from the watched folder")
+            folders.append(WatchFolder(folder, out, preset, exts))
+        except (KeyError, RuntimeError) as e:
+            raise RuntimeError(f"{path}: folder {i}: {e}")
+    if not folders:
+        raise RuntimeError(f"{path}: no folders configured")
+    return folders, {k: data[k] for k in ("max_in_flight", "max_queued_gb", "settle_seconds") if k in data}
+
+class WatchQueue:
+    """
+    Durable job queue in SQLite. A file (path + size + mtime) is queued at most once, so
+    restarts don't redo finished work; jobs left 'running' by a crash are requeued by recover().
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT, size INTEGER, mtime REAL,
+                job TEXT, state TEXT, attempts INTEGER DEFAULT 0, error TEXT,
+                queued_at REAL, finished_at REAL, UNIQUE (path, size, mtime));
+            CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+        """)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def recover(self, retry_failed: bool = False) -> int:
+        """Requeue jobs interrupted by a crash (and failed ones if asked). Returns how many."""
+        states = ("running", "failed") if retry_failed else ("running",)
+        with self._lock, self._db:
+            return self._db.execute(
+                f"UPDATE jobs SET state = 'queued', error = NULL WHERE state IN ({','.join('?' * len(states))})",
+                states).rowcount
+
+    def known(self, path: str, size: int, mtime: float) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM jobs WHERE path = ? AND size = ? AND mtime = ?",
+                                    (path, size, mtime)).fetchone() is not None
+
+    def enqueue(self, path: str, size: int, mtime: float, job: JobSpec) -> bool:
+        data = json.dumps({f.name: getattr(job, f.name) for f in fields(job)})
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO jobs (path, size, mtime, job, state, queued_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (path, size, mtime, data, time.time()))
+            return cur.rowcount == 1
+
+    def claim(self):
+        """Oldest queued job as (id, JobSpec), marked running; None if the queue is empty."""
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id, job FROM jobs WHERE state = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if not row:
+                return None
+            self._db.execute("UPDATE jobs SET state = 'running', attempts = attempts + 1 WHERE id = ?", (row[0],))
+        return row[0], JobSpec(**json.loads(row[1]))
+
+    def finish(self, job_id: int, ok: bool, error: str = ""):
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE id = ?",
+                             ("done" if ok else "failed", error or None, time.time(), job_id))
+
+    def requeue(self, job_id: int):
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET state = 'queued' WHERE id = ?", (job_id,))
+
+    def queued_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+class _Inotify:
+    """Minimal inotify binding (Linux) reporting file names closed-after-write or moved into watched dirs."""
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+
+    def __init__(self, folders: List[str]):
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        for folder in folders:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+            self._dirs[wd] = folder
+
+    def read(self, timeout: float) -> List[str]:
+        import select, struct
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        paths, pos = [], 0
+        while pos + 16 <= len(data):
+            wd, _, _, size = struct.unpack_from("iIII", data, pos)
+            name = data[pos + 16:pos + 16 + size].rstrip(b"\0")
+            pos += 16 + size
+            if wd in self._dirs and name:
+                paths.append(os.path.join(self._dirs[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+class FolderWatcher:
+    """
+    Finds files in hot folders that have finished being written. Discovery uses inotify
+    when available (else periodic rescans); a file is ready once its size and mtime have
+    not changed for `settle` seconds.
+    """
+
+    def __init__(self, folders: List[WatchFolder], settle: float = WATCH_SETTLE_SECONDS, poll: bool = False):
+        self.folders = folders
+        self.settle = settle
+        self._pending = {}  # path -> (folder, size, mtime, stable since)
+        self._notify = None
+        for f in folders:
+            os.makedirs(f.path, exist_ok=True)
+        if not poll and sys.platform.startswith("linux"):
+            try:
+                self._notify = _Inotify([f.path for f in folders])
+            except (OSError, AttributeError):
+                self._notify = None
+        self._next_scan = 0.0
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._notify else "polling"
+
+    def _folder_for(self, path: str) -> Optional[WatchFolder]:
+        parent = os.path.dirname(path)
+        for f in self.folders:
+            if f.path == parent and f.accepts(os.path.basename(path)):
+                return f
+        return None
+
+    def _track(self, path: str, now: float):
+        folder = self._folder_for(path)
+        if folder and path not in self._pending:
+            self._pending[path] = (folder, -1, -1.0, now)
+
+    def _scan(self, now: float):
+        for f in self.folders:
+            try:
+                entries = list(os.scandir(f.path))
+            except OSError:
+                continue
+            for e in entries:
+                if e.is_file():
+                    self._track(e.path, now)
+
+    def wait(self, timeout: float):
+        """Block up to timeout for file activity, then return [(folder, path, size, mtime)] that have settled."""
+        now = time.monotonic()
+        if now >= self._next_scan:
+            self._scan(now)
+            self._next_scan = now + (WATCH_RESCAN_SECONDS if self._notify else WATCH_POLL_SECONDS)
+        if self._notify:
+            for path in self._notify.read(timeout):
+                self._track(path, time.monotonic())
+        else:
+            time.sleep(timeout)
+        now = time.monotonic()
+        ready = []
+        for path, (folder, size, mtime, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if (st.st_size, st.st_mtime) != (size, mtime):
+                self._pending[path] = (folder, st.st_size, st.st_mtime, now)
+            elif now - since >= self.settle:
+                ready.append((folder, path, size, mtime))
+        return ready
+
+    def release(self, path: str):
+        """Stop tracking a path (it was queued or is already known)."""
+        self._pending.pop(path, None)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def close(self):
+        if self._notify:
+            self._notify.close()
+            self._notify = None
+
+def run_watch(folders: List[WatchFolder], queue: WatchQueue, max_in_flight: Optional[int] = None,
+              max_queued_bytes: int = 0, settle: float = WATCH_SETTLE_SECONDS, poll: bool = False,
+              once: bool = False, stop: Optional[threading.Event] = None,
+              on_event: Callable[[str], None] = _no_log, log_dir: Optional[str] = None,
+              governor: Optional[ResourceGovernor] = None, metrics: Optional[MetricsSink] = None):
+    """
+    Watch hot folders and convert new files through the durable queue.
+    Backpressure: at most max_in_flight ffmpeg jobs run at once, and settled files are only
+    queued while the queued input bytes stay under max_queued_bytes (0 = unbounded); the rest
+    simply wait in their folder. once=True stops when nothing is pending, queued or running.
+    """
+    max_in_flight = max_in_flight or default_workers()
+    stop = stop or threading.Event()
+    watcher = FolderWatcher(folders, settle, poll)
+    in_flight = {}  # queue id -> JobSpec
+    lock = threading.Lock()
+    throttled = [False]
+    recovered = queue.recover()
+    on_event(f"Watching {len(folders)} folder(s) ({watcher.mode}), up to {max_in_flight} job(s) at once\n")
+    if recovered:
+        on_event(f"Requeued {recovered} job(s) interrupted by a previous run\n")
+
+    def done(job_id: int, fut):
+        res = fut.result()
+        with lock:
+            in_flight.pop(job_id, None)
+        if stop.is_set() and not res.ok:
+            queue.requeue(job_id)  # interrupted by shutdown, not a real failure
+            return
+        queue.finish(job_id, res.ok, res.error)
+        if res.ok:
+            on_event(f"ok     {res.job.input} -> {res.job.output} ({res.elapsed:.1f}s)\n")
+        else:
+            on_event(f"FAILED {res.job.input}: {res.error}\n")
+
+    pool = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        while not stop.is_set():
+            for folder, path, size, mtime in watcher.wait(1.0 if not once else 0.2):
+                if queue.known(path, size, mtime):
+                    watcher.release(path)
+                    continue
+                queued = queue.queued_bytes() if max_queued_bytes else 0
+                if queued and queued + size > max_queued_bytes:
+                    if not throttled[0]:
+                        on_event(f"Queue holds {queued / 1024 ** 3:.1f} GB; new files wait in their folders\n")
+                        throttled[0] = True
+                    break
+                throttled[0] = False
+                try:
+                    job = folder.job_for(path)
+                except RuntimeError as e:
+                    on_event(f"Skipped {path}: {e}\n")
+                    watcher.release(path)
+                    continue
+                if queue.enqueue(path, size, mtime, job):
+                    on_event(f"queued {path}\n")
+                watcher.release(path)
+            while True:
+                with lock:
+                    if len(in_flight) >= max_in_flight:
+                        break
+                claimed = queue.claim()
+                if not claimed:
+                    break
+                job_id, job = claimed
+                with lock:
+                    in_flight[job_id] = job
+                on_event(f"start  {job.input}\n")
+                pool.submit(_run_batch_job, job, None, log_dir, governor, metrics).add_done_callback(
+                    lambda fut, job_id=job_id: done(job_id, fut))
+            if once and not watcher.pending and not queue.counts().get("queued"):
+                with lock:
+                    if not in_flight:
+                        break
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+        watcher.close()
@@ -0,0 +1,22 @@
+from media_converter.caps import FFmpegCapabilities, check_command
+
+CAPS = FFmpegCapabilities(ok=True, encoders=["libx264", "aac"], muxers=["mp4", "matroska"],
+                          filters=["scale", "fps", "subtitles"])
+
+def test_supported_command_passes():
+    cmd = ["ffmpeg", "-i", "in.mkv", "-c:v", "libx264", "-c:a", "aac", "-vf", "scale=640:-2,fps=30", "-f", "mp4", "o"]
+    assert check_command(cmd, CAPS) == []
+
+def test_missing_encoders_muxers_and_filters_are_listed():
+    cmd = ["ffmpeg", "-i", "in.mkv", "-c:v", "libx265", "-acodec", "libopus", "-c:s", "copy",
+           "-filter_complex", "[0:v]split[a][b];[a]palettegen[p]", "-f", "webm", "o"]
+    assert check_command(cmd, CAPS) == ["encoder 'libx265'", "encoder 'libopus'", "filter 'split'",
+                                        "filter 'palettegen'", "muxer 'webm'"]
+
+def test_quoted_filter_arguments_are_not_filters():
+    cmd = ["ffmpeg", "-i", "in.mkv", "-vf", "subtitles='C:/subs/odd,name.srt',scale=1280:-2", "o.mkv"]
+    assert check_command(cmd, CAPS) == []
+
+def test_pseudo_muxers_and_unknown_listings_are_accepted():
+    assert check_command(["ffmpeg", "-f", "concat", "-i", "list.txt", "-f", "image2", "o_%03d.png"], CAPS) == []
+    assert check_command(["ffmpeg", "-c:v", "libsvtav1", "-f", "ivf", "o"], FFmpegCapabilities(ok=True)) == []
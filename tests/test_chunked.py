@@ -0,0 +1,44 @@
+from media_converter import chunked
+from media_converter.engine import JobSpec
+from media_converter.chunked import segment_command, segment_layout, split_segments
+
+def _opt(cmd, name):
+    return float(cmd[cmd.index(name) + 1]) if name in cmd else None
+
+def test_split_segments_cuts_at_keyframes():
+    keyframes = [2.0, 10.0, 30.0, 61.0, 95.0, 118.0]
+    assert split_segments(keyframes, 0.0, 120.0, 30.0) == [(0.0, 30.0), (30.0, 61.0), (61.0, 95.0), (95.0, 120.0)]
+
+def test_split_segments_does_not_leave_a_short_tail():
+    # 118 is far enough from the last cut but too close to the end (less than half a segment)
+    assert split_segments([60.0, 118.0], 0.0, 125.0, 60.0) == [(0.0, 60.0), (60.0, 125.0)]
+    assert split_segments([], 5.0, 20.0, 60.0) == [(5.0, 20.0)]
+
+def test_segment_command_timing():
+    job = JobSpec(input="in.mp4", video_codec="h264")
+    segments = [(0.0, 30.0), (30.0, 61.0), (61.0, 95.0)]
+    first = segment_command(job, segments, 0, "s0.mkv")
+    middle = segment_command(job, segments, 1, "s1.mkv")
+    last = segment_command(job, segments, 2, "s2.mkv")
+    assert (_opt(first, "-ss"), _opt(first, "-t")) == (0.0, 29.9995)
+    # inner cuts start just before the keyframe, so it lands in this segment and not the previous one
+    assert (_opt(middle, "-ss"), _opt(middle, "-t")) == (29.9995, 31.0)
+    assert (_opt(last, "-ss"), _opt(last, "-t")) == (60.9995, None)  # runs to the end of the input
+    assert last[-1] == "s2.mkv" and "-an" in last
+
+def test_last_segment_honours_duration():
+    job = JobSpec(input="in.mp4", video_codec="h264", duration="95")
+    cmd = segment_command(job, [(0.0, 61.0), (61.0, 95.0)], 1, "s1.mkv")
+    assert (_opt(cmd, "-ss"), _opt(cmd, "-t")) == (60.9995, 34.0)
+
+def test_burn_in_segment_keeps_source_timestamps():
+    job = JobSpec(mode="Subtitles: Burn into Video", input="in.mp4", image_pattern="subs.srt")
+    cmd = segment_command(job, [(0.0, 30.0), (30.0, 60.0)], 1, "s1.mkv")
+    assert cmd[cmd.index("-vf") + 1] == "setpts=PTS+29.999500/TB,subtitles='subs.srt',setpts=PTS-29.999500/TB"
+
+def test_segment_layout_trims_to_start_and_duration(monkeypatch):
+    monkeypatch.setattr(chunked, "probe_keyframes", lambda path: [k + 1.0 for k in (0, 30, 60, 90, 120, 150)])
+    job = JobSpec(input="in.mp4", start_time="20", duration="120", chunk_seconds="30")
+    info = {"format": {"start_time": "1.0", "duration": "180"}}
+    # keyframes are shifted by the file start time; the trimmed range is [20, 140)
+    assert segment_layout(job, info) == (20.0, 140.0, [(20.0, 60.0), (60.0, 90.0), (90.0, 120.0), (120.0, 140.0)])
@@ -0,0 +1,31 @@
+import pytest
+
+from media_converter.engine import Rendition, parse_renditions, parse_size
+
+@pytest.mark.parametrize("text, expected", [
+    ("123456", 123456),
+    ("900k", 900 * 1024),
+    ("700M", 700 * 1024 ** 2),
+    ("25MB", 25 * 1024 ** 2),
+    ("1.5G", int(1.5 * 1024 ** 3)),
+    (" 2 GiB ", 2 * 1024 ** 3),
+    ("", None),
+    ("big", None),
+    ("-5M", None),
+])
+def test_parse_size(text, expected):
+    assert parse_size(text) == expected
+
+def test_parse_renditions():
+    assert parse_renditions("1080:crf=20, 1280x720:2800k,480p:1200k:codec=hevc,") == [
+        Rendition(1080, crf="20"),
+        Rendition(720, 1280, bitrate="2800k"),
+        Rendition(480, bitrate="1200k", codec="hevc (h265)"),
+    ]
+    assert parse_renditions("") == []
+    assert [r.label for r in parse_renditions("720,640x360")] == ["720p", "640x360"]
+
+@pytest.mark.parametrize("text", ["1280x720@2500k", "720:fast", "720:codec=mpeg2"])
+def test_parse_renditions_rejects_bad_entries(text):
+    with pytest.raises(RuntimeError):
+        parse_renditions(text)
@@ -0,0 +1,24 @@
+import pytest
+
+from media_converter.frames import _NPY_HEADER_LEN, _npy_header
+
+def test_header_layout():
+    header = _npy_header("|u1", (3, 4, 5, 3))
+    assert len(header) == _NPY_HEADER_LEN
+    assert header[:8] == b"\x93NUMPY\x01\x00"
+    assert int.from_bytes(header[8:10], "little") == _NPY_HEADER_LEN - 10
+    assert header.endswith(b"\n")
+    assert b"'shape': (3, 4, 5, 3, )" in header
+
+def test_numpy_reads_the_array(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = tmp_path / "frames.npy"
+    data = bytes(range(2 * 3 * 4))
+    path.write_bytes(_npy_header("<u2", (2, 3, 2)) + data)
+    arr = np.load(str(path))
+    assert arr.shape == (2, 3, 2) and arr.dtype == np.dtype("<u2")
+    assert arr.tobytes() == data
+
+def test_oversized_shape_is_rejected():
+    with pytest.raises(RuntimeError):
+        _npy_header("<f4", tuple(range(1, 40)))
@@ -0,0 +1,38 @@
+import pytest
+
+from media_converter.progress import ProgressTracker, format_seconds, parse_timestamp
+
+@pytest.mark.parametrize("text, expected", [
+    ("90", 90.0), ("1:30", 90.0), ("00:01:30.5", 90.5), ("1500ms", 1.5), ("2s", 2.0), ("-0:05", -5.0),
+    ("", None), ("abc", None),
+])
+def test_parse_timestamp(text, expected):
+    assert parse_timestamp(text) == expected
+
+def test_format_seconds():
+    assert format_seconds(3725.4) == "1:02:05"
+
+def test_feed_emits_one_snapshot_per_block():
+    tracker = ProgressTracker(total=100.0, step=2, steps=3)
+    block = ["frame=250", "fps=N/A", "bitrate=1200.5kbits/s", "out_time_us=10000000", "speed=2.5x", "progress=continue"]
+    results = [tracker.feed(line + "\n") for line in block]
+    assert all(consumed for consumed, _ in results)
+    assert [snap for _, snap in results[:-1]] == [None] * 5
+    snap = results[-1][1]
+    assert (snap.frame, snap.fps, snap.bitrate, snap.out_time, snap.speed) == (250, 0.0, "1200.5kbits/s", 10.0, 2.5)
+    assert (snap.percent, snap.step, snap.steps, snap.done) == (10.0, 2, 3, False)
+
+def test_feed_ignores_other_lines_and_keeps_out_time_monotonic():
+    tracker = ProgressTracker(total=20.0)
+    assert tracker.feed("[libx264 @ 0x1] frame I:1") == (False, None)
+    tracker.feed("out_time_ms=8000000")  # microseconds despite the name
+    tracker.feed("out_time_us=N/A")
+    _, snap = tracker.feed("progress=end")
+    assert snap.out_time == 8.0 and snap.done and snap.percent == 100.0
+
+def test_snapshots_are_independent_copies():
+    tracker = ProgressTracker()
+    tracker.feed("frame=1")
+    _, first = tracker.feed("progress=continue")
+    tracker.feed("frame=2")
+    assert first.frame == 1
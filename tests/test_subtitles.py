@@ -0,0 +1,74 @@
+import pytest
+
+from media_converter.engine import Cue, convert_subtitles, detect_encoding, read_subtitles, shift_cues, write_subtitles
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello
+<i>world</i>
+
+2
+00:01:00,250 --> 00:01:03,000
+<font color="red">Second</font>
+"""
+
+ASS = """[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize
+Style: Top,Arial,20
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 1,0:00:01.00,0:00:02.50,Top,,0,0,0,,{\\i1}Hello{\\i0}\\Nworld, again
+"""
+
+def _write(tmp_path, name, text, encoding="utf-8"):
+    path = tmp_path / name
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+def test_read_srt_keeps_basic_tags_and_drops_others(tmp_path):
+    cues = list(read_subtitles(_write(tmp_path, "a.srt", SRT)))
+    assert cues == [Cue(1.0, 2.5, "Hello\n<i>world</i>"), Cue(60.25, 63.0, "Second")]
+
+@pytest.mark.parametrize("fmt", ["srt", "vtt", "ass", "ssa"])
+def test_round_trip(tmp_path, fmt):
+    cues = [Cue(1.0, 2.5, "Hello\n<i>world</i>"), Cue(3661.25, 3662.0, "Later")]
+    path = str(tmp_path / f"out.{fmt}")
+    assert write_subtitles(path, cues) == 2
+    back = list(read_subtitles(path))
+    assert [(c.start, c.end, c.text) for c in back] == [(c.start, c.end, c.text) for c in cues]
+
+def test_ass_round_trip_keeps_header_and_event_fields(tmp_path):
+    src = _write(tmp_path, "in.ass", ASS)
+    dst = str(tmp_path / "out.ass")
+    assert convert_subtitles(src, dst) == 1
+    text = open(dst, encoding="utf-8").read()
+    assert "Style: Top,Arial,20" in text
+    assert "Dialogue: 1,0:00:01.00,0:00:02.50,Top,,0,0,0,,{\\i1}Hello{\\i0}\\Nworld, again" in text
+
+def test_vtt_header_and_cue_settings(tmp_path):
+    vtt = "WEBVTT\n\nNOTE a comment\n\n00:01.000 --> 00:02.000 align:start\n<v Bob>Hi</v>\n"
+    assert list(read_subtitles(_write(tmp_path, "a.vtt", vtt))) == [Cue(1.0, 2.0, "Hi")]
+
+def test_shift_clamps_and_drops_cues_before_zero():
+    cues = [Cue(0.5, 1.0, "gone"), Cue(1.5, 3.0, "clamped"), Cue(5.0, 6.0, "moved")]
+    assert list(shift_cues(cues, -2.0)) == [Cue(0.0, 1.0, "clamped"), Cue(3.0, 4.0, "moved")]
+
+def test_convert_with_offset(tmp_path):
+    src = _write(tmp_path, "a.srt", SRT)
+    dst = str(tmp_path / "b.vtt")
+    assert convert_subtitles(src, dst, offset=1.5) == 2
+    assert open(dst, encoding="utf-8").read().startswith("WEBVTT\n\n00:00:02.500 --> 00:00:04.000\n")
+
+def test_legacy_encodings_are_detected(tmp_path):
+    assert detect_encoding("café".encode("cp1252")) == "cp1252"
+    assert detect_encoding(b"\xef\xbb\xbfabc") == "utf-8-sig"
+    path = _write(tmp_path, "a.srt", SRT.replace("Hello", "Caf\u00e9"), "utf-16")
+    assert next(read_subtitles(path)).text.startswith("Caf\u00e9")
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(RuntimeError):
+        write_subtitles(str(tmp_path / "a.txt"), [])